@@ -0,0 +1,146 @@
+"""ASR autotune: pick recognizer thread count and chunk size for this machine.
+
+Runs a reference WAV through ``OnlineRecognizer`` for every combination of
+thread count and chunk size, then selects the setting with the lowest
+partial-result latency whose real-time factor still meets the target.
+
+Usage::
+
+    python -m app.asr_autotune reference.wav [--threads 1,2,4] [--chunks 50,100,200]
+                                             [--rtf-target 0.3] [--apply]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+import soundfile as sf
+
+from app.common.dsp import resample
+from app.config import AppConfig, CONFIG_PATH
+from app.core.asr_engine import ASREngine
+
+
+@dataclass
+class TrialResult:
+    num_threads: int
+    chunk_ms: int
+    rtf: float                 # decode time / audio duration
+    partial_latency_ms: float  # mean buffering wait + mean decode time per chunk
+    text: str
+
+
+def load_reference(path: str, sample_rate: int) -> np.ndarray:
+    """Read a WAV file as mono float32 at ``sample_rate``."""
+    data, rate = sf.read(path, dtype="float32")
+    if data.ndim == 2:
+        data = data.mean(axis=1)
+    return resample(data, rate, sample_rate).astype(np.float32, copy=False)
+
+
+def run_trial(engine: ASREngine, audio: np.ndarray, chunk_ms: int) -> TrialResult:
+    """Feed ``audio`` chunk by chunk as fast as possible and time each decode."""
+    chunk = max(1, engine.sample_rate * chunk_ms // 1000)
+    decode_times = []
+    engine.reset()
+    for start in range(0, len(audio), chunk):
+        t0 = time.perf_counter()
+        engine.accept_waveform(audio[start:start + chunk])
+        engine.get_partial_result()
+        decode_times.append(time.perf_counter() - t0)
+    text = engine.get_partial_result()
+    engine.reset()
+
+    duration = len(audio) / engine.sample_rate
+    mean_decode = float(np.mean(decode_times)) if decode_times else 0.0
+    return TrialResult(
+        num_threads=engine.num_threads,
+        chunk_ms=chunk_ms,
+        rtf=sum(decode_times) / duration if duration else 0.0,
+        partial_latency_ms=chunk_ms / 2 + mean_decode * 1000,
+        text=text,
+    )
+
+
+def choose(results: Sequence[TrialResult], rtf_target: float) -> Optional[TrialResult]:
+    """Lowest-latency result meeting ``rtf_target``; else the fastest overall."""
+    if not results:
+        return None
+    passing = [r for r in results if r.rtf <= rtf_target]
+    if passing:
+        return min(passing, key=lambda r: (r.partial_latency_ms, r.num_threads))
+    return min(results, key=lambda r: r.rtf)
+
+
+def autotune(
+    wav_path: str,
+    threads: Sequence[int],
+    chunks: Sequence[int],
+    rtf_target: float,
+    config: AppConfig,
+) -> List[TrialResult]:
+    """Benchmark every (threads, chunk) pair and return all results."""
+    asr = config.asr
+    audio = load_reference(wav_path, asr.sample_rate)
+    results = []
+    for n in threads:
+        engine = ASREngine(
+            model_dir=asr.model_dir,
+            language=asr.language,
+            sample_rate=asr.sample_rate,
+            num_threads=n,
+            provider=asr.provider,
+            decoding_method=asr.decoding_method,
+        )
+        if not engine.initialize():
+            raise RuntimeError("ASR model not found, see models/README.md")
+        run_trial(engine, audio[:asr.sample_rate], chunks[0])  # warm-up
+        for chunk_ms in chunks:
+            result = run_trial(engine, audio, chunk_ms)
+            results.append(result)
+            print(
+                f"threads={n:<2} chunk={chunk_ms:>4}ms  "
+                f"RTF={result.rtf:.3f}  partial latency={result.partial_latency_ms:.1f}ms"
+            )
+        engine.shutdown()
+    return results
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Tune ASR threads and chunk size")
+    parser.add_argument("wav", help="reference speech recording")
+    parser.add_argument("--threads", type=_int_list, default=[1, 2, 4])
+    parser.add_argument("--chunks", type=_int_list, default=[50, 100, 200])
+    parser.add_argument("--rtf-target", type=float, default=0.3,
+                        help="maximum acceptable real-time factor")
+    parser.add_argument("--apply", action="store_true",
+                        help=f"write the chosen setting to {CONFIG_PATH.name}")
+    args = parser.parse_args(argv)
+
+    config = AppConfig.load(create=False)  # only --apply writes config.json
+    results = autotune(args.wav, args.threads, args.chunks, args.rtf_target, config)
+    best = choose(results, args.rtf_target)
+    if best is None:
+        return 1
+    if best.rtf > args.rtf_target:
+        print(f"No setting met RTF <= {args.rtf_target}; using the fastest one")
+    print(f"Selected: num_threads={best.num_threads}, chunk_ms={best.chunk_ms}")
+
+    if args.apply:
+        config.asr.num_threads = best.num_threads
+        config.asr.chunk_ms = best.chunk_ms
+        config.save()
+        print(f"Saved to {CONFIG_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
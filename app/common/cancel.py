@@ -0,0 +1,45 @@
+"""Cooperative cancellation shared between threads."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, List, Optional
+
+
+class CancelToken:
+    """Set once to cancel; everything registered with :meth:`on_cancel` is run.
+
+    A request, its decoding and its playback each register how to abort
+    themselves, so one ``cancel()`` from the UI stops all of them wherever
+    they are. Callbacks run on the cancelling thread and must not block.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.cancelled_at: Optional[float] = None  # monotonic time of cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancelled_at is not None
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Run ``callback`` on cancellation (immediately if already cancelled)."""
+        with self._lock:
+            if self.cancelled_at is None:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self.cancelled_at is not None:
+                return
+            self.cancelled_at = time.monotonic()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Cancel callback failed: {e}")
@@ -0,0 +1,142 @@
+"""Streaming polyphase resampler shared by ASR capture and playback."""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from math import ceil, gcd
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Zero crossings of the windowed-sinc kernel on each side, measured at the
+# lower of the two rates. Higher values sharpen the transition band.
+DEFAULT_ZERO_CROSSINGS = 8
+KAISER_BETA = 8.0
+# Passband edge as a fraction of the lower Nyquist frequency
+ROLLOFF = 0.92
+
+
+@lru_cache(maxsize=32)
+def _filter_bank(up: int, down: int, zero_crossings: int) -> np.ndarray:
+    """Design the prototype low-pass and split it into ``up`` phases.
+
+    Returns an array of shape ``(up, taps)`` where row ``p`` holds the
+    coefficients applied to ``x[i], x[i-1], ...`` for output phase ``p``.
+    """
+    taps = int(ceil(2 * zero_crossings * max(1.0, down / up)))
+    length = taps * up
+    cutoff = ROLLOFF / max(up, down)  # normalized to the upsampled Nyquist
+    n = np.arange(length) - (length - 1) / 2.0
+    h = cutoff * np.sinc(cutoff * n) * np.kaiser(length, KAISER_BETA)
+    h *= up / h.sum()  # unity DC gain after zero-stuffing
+    bank = h.reshape(taps, up).T.astype(np.float32)
+    bank.setflags(write=False)
+    return bank
+
+
+@lru_cache(maxsize=256)
+def _block_tables(up: int, down: int, zero_crossings: int, offset: int, n_in: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Gather indices and per-output coefficients for one input block.
+
+    ``offset`` is the position of the first output sample, in upsampled
+    units, relative to the first sample of the block. Both tables only
+    depend on (rates, block size, offset), so steady-state streaming with a
+    fixed block size reuses a handful of cached entries.
+    """
+    bank = _filter_bank(up, down, zero_crossings)
+    taps = bank.shape[1]
+    count = max(0, -(-(n_in * up - offset) // down))
+    pos = offset + np.arange(count, dtype=np.int64) * down
+    base = pos // up + (taps - 1)  # index into [history | block]
+    idx = base[:, np.newaxis] - np.arange(taps)[np.newaxis, :]
+    coeffs = bank[pos % up]
+    idx.setflags(write=False)
+    coeffs.setflags(write=False)
+    return idx, coeffs
+
+
+class StreamingResampler:
+    """Stateful rational-ratio polyphase resampler.
+
+    Feed consecutive blocks to :meth:`process`; filter history is carried
+    between calls so block boundaries are seamless. Accepts mono ``(n,)``
+    or multichannel ``(n, channels)`` float input and returns float32.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int, zero_crossings: int = DEFAULT_ZERO_CROSSINGS):
+        g = gcd(int(src_rate), int(dst_rate))
+        self.src_rate = int(src_rate)
+        self.dst_rate = int(dst_rate)
+        self.up = self.dst_rate // g
+        self.down = self.src_rate // g
+        self.zero_crossings = zero_crossings
+        self.taps = _filter_bank(self.up, self.down, zero_crossings).shape[1]
+        self._history: Optional[np.ndarray] = None
+        self._ext: Optional[np.ndarray] = None
+        self._offset = 0
+
+    @property
+    def passthrough(self) -> bool:
+        """True when source and target rates match and no filtering is done."""
+        return self.up == self.down
+
+    @property
+    def delay(self) -> float:
+        """Group delay of the filter in output samples."""
+        return ((self.taps * self.up - 1) / 2.0) / self.down
+
+    def output_length(self, n_in: int) -> int:
+        """Number of samples the next ``process`` call will return for ``n_in`` inputs."""
+        if self.up == self.down:
+            return n_in
+        return max(0, -(-(n_in * self.up - self._offset) // self.down))
+
+    def reset(self) -> None:
+        """Forget filter history (e.g. after a device change)."""
+        self._history = None
+        self._offset = 0
+
+    def process(self, x: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Resample one block, continuing from the previous call."""
+        if self.up == self.down:
+            if out is None:
+                return x.astype(np.float32, copy=False)
+            out[...] = x
+            return out
+
+        n_in = x.shape[0]
+        hist_len = self.taps - 1
+        tail_shape = x.shape[1:]
+        if self._history is None or self._history.shape[1:] != tail_shape:
+            self._history = np.zeros((hist_len,) + tail_shape, dtype=np.float32)
+
+        ext_len = hist_len + n_in
+        if self._ext is None or self._ext.shape != (ext_len,) + tail_shape:
+            self._ext = np.empty((ext_len,) + tail_shape, dtype=np.float32)
+        ext = self._ext
+        ext[:hist_len] = self._history
+        ext[hist_len:] = x
+
+        idx, coeffs = _block_tables(self.up, self.down, self.zero_crossings, self._offset, n_in)
+        gathered = ext[idx]
+        if gathered.ndim == 2:
+            result = np.einsum("ij,ij->i", gathered, coeffs, out=out)
+        else:
+            result = np.einsum("ij,ijc->ic", coeffs, gathered, out=out)
+
+        self._history[...] = ext[n_in:]
+        # Advance to the first output position of the next block
+        self._offset = self._offset + len(idx) * self.down - n_in * self.up
+        return result
+
+
+def resample(data: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """One-shot resample of a complete signal with filter delay removed."""
+    if src_rate == dst_rate:
+        return data
+    rs = StreamingResampler(src_rate, dst_rate)
+    expected = int(data.shape[0] * rs.up / rs.down)
+    delay = int(round(rs.delay))
+    pad = np.zeros((rs.taps,) + data.shape[1:], dtype=np.float32)
+    y = np.concatenate([rs.process(data), rs.process(pad)])
+    return y[delay:delay + expected]
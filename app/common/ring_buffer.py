@@ -0,0 +1,101 @@
+"""Preallocated single-producer / single-consumer audio ring buffer."""
+
+from __future__ import annotations
+
+import threading
+from typing import Optional
+
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-size float32 ring buffer shared by one writer and one reader.
+
+    The writer (typically a PortAudio callback) only advances ``_write_pos``
+    and the reader only advances ``_read_pos``, so neither side takes a lock.
+    Positions grow monotonically; the fill level is their difference.
+    When the buffer is full the incoming samples are dropped and counted
+    in ``overflow_count`` rather than blocking the audio thread.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._buf = np.zeros(capacity, dtype=np.float32)
+        self._write_pos = 0
+        self._read_pos = 0
+        self._data_ready = threading.Event()
+        self.overflow_count = 0   # samples dropped because the buffer was full
+        self.underrun_count = 0   # reads that timed out waiting for data
+
+    @property
+    def available(self) -> int:
+        """Number of samples ready to be read."""
+        return self._write_pos - self._read_pos
+
+    def write(self, samples: np.ndarray) -> int:
+        """Copy samples into the buffer. Returns the number of samples stored."""
+        n = min(len(samples), self.capacity - self.available)
+        if n < len(samples):
+            self.overflow_count += len(samples) - n
+        if n <= 0:
+            return 0
+        start = self._write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        self._buf[start:start + first] = samples[:first]
+        if first < n:
+            self._buf[:n - first] = samples[first:n]
+        self._write_pos += n
+        self._data_ready.set()
+        return n
+
+    def read_into(self, out: np.ndarray, timeout: Optional[float] = None) -> bool:
+        """Fill ``out`` completely from the buffer.
+
+        Waits up to ``timeout`` seconds for enough samples. Returns False
+        (and counts an underrun) if they did not arrive in time.
+        """
+        n = len(out)
+        while self.available < n:
+            self._data_ready.clear()
+            if self.available >= n:
+                break
+            if not self._data_ready.wait(timeout):
+                self.underrun_count += 1
+                return False
+        start = self._read_pos % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._buf[start:start + first]
+        if first < n:
+            out[first:] = self._buf[:n - first]
+        self._read_pos += n
+        return True
+
+    def read_available(self, out: np.ndarray) -> int:
+        """Copy up to ``len(out)`` samples without waiting. Returns the count copied.
+
+        Meant for playback callbacks, which must never block and fill the
+        remainder of their buffer with silence themselves.
+        """
+        n = min(len(out), self.available)
+        start = self._read_pos % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._buf[start:start + first]
+        if first < n:
+            out[first:n] = self._buf[:n - first]
+        self._read_pos += n
+        return n
+
+    def read(self, n: int, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """Read exactly ``n`` samples into a new array, or None on timeout."""
+        out = np.empty(n, dtype=np.float32)
+        return out if self.read_into(out, timeout) else None
+
+    def keep_latest(self, n: int) -> None:
+        """Discard all but the newest ``n`` samples (reader side only)."""
+        self._read_pos = max(self._read_pos, self._write_pos - n)
+
+    def clear(self) -> None:
+        """Discard all buffered samples (reader side only)."""
+        self._read_pos = self._write_pos
@@ -0,0 +1,89 @@
+"""Incremental decoding of WAV audio arriving in arbitrary byte chunks."""
+
+from __future__ import annotations
+
+import struct
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+# (format tag, bits per sample) -> numpy dtype and scale to [-1, 1)
+_SAMPLE_FORMATS = {
+    (1, 16): (np.dtype("<i2"), 1 / 32768.0),
+    (1, 32): (np.dtype("<i4"), 1 / 2147483648.0),
+    (3, 32): (np.dtype("<f4"), 1.0),
+}
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavStreamDecoder:
+    """Parses a WAV header and turns the PCM that follows into float32 frames.
+
+    Streaming servers (GPT-SoVITS ``streaming_mode``) send a header with a
+    placeholder data size followed by raw PCM, so the data chunk is read
+    until the stream ends regardless of its declared size. Partial samples
+    split across chunks are carried over to the next :meth:`feed`.
+    """
+
+    def __init__(self):
+        self.sample_rate: Optional[int] = None
+        self.channels = 1
+        self._dtype: Optional[np.dtype] = None
+        self._scale = 1.0
+        self._pending = b""
+        self._in_data = False
+
+    def _parse_header(self) -> bool:
+        """Consume header chunks up to the start of ``data``; False if more bytes are needed."""
+        buf = self._pending
+        if len(buf) < 12:
+            return False
+        if buf[:4] != b"RIFF" or buf[8:12] != b"WAVE":
+            raise ValueError("Not a WAV stream")
+        pos = 12
+        while True:
+            if len(buf) < pos + 8:
+                return False
+            chunk_id, size = buf[pos:pos + 4], struct.unpack("<I", buf[pos + 4:pos + 8])[0]
+            if chunk_id == b"data":
+                self._pending = buf[pos + 8:]
+                return True
+            if len(buf) < pos + 8 + size:
+                return False
+            if chunk_id == b"fmt ":
+                tag, channels, rate = struct.unpack("<HHI", buf[pos + 8:pos + 16])
+                bits = struct.unpack("<H", buf[pos + 22:pos + 24])[0]
+                if tag == _WAVE_FORMAT_EXTENSIBLE:
+                    tag = struct.unpack("<H", buf[pos + 32:pos + 34])[0]
+                if (tag, bits) not in _SAMPLE_FORMATS:
+                    raise ValueError(f"Unsupported WAV format {tag} with {bits}-bit samples")
+                self._dtype, self._scale = _SAMPLE_FORMATS[tag, bits]
+                self.channels = channels
+                self.sample_rate = rate
+            pos += 8 + size + (size & 1)  # chunks are word aligned
+
+    def feed(self, data: bytes) -> np.ndarray:
+        """Add bytes; return the complete float32 frames they finish (mono: 1-D)."""
+        self._pending += data
+        if not self._in_data:
+            if not self._parse_header():
+                return np.empty(0, dtype=np.float32)
+            if self._dtype is None:
+                raise ValueError("WAV data before fmt chunk")
+            self._in_data = True
+        frame_bytes = self._dtype.itemsize * self.channels
+        usable = len(self._pending) - len(self._pending) % frame_bytes
+        raw, self._pending = self._pending[:usable], self._pending[usable:]
+        samples = np.frombuffer(raw, dtype=self._dtype).astype(np.float32)
+        if self._scale != 1.0:
+            samples *= self._scale
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels)
+        return samples
+
+    def frames(self, chunks: Iterable[bytes]) -> Iterator[Tuple[np.ndarray, int]]:
+        """Yield ``(frames, sample_rate)`` for each chunk that completes any frames."""
+        for chunk in chunks:
+            samples = self.feed(chunk)
+            if len(samples):
+                yield samples, self.sample_rate
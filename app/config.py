@@ -36,15 +36,44 @@ class ASRConfig:
     model_dir: str = "models"
     language: str = "zh"  # zh, en, ja, ko, auto
     microphone_name: str = ""
-    voice_mode: str = "push_to_talk"  # push_to_talk, toggle, open_mic
+    voice_mode: str = "push_to_talk"  # push_to_talk, toggle, open_mic, wake_word
     hotkey: str = "Key.f2"
     sample_rate: int = 16000
+    vad_enabled: bool = True  # gate the recognizer on speech in open_mic mode
+    vad_threshold_db: float = -45.0
+    vad_hangover_ms: int = 600
+    preroll_ms: int = 300  # audio kept from before the hotkey press (200-500 typical)
+    # Recognizer runtime (see `python -m app.asr_autotune` to pick values)
+    num_threads: int = 4
+    provider: str = "cpu"  # cpu, cuda, coreml
+    decoding_method: str = "greedy_search"
+    rule1_min_trailing_silence: float = 2.4
+    rule2_min_trailing_silence: float = 1.0
+    rule3_min_utterance_length: float = 20.0
+    chunk_ms: int = 100
+    # Recognizers for previously used languages stay loaded up to this size
+    model_memory_budget_mb: int = 2048
+    # Re-decode each final with an offline model (needs one in models/)
+    second_pass_enabled: bool = False
+    second_pass_budget_ms: int = 1500
+    second_pass_threads: int = 2
+    partial_max_rate_hz: float = 5.0  # 0 = emit every changed partial
+    metrics_log: bool = False  # append per-utterance timings to asr_metrics.jsonl
+    # wake_word mode: tokenized keywords (empty = keywords.txt of the KWS model)
+    wake_keywords_file: str = ""
+    wake_threshold: float = 0.25  # lower = more sensitive, more false wakes
 
 
 @dataclass
 class TTSConfig:
     enabled: bool = True
     api_url: str = "http://127.0.0.1:9880"
+    api_urls: list = field(default_factory=list)  # more GPT-SoVITS servers sharing the load
+    routing: str = "least_outstanding"  # least_outstanding, ewma
+    health_interval: float = 5.0       # seconds between health probes of the servers (0 = off)
+    eject_failures: int = 3            # consecutive failures before a server is taken out
+    eject_seconds: float = 30.0        # how long a taken-out server gets no requests
+    hedge_delay_ms: int = 0            # resend to a second server after this long (0 = off)
     ref_audio_path: str = ""
     prompt_text: str = ""
     prompt_lang: str = "zh"
@@ -58,6 +87,19 @@ class TTSConfig:
     seed: int = -1
     media_type: str = "wav"
     streaming_mode: bool = False
+    sentence_pipelining: bool = False  # split locally and synthesize sentence by sentence
+    sentence_concurrency: int = 2      # sentence requests in flight when pipelining
+    cache_enabled: bool = True         # reuse audio of repeated text (fixed seed only)
+    cache_memory_mb: int = 64
+    cache_disk_mb: int = 512
+    connect_timeout: float = 5.0       # seconds to open a connection to the API
+    read_timeout: float = 60.0         # seconds to wait for each piece of the response
+    max_connections: int = 4           # pooled keep-alive connections to the API
+    keepalive_expiry: float = 30.0     # seconds an idle connection stays open
+    queue_size: int = 8                # requests waiting for synthesis
+    queue_max_age: float = 20.0        # seconds a request may wait before it is dropped
+    coalesce_max_chars: int = 40       # merge queued ASR finals up to this many characters
+    stop_endpoint: str = ""            # path GET on cancel to stop server-side generation ("" = none)
     repetition_penalty: float = 1.35
     sample_steps: int = 32
     super_sampling: bool = False
@@ -85,11 +127,13 @@ class AppConfig:
         path.write_text(json.dumps(asdict(self), indent=2, ensure_ascii=False), encoding="utf-8")
 
     @classmethod
-    def load(cls, path: Optional[Path] = None) -> AppConfig:
+    def load(cls, path: Optional[Path] = None, create: bool = True) -> AppConfig:
+        """Read the config; a missing file gives defaults, written out if ``create``."""
         path = path or CONFIG_PATH
         if not path.exists():
             cfg = cls()
-            cfg.save(path)
+            if create:
+                cfg.save(path)
             return cfg
         try:
             data = json.loads(path.read_text(encoding="utf-8"))
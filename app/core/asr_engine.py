@@ -3,22 +3,158 @@
 from __future__ import annotations
 
 import os
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import sherpa_onnx
 
 from app.config import BASE_DIR
+from app.core.decode_scheduler import BatchDecodeScheduler
+from app.core.model_registry import ModelInfo, get_registry
+
+
+# Recognizer settings that require rebuilding the OnlineRecognizer when changed
+RUNTIME_FIELDS = (
+    "num_threads",
+    "provider",
+    "decoding_method",
+    "rule1_min_trailing_silence",
+    "rule2_min_trailing_silence",
+    "rule3_min_utterance_length",
+)
+
+# Silence appended before input_finished() when closing an utterance, per
+# model type: enough to push the last frames through the model's chunk and
+# right context, and no more (a flush costs as much as decoding the padding)
+TAIL_PADDING_SECONDS = {
+    "paraformer": 0.66,  # 600 ms chunks plus look-ahead
+    "transducer": 0.3,
+    "ctc": 0.3,
+}
+
+
+class ASRStream:
+    """One audio source decoding on an engine's shared recognizer.
+
+    A stream holds only its own features and hypotheses, so every extra
+    microphone or speaker costs a few MB instead of another copy of the
+    model. Each stream belongs to one thread (its ASRWorker); decoding is
+    routed through the engine, which batches ready streams from all
+    sources once more than one is open.
+    """
+
+    def __init__(self, engine: "ASREngine"):
+        self.engine = engine
+        self._recognizer: Optional[sherpa_onnx.OnlineRecognizer] = None
+        self._stream: Optional[sherpa_onnx.OnlineStream] = None
+        # Per-source buffer, so workers never write into each other's audio
+        self._staging = np.empty(int(engine.sample_rate * 0.1), dtype=np.float32)
+
+    def _current(self):
+        """(recognizer, stream); the stream is recreated after a model switch."""
+        with self.engine._lock:
+            recognizer = self.engine._recognizer
+        if recognizer is None:
+            return None, None
+        if recognizer is not self._recognizer:
+            self._recognizer = recognizer
+            self._stream = recognizer.create_stream()
+        return recognizer, self._stream
+
+    def staging_buffer(self, n: int) -> np.ndarray:
+        """Reusable float32 view of length ``n`` (see ASREngine.staging_buffer)."""
+        if len(self._staging) < n:
+            self._staging = np.empty(n, dtype=np.float32)
+        return self._staging[:n]
+
+    def accept_waveform(self, samples: np.ndarray) -> None:
+        """Feed audio samples (float32, mono, sample_rate) to the recognizer.
+
+        sherpa-onnx binds the waveform as ``std::vector<float>``, so the
+        conversion happens in C++ either way. A memoryview over the float32
+        buffer is the cheapest input for that caster: no Python list is
+        built (``tolist``) and no numpy scalar is created per sample (plain
+        ndarray). Non-float32 or non-contiguous input is first copied once
+        into the staging buffer.
+        """
+        if samples.dtype != np.float32 or not samples.flags.c_contiguous:
+            staged = self.staging_buffer(len(samples))
+            np.copyto(staged, samples, casting="unsafe")
+            samples = staged
+        _, stream = self._current()
+        if stream is not None:
+            stream.accept_waveform(self.engine.sample_rate, memoryview(samples))
+
+    def get_partial_result(self) -> str:
+        """Decode what is ready and return the current partial result."""
+        recognizer, stream = self._current()
+        if recognizer is None:
+            return ""
+        self.engine.decode(recognizer, stream)
+        return recognizer.get_result(stream).strip()
+
+    def is_endpoint(self) -> bool:
+        """Whether an endpoint (end of utterance) is detected."""
+        recognizer, stream = self._current()
+        return recognizer is not None and recognizer.is_endpoint(stream)
+
+    def reset(self) -> None:
+        """Reset the stream for a new utterance."""
+        recognizer, stream = self._current()
+        if recognizer is not None:
+            recognizer.reset(stream)
+
+    def finish(self) -> str:
+        """Close the current utterance and return its final text.
+
+        Feeds ``engine.tail_padding`` seconds of silence, marks the stream
+        with ``input_finished()`` so the feature extractor flushes its last
+        frames, decodes what is left and starts a fresh stream (a finished
+        stream accepts no more audio).
+        """
+        recognizer, stream = self._current()
+        if recognizer is None:
+            return ""
+        padding = self.staging_buffer(int(self.engine.sample_rate * self.engine.tail_padding))
+        padding.fill(0.0)
+        if len(padding):
+            stream.accept_waveform(self.engine.sample_rate, memoryview(padding))
+        stream.input_finished()
+        self.engine.decode(recognizer, stream)
+        text = recognizer.get_result(stream).strip()
+        self._stream = recognizer.create_stream()
+        return text
+
+    def close(self) -> None:
+        self.engine.close_stream(self)
+        self._stream = None
+        self._recognizer = None
 
 
 class ASREngine:
-    """Wraps sherpa-onnx OnlineRecognizer for streaming ASR."""
+    """Wraps sherpa-onnx OnlineRecognizer for streaming ASR.
+
+    Capture workers open an :class:`ASRStream` each. The engine's own
+    ``accept_waveform``/``finish``/... methods serve single-source callers
+    (autotune, benchmarks) through a default ASRStream of their own.
+    """
 
     def __init__(
         self,
         model_dir: str = "models",
         language: str = "zh",
         sample_rate: int = 16000,
+        num_threads: int = 4,
+        provider: str = "cpu",
+        decoding_method: str = "greedy_search",
+        rule1_min_trailing_silence: float = 2.4,
+        rule2_min_trailing_silence: float = 1.0,
+        rule3_min_utterance_length: float = 20.0,
+        memory_budget_mb: int = 2048,
     ):
         path = Path(model_dir)
         # Resolve relative paths against the application base directory
@@ -27,102 +163,274 @@ class ASREngine:
         self.model_dir = path
         self.language = language
         self.sample_rate = sample_rate
+        self.num_threads = num_threads
+        self.provider = provider
+        self.decoding_method = decoding_method
+        self.rule1_min_trailing_silence = rule1_min_trailing_silence
+        self.rule2_min_trailing_silence = rule2_min_trailing_silence
+        self.rule3_min_utterance_length = rule3_min_utterance_length
+        # Guards the recognizer so it can be rebuilt while workers run
+        self._lock = threading.RLock()
         self._recognizer: Optional[sherpa_onnx.OnlineRecognizer] = None
-        self._stream: Optional[sherpa_onnx.OnlineStream] = None
+        self._default_stream: Optional[ASRStream] = None  # for the single-stream methods
+        self.model: Optional[ModelInfo] = None  # model currently loaded
+        # Loaded recognizers keyed by model path, least recently used first.
+        # Inactive ones are evicted once their weights exceed the budget.
+        self.memory_budget_mb = memory_budget_mb
+        self._pool: "OrderedDict[Path, tuple[ModelInfo, sherpa_onnx.OnlineRecognizer]]" = OrderedDict()
+        # Seconds spent in each startup phase of the last initialize()/warm_up()
+        self.startup_timings: dict = {}
+        # Overrides TAIL_PADDING_SECONDS for finish() when set
+        self.tail_padding_seconds: Optional[float] = None
+        # Streams opened by capture workers; with more than one, decoding
+        # goes through the batch scheduler
+        self._streams: list = []
+        self._scheduler = BatchDecodeScheduler()
+
+    def configure(self, **settings) -> bool:
+        """Update runtime settings. Returns True if the recognizer must be rebuilt."""
+        changed = False
+        for name, value in settings.items():
+            if name not in RUNTIME_FIELDS:
+                raise ValueError(f"Unknown ASR runtime setting: {name}")
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+                changed = True
+        if changed:
+            # Cached recognizers were built with the old settings
+            with self._lock:
+                self._pool.clear()
+        return changed
+
+    def set_language(self, language: str) -> bool:
+        """Change language. Returns True if a different model must be activated."""
+        self.language = language
+        model = self.resolve_model()
+        return model is not None and (self.model is None or model.path != self.model.path)
+
+    def is_loaded(self, language: Optional[str] = None) -> bool:
+        """Whether the model for ``language`` is already in memory (instant switch)."""
+        model = get_registry(self.model_dir).resolve(language or self.language)
+        with self._lock:
+            return model is not None and model.path in self._pool
+
+    @property
+    def loaded_models(self) -> list:
+        """Names of pooled models, least recently used first."""
+        with self._lock:
+            return [info.name for info, _ in self._pool.values()]
 
     def is_model_available(self) -> bool:
-        """Check if required model files exist."""
-        model_path = self._find_model_path()
-        return model_path is not None
-
-    def _find_model_path(self) -> Optional[Path]:
-        """Find model directory based on language."""
-        if not self.model_dir.exists():
-            return None
-
-        # Look for subdirectories containing model files
-        for subdir in self.model_dir.iterdir():
-            if not subdir.is_dir():
-                continue
-            # Check for paraformer model files (encoder.onnx, decoder.onnx, tokens.txt)
-            has_encoder = (subdir / "encoder.onnx").exists() or (subdir / "encoder.int8.onnx").exists()
-            has_decoder = (subdir / "decoder.onnx").exists() or (subdir / "decoder.int8.onnx").exists()
-            has_tokens = (subdir / "tokens.txt").exists()
-            if has_encoder and has_decoder and has_tokens:
-                return subdir
-
-        # Check model_dir itself
-        has_encoder = (self.model_dir / "encoder.onnx").exists() or (self.model_dir / "encoder.int8.onnx").exists()
-        has_decoder = (self.model_dir / "decoder.onnx").exists() or (self.model_dir / "decoder.int8.onnx").exists()
-        has_tokens = (self.model_dir / "tokens.txt").exists()
-        if has_encoder and has_decoder and has_tokens:
-            return self.model_dir
-
-        return None
+        """Check if a model for the configured language exists."""
+        return self.resolve_model() is not None
+
+    def resolve_model(self) -> Optional[ModelInfo]:
+        """Best installed model for ``self.language`` (cached registry lookup)."""
+        return get_registry(self.model_dir).resolve(self.language)
+
+    def _create_recognizer(self, model: ModelInfo) -> sherpa_onnx.OnlineRecognizer:
+        files = {role: str(path) for role, path in model.files.items()}
+        common = dict(
+            tokens=files["tokens"],
+            num_threads=self.num_threads,
+            sample_rate=self.sample_rate,
+            feature_dim=80,
+            enable_endpoint_detection=True,
+            rule1_min_trailing_silence=self.rule1_min_trailing_silence,
+            rule2_min_trailing_silence=self.rule2_min_trailing_silence,
+            rule3_min_utterance_length=self.rule3_min_utterance_length,
+            decoding_method=self.decoding_method,
+            provider=self.provider,
+        )
+        if model.model_type == "transducer":
+            return sherpa_onnx.OnlineRecognizer.from_transducer(
+                encoder=files["encoder"], decoder=files["decoder"], joiner=files["joiner"], **common,
+            )
+        if model.model_type == "ctc":
+            return sherpa_onnx.OnlineRecognizer.from_zipformer2_ctc(model=files["model"], **common)
+        return sherpa_onnx.OnlineRecognizer.from_paraformer(
+            encoder=files["encoder"], decoder=files["decoder"], **common,
+        )
 
     def initialize(self) -> bool:
-        """Initialize the recognizer with found model files."""
-        model_path = self._find_model_path()
-        if model_path is None:
+        """Initialize the recognizer with the best model for the language."""
+        self.startup_timings = {}
+        t0 = time.perf_counter()
+        model = self.resolve_model()
+        self.startup_timings["locate"] = time.perf_counter() - t0
+        if model is None:
             return False
 
-        # Determine model file names (prefer int8 for speed)
-        encoder = str(model_path / "encoder.int8.onnx") if (model_path / "encoder.int8.onnx").exists() else str(model_path / "encoder.onnx")
-        decoder = str(model_path / "decoder.int8.onnx") if (model_path / "decoder.int8.onnx").exists() else str(model_path / "decoder.onnx")
-        tokens = str(model_path / "tokens.txt")
-
+        t0 = time.perf_counter()
+        with self._lock:
+            cached = self._pool.get(model.path)
         try:
-            self._recognizer = sherpa_onnx.OnlineRecognizer.from_paraformer(
-                tokens=tokens,
-                encoder=encoder,
-                decoder=decoder,
-                num_threads=4,
-                sample_rate=self.sample_rate,
-                feature_dim=80,
-                enable_endpoint_detection=True,
-                rule1_min_trailing_silence=2.4,
-                rule2_min_trailing_silence=1.0,
-                rule3_min_utterance_length=20.0,
-                decoding_method="greedy_search",
-                provider="cpu",
-            )
-            self._stream = self._recognizer.create_stream()
-            return True
+            recognizer = cached[1] if cached else self._create_recognizer(model)
         except Exception as e:
             print(f"ASR engine initialization failed: {e}")
-            self._recognizer = None
             return False
+        self.startup_timings["load"] = time.perf_counter() - t0
+        # Streams notice the new recognizer and recreate themselves on it
+        with self._lock:
+            self._recognizer = recognizer
+            self.model = model
+            self._pool[model.path] = (model, recognizer)
+            self._pool.move_to_end(model.path)
+            self._evict()
+        return True
+
+    def _evict(self) -> None:
+        """Drop least recently used inactive recognizers until within budget."""
+        budget = self.memory_budget_mb * 1024 * 1024
+        total = sum(info.size_bytes for info, _ in self._pool.values())
+        for path in list(self._pool):
+            if total <= budget:
+                break
+            if self.model is not None and path == self.model.path:
+                continue
+            info, _ = self._pool.pop(path)
+            total -= info.size_bytes
+
+    def warm_up(self, seconds: float = 1.0) -> None:
+        """Decode synthetic audio on a throwaway stream.
+
+        onnxruntime allocates and optimizes lazily on the first run, so
+        without this the user's first utterance pays for graph setup.
+        """
+        recognizer = self._recognizer
+        if recognizer is None:
+            return
+        t0 = time.perf_counter()
+        n = int(self.sample_rate * seconds)
+        # Low-level noise rather than zeros so every layer actually runs
+        audio = (np.random.default_rng(0).standard_normal(n) * 0.01).astype(np.float32)
+        stream = recognizer.create_stream()
+        stream.accept_waveform(self.sample_rate, memoryview(audio))
+        stream.input_finished()
+        while recognizer.is_ready(stream):
+            recognizer.decode_stream(stream)
+        recognizer.get_result(stream)
+        self.startup_timings["warm_up"] = time.perf_counter() - t0
+
+    def decode_batch(self, waveforms, tail_padding: Optional[float] = None) -> list:
+        """Decode complete utterances together using batched ``decode_streams``.
+
+        Each waveform (float32 at ``sample_rate``) gets its own stream on
+        the shared recognizer; streams that are ready are decoded in one
+        call per step. ``tail_padding`` defaults to :attr:`tail_padding`.
+        Returns the texts in input order.
+        """
+        recognizer = self._recognizer
+        if recognizer is None:
+            return [""] * len(waveforms)
+        if tail_padding is None:
+            tail_padding = self.tail_padding
+        padding = np.zeros(int(self.sample_rate * tail_padding), dtype=np.float32)
+        streams = []
+        for samples in waveforms:
+            stream = recognizer.create_stream()
+            stream.accept_waveform(self.sample_rate, memoryview(np.ascontiguousarray(samples, dtype=np.float32)))
+            stream.accept_waveform(self.sample_rate, memoryview(padding))
+            stream.input_finished()
+            streams.append(stream)
+        while True:
+            ready = [s for s in streams if recognizer.is_ready(s)]
+            if not ready:
+                break
+            recognizer.decode_streams(ready)
+        return [recognizer.get_result(s).strip() for s in streams]
+
+    def open_stream(self) -> ASRStream:
+        """Register a new source decoding on the shared recognizer."""
+        stream = ASRStream(self)
+        with self._lock:
+            self._streams.append(stream)
+            self._scheduler.expected = len(self._streams)
+        return stream
+
+    def close_stream(self, stream: ASRStream) -> None:
+        with self._lock:
+            if stream in self._streams:
+                self._streams.remove(stream)
+            self._scheduler.expected = max(1, len(self._streams))
+            idle = len(self._streams) <= 1
+        if idle:
+            self._scheduler.stop()
+
+    @property
+    def stream_count(self) -> int:
+        return len(self._streams)
+
+    @property
+    def batch_stats(self) -> dict:
+        return {
+            "batches": self._scheduler.batches,
+            "mean_batch_size": self._scheduler.mean_batch_size,
+        }
+
+    def decode(self, recognizer: sherpa_onnx.OnlineRecognizer, stream: sherpa_onnx.OnlineStream) -> None:
+        """Decode ``stream`` until no frames are ready.
+
+        A single open source decodes inline; with several, the request joins
+        the scheduler's next ``decode_streams`` batch.
+        """
+        if len(self._streams) > 1:
+            self._scheduler.decode(recognizer, stream)
+            return
+        while recognizer.is_ready(stream):
+            recognizer.decode_stream(stream)
 
     @property
     def is_initialized(self) -> bool:
         return self._recognizer is not None
 
-    def accept_waveform(self, samples) -> None:
-        """Feed audio samples (float32, mono, sample_rate) to the recognizer."""
-        if self._stream is None:
-            return
-        self._stream.accept_waveform(self.sample_rate, samples.tolist())
+    def _single(self) -> ASRStream:
+        """The stream behind the engine's own single-source methods."""
+        if self._default_stream is None:
+            self._default_stream = ASRStream(self)
+        return self._default_stream
+
+    def staging_buffer(self, n: int) -> np.ndarray:
+        """Return a reusable contiguous float32 view of length ``n``.
+
+        Callers can write converted/resampled audio straight into it and
+        pass the view to :meth:`accept_waveform` without allocating.
+        """
+        return self._single().staging_buffer(n)
+
+    def accept_waveform(self, samples: np.ndarray) -> None:
+        """Feed audio to the default stream (see ASRStream.accept_waveform)."""
+        self._single().accept_waveform(samples)
 
     def get_partial_result(self) -> str:
         """Get the current partial recognition result."""
-        if self._recognizer is None or self._stream is None:
-            return ""
-        while self._recognizer.is_ready(self._stream):
-            self._recognizer.decode_stream(self._stream)
-        return self._recognizer.get_result(self._stream).strip()
+        return self._single().get_partial_result()
 
     def is_endpoint(self) -> bool:
         """Check if an endpoint (end of utterance) is detected."""
-        if self._recognizer is None or self._stream is None:
-            return False
-        return self._recognizer.is_endpoint(self._stream)
+        return self._single().is_endpoint()
 
     def reset(self) -> None:
         """Reset the stream for a new utterance."""
-        if self._recognizer is not None and self._stream is not None:
-            self._recognizer.reset(self._stream)
+        self._single().reset()
+
+    @property
+    def tail_padding(self) -> float:
+        """Seconds of silence :meth:`finish` feeds before closing the stream."""
+        if self.tail_padding_seconds is not None:
+            return self.tail_padding_seconds
+        model_type = self.model.model_type if self.model is not None else ""
+        return TAIL_PADDING_SECONDS.get(model_type, 0.3)
+
+    def finish(self) -> str:
+        """Close the default stream's utterance (see ASRStream.finish)."""
+        return self._single().finish()
 
     def shutdown(self) -> None:
         """Release resources."""
-        self._stream = None
-        self._recognizer = None
+        self._scheduler.stop()
+        with self._lock:
+            self._default_stream = None
+            self._recognizer = None
+            self.model = None
+            self._pool.clear()
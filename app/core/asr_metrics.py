@@ -0,0 +1,156 @@
+"""Rolling per-stage timing statistics for the ASR capture/decode loop."""
+
+from __future__ import annotations
+
+import json
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Optional
+
+# Histogram bucket upper bounds; milliseconds for timings, x100 for RTF
+HISTOGRAM_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+
+# A stage's p95 above this means ASR is not keeping up with the microphone
+OVERLOAD_LIMITS = {"rtf": 1.0, "capture_lag_ms": 500.0}
+
+
+class RollingHistogram:
+    """The last ``window`` values of one measurement, summarised on demand."""
+
+    def __init__(self, window: int = 500, bounds=HISTOGRAM_BOUNDS):
+        self.bounds = tuple(bounds)
+        self._values: deque = deque(maxlen=window)
+
+    def add(self, value: float) -> None:
+        self._values.append(value)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def counts(self, scale: float = 1.0) -> list:
+        """Values per bucket (``<= bound``; the last bucket is overflow)."""
+        counts = [0] * (len(self.bounds) + 1)
+        for value in self._values:
+            scaled = value * scale
+            for i, bound in enumerate(self.bounds):
+                if scaled <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return counts
+
+    def percentile(self, p: float) -> float:
+        if not self._values:
+            return 0.0
+        ordered = sorted(self._values)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def summary(self, scale: float = 1.0) -> dict:
+        if not self._values:
+            return {"count": 0, "last": 0.0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0,
+                    "buckets": self.counts(scale)}
+        return {
+            "count": len(self._values),
+            "last": self._values[-1],
+            "mean": sum(self._values) / len(self._values),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": max(self._values),
+            "buckets": self.counts(scale),
+        }
+
+
+class ASRMetrics:
+    """Timing collected by ASRWorker for every decoded chunk and utterance.
+
+    Per chunk: resample and decode time, real-time factor, capture lag (age
+    of the chunk's newest sample once decoded) and queue depth (audio still
+    waiting in the ring). Per utterance: endpoint-to-emit latency, from the
+    end of speech (key release, endpoint or VAD close) to ``text_final``.
+    Utterance records go to ``log_path`` as JSON lines when set.
+
+    ``counters`` holds running totals the worker reports alongside the
+    timings (dropped audio, ...); they are included in :meth:`snapshot`.
+    """
+
+    CHUNK_STAGES = ("resample_ms", "decode_ms", "rtf", "capture_lag_ms", "queue_depth_ms")
+    STAGES = CHUNK_STAGES + ("endpoint_to_emit_ms",)
+
+    def __init__(self, window: int = 500, log_path: Optional[Path] = None):
+        self.histograms: Dict[str, RollingHistogram] = {
+            name: RollingHistogram(window) for name in self.STAGES
+        }
+        self.log_path = log_path
+        self._utterance: Dict[str, float] = {}  # decode totals since the last final
+        self.counters: Dict[str, float] = {}
+        self._overloaded = False
+
+    def record_chunk(
+        self,
+        captured_at: float,
+        resample_s: float,
+        decode_s: float,
+        audio_s: float,
+        queue_depth_s: float,
+    ) -> None:
+        """One decoded chunk; ``captured_at`` is the monotonic time of its newest sample."""
+        lag_ms = (time.monotonic() - captured_at) * 1000
+        h = self.histograms
+        h["resample_ms"].add(resample_s * 1000)
+        h["decode_ms"].add(decode_s * 1000)
+        h["rtf"].add((resample_s + decode_s) / audio_s if audio_s else 0.0)
+        h["capture_lag_ms"].add(lag_ms)
+        h["queue_depth_ms"].add(queue_depth_s * 1000)
+        u = self._utterance
+        u["chunks"] = u.get("chunks", 0) + 1
+        u["audio_s"] = u.get("audio_s", 0.0) + audio_s
+        u["compute_s"] = u.get("compute_s", 0.0) + resample_s + decode_s
+        u["max_lag_ms"] = max(u.get("max_lag_ms", 0.0), lag_ms)
+
+    def record_utterance(self, ended_at: float, text: str = "") -> None:
+        """A final was emitted; ``ended_at`` is the monotonic end-of-speech time."""
+        latency_ms = (time.monotonic() - ended_at) * 1000
+        self.histograms["endpoint_to_emit_ms"].add(latency_ms)
+        u, self._utterance = self._utterance, {}
+        if self.log_path is None:
+            return
+        audio_s = u.get("audio_s", 0.0)
+        record = {
+            "time": round(time.time(), 3),
+            "event": "asr_utterance",
+            "chars": len(text),
+            "chunks": int(u.get("chunks", 0)),
+            "audio_s": round(audio_s, 3),
+            "rtf": round(u.get("compute_s", 0.0) / audio_s, 4) if audio_s else 0.0,
+            "max_capture_lag_ms": round(u.get("max_lag_ms", 0.0), 1),
+            "endpoint_to_emit_ms": round(latency_ms, 1),
+        }
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"ASR metrics log write failed: {e}")
+            self.log_path = None
+
+    def check_overload(self) -> Optional[str]:
+        """Describe the first stage over its limit, once per overload episode."""
+        for name, limit in OVERLOAD_LIMITS.items():
+            hist = self.histograms[name]
+            if len(hist) >= 20 and hist.percentile(95) > limit:
+                if self._overloaded:
+                    return None
+                self._overloaded = True
+                return f"{name} p95 {hist.percentile(95):.2f} > {limit}"
+        self._overloaded = False
+        return None
+
+    def snapshot(self) -> dict:
+        """Summary per stage plus ``counters``; RTF buckets are in hundredths."""
+        snap = {
+            name: hist.summary(scale=100 if name == "rtf" else 1)
+            for name, hist in self.histograms.items()
+        }
+        snap["counters"] = dict(self.counters)
+        return snap
@@ -2,135 +2,468 @@
 
 from __future__ import annotations
 
+import queue
+import time
+from collections import deque
+from pathlib import Path
 from typing import Optional
 
 import numpy as np
-import sounddevice as sd
 from PyQt6.QtCore import QThread, pyqtSignal
 
-from app.common.audio_devices import find_device_by_name
+from app.common.dsp import StreamingResampler
+from app.common.ring_buffer import RingBuffer
 from app.core.asr_engine import ASREngine
+from app.core.asr_metrics import ASRMetrics
+from app.core.audio_sources import AudioSource, MicrophoneSource
+from app.core.keyword_spotter import KeywordDetector
+from app.core.partials import PartialCoalescer
+from app.core.second_pass import SecondPassRecognizer
+from app.core.vad import EnergyVAD
 
+# Seconds of audio the capture ring buffer can hold before dropping input
+RING_BUFFER_SECONDS = 2.0
 
-def _resample(data: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
-    """Simple linear-interpolation resample from src_rate to dst_rate."""
-    if src_rate == dst_rate:
-        return data
-    ratio = dst_rate / src_rate
-    n_samples = int(len(data) * ratio)
-    indices = np.arange(n_samples) / ratio
-    indices_floor = np.floor(indices).astype(int)
-    indices_ceil = np.minimum(indices_floor + 1, len(data) - 1)
-    frac = indices - indices_floor
-    return data[indices_floor] * (1 - frac) + data[indices_ceil] * frac
+# Seconds between metrics_updated snapshots while audio is being decoded
+METRICS_INTERVAL = 1.0
 
 
 class ASRWorker(QThread):
-    """Captures audio from microphone and feeds it to ASR engine in real-time."""
+    """Captures audio from microphone and feeds it to ASR engine in real-time.
 
-    text_partial = pyqtSignal(str)   # partial recognition result
+    The input is an AudioSource: the configured microphone by default, or
+    a WAV file / generated signal for headless runs and benchmarks. A
+    finite source ending counts as a key release and ends ``run``.
+
+    Each worker decodes on its own ASRStream, so several workers (one per
+    microphone) can share one loaded model. Only the worker thread touches
+    its stream. Other threads (hotkey listener, UI) post start/stop/flush/reset
+    commands, which the run loop handles between decode steps.
+    """
+
+    text_partial = pyqtSignal(str, int)  # partial result, length of prefix unchanged since last one
     text_final = pyqtSignal(str)     # final result (endpoint detected)
     error = pyqtSignal(str)
     state_changed = pyqtSignal(bool) # recording state
+    metrics_updated = pyqtSignal(dict)  # ASRMetrics.snapshot(), about once a second
+    keyword_detected = pyqtSignal(str)  # wake word that started a recording
 
     def __init__(
         self,
         engine: ASREngine,
         microphone_name: str = "",
+        vad_enabled: bool = False,
+        vad_threshold_db: float = -45.0,
+        vad_hangover_ms: int = 600,
+        preroll_ms: int = 300,
+        chunk_ms: int = 100,
+        second_pass: Optional[SecondPassRecognizer] = None,
+        second_pass_budget_ms: int = 1500,
+        partial_max_rate_hz: float = 5.0,
+        metrics_log_path: Optional[Path] = None,
+        keyword_spotter: Optional[KeywordDetector] = None,
+        source: Optional[AudioSource] = None,
         parent=None,
     ):
         super().__init__(parent)
         self.engine = engine
+        # This worker's stream on the engine's shared recognizer
+        self.asr_stream = engine.open_stream()
         self.microphone_name = microphone_name
+        # Audio input; None = the microphone named above, opened on start
+        self.source = source
+        # Voice-activity gate: only wake the recognizer while speech is present
+        self.vad_enabled = vad_enabled
+        self.vad_threshold_db = vad_threshold_db
+        self.vad_hangover_ms = vad_hangover_ms
+        # Audio kept from before the hotkey press so utterance starts aren't clipped
+        self.preroll_ms = preroll_ms
+        # Audio per decode step; smaller = faster partials, more CPU
+        self.chunk_ms = chunk_ms
+        # Optional offline re-decode of each final; the streaming text is used
+        # if the refined one isn't ready within the budget
+        self.second_pass = second_pass
+        self.second_pass_budget_ms = second_pass_budget_ms
+        # Wake-word mode: while idle only this runs; a detection starts one
+        # utterance, which ends at the next endpoint
+        self.keyword_spotter = keyword_spotter
+        self._wake_session = False
+        self._utterance_audio: list = []  # engine-rate chunks of the current utterance
+        # (future or None, streaming text, deadline, end-of-speech time)
+        self._pending_finals: deque = deque()
+        # Partials are only emitted when they change, at most this often
+        self._partials = PartialCoalescer(partial_max_rate_hz)
+        self._second_pass_refined = 0
+        self._second_pass_missed = 0
         self._running = False
-        self._recording = False
-        self._stream: Optional[sd.InputStream] = None
+        self._recording = False  # owned by the worker thread
+        self._commands: queue.SimpleQueue = queue.SimpleQueue()  # (command, time.monotonic())
+        # Per-chunk and per-utterance timings; utterances also logged as JSON lines
+        self.metrics = ASRMetrics(log_path=metrics_log_path)
+        self._metrics_due = 0.0
+        self._captured_at = 0.0  # monotonic time of the newest sample in the ring
+        self._ring: Optional[RingBuffer] = None
+        self._close_on_exit = False  # stop() timed out waiting: run() closes the stream
+        self.capture_info: dict = {}  # rates and native/resampled path of the last run
+        self._input_overflows = 0   # PortAudio-reported input overflows
+        self._input_underflows = 0  # PortAudio-reported input underflows
+        self._blocks_decoded = 0
+        self._blocks_gated = 0      # blocks skipped by the VAD gate
+        self._decode_cpu = 0.0      # process CPU seconds spent decoding
 
     @property
     def is_recording(self) -> bool:
         return self._recording
 
+    @property
+    def overflow_count(self) -> int:
+        """Input overflows reported by the driver (events)."""
+        return self._input_overflows
+
+    @property
+    def dropped_samples(self) -> int:
+        """Samples lost because the ring was full (the consumer fell behind)."""
+        return self._ring.overflow_count if self._ring is not None else 0
+
+    @property
+    def underrun_count(self) -> int:
+        """Driver underflows plus consumer reads that timed out while recording."""
+        ring_underruns = self._ring.underrun_count if self._ring is not None else 0
+        return self._input_underflows + ring_underruns
+
+    @property
+    def vad_stats(self) -> dict:
+        """Gate effectiveness: skipped blocks and estimated CPU time saved."""
+        per_block = self._decode_cpu / self._blocks_decoded if self._blocks_decoded else 0.0
+        return {
+            "blocks_decoded": self._blocks_decoded,
+            "blocks_gated": self._blocks_gated,
+            "decode_cpu_seconds": self._decode_cpu,
+            "saved_cpu_seconds": per_block * self._blocks_gated,
+        }
+
+    @property
+    def partial_max_rate_hz(self) -> float:
+        return self._partials.max_rate_hz
+
+    @partial_max_rate_hz.setter
+    def partial_max_rate_hz(self, value: float):
+        self._partials.max_rate_hz = value
+
+    @property
+    def second_pass_stats(self) -> dict:
+        return {"refined": self._second_pass_refined, "missed_budget": self._second_pass_missed}
+
+    @property
+    def latency_stats(self) -> dict:
+        """End of speech (key release, endpoint or VAD close) to final text, in ms."""
+        return self.metrics.histograms["endpoint_to_emit_ms"].summary()
+
+    def _audio_callback(self, indata, frames, time_info, status):
+        """PortAudio callback: only copies frames into the ring buffer."""
+        if status:
+            if status.input_overflow:
+                self._input_overflows += 1
+            if status.input_underflow:
+                self._input_underflows += 1
+        # Always capture: while idle the consumer trims the ring to the pre-roll window
+        if self._ring is not None:
+            self._ring.write(indata[:, 0])
+            self._captured_at = time.monotonic()
+
     def start_recording(self):
-        """Start capturing audio."""
-        self._recording = True
-        self.state_changed.emit(True)
+        """Start capturing audio (buffered pre-roll is decoded first)."""
+        self._post("start")
 
     def stop_recording(self):
         """Stop capturing audio and emit final result."""
-        if self._recording:
-            self._recording = False
-            self.state_changed.emit(False)
-            # Feed ~0.8s of silence to flush the decoder's internal buffer,
-            # ensuring the last token is fully recognized.
-            silence = np.zeros(int(self.engine.sample_rate * 0.8), dtype=np.float32)
-            self.engine.accept_waveform(silence)
-            result = self.engine.get_partial_result()
-            if result:
-                self.text_final.emit(result)
-            self.engine.reset()
+        self._post("stop")
+
+    def flush(self):
+        """Emit the current utterance as final and keep recording."""
+        self._post("flush")
+
+    def reset(self):
+        """Discard the current utterance and any captured audio."""
+        self._post("reset")
+
+    def _post(self, command: str):
+        # Safe from any thread; returns immediately
+        self._commands.put((command, time.monotonic()))
 
     def run(self):
-        """Main thread loop: open mic stream and process audio."""
+        """Main thread loop: open the audio source and process audio."""
         if not self.engine.is_initialized:
             self.error.emit("ASR引擎未初始化，请检查模型文件")
             return
 
         self._running = True
-        device_idx = find_device_by_name(self.microphone_name, is_input=True)
-        if device_idx < 0:
-            device_idx = None  # use default
-
-        # Query device's default sample rate
-        target_rate = self.engine.sample_rate
         try:
-            info = sd.query_devices(device_idx, kind="input")
-            device_rate = int(info["default_samplerate"])
-        except Exception:
-            device_rate = target_rate
+            source = self.source or MicrophoneSource(
+                self.microphone_name, preferred_rate=self.engine.sample_rate,
+            )
+        except Exception as e:
+            self.error.emit(f"麦克风错误: {e}")
+            self._running = False
+            return
+        device_rate = source.sample_rate
+        target_rate = self.engine.sample_rate
+        self.capture_info = {
+            "source": source.describe(),
+            "capture_rate": device_rate,
+            "engine_rate": target_rate,
+            "path": "native" if device_rate == target_rate else "resampled",
+        }
+
+        block_size = self._block_size(device_rate)
+        self._ring = RingBuffer(int(device_rate * RING_BUFFER_SECONDS))
+        block = np.empty(block_size, dtype=np.float32)
+        lookback = np.zeros(block_size, dtype=np.float32)
+        resampler = StreamingResampler(device_rate, target_rate)
+        kws_resampler = StreamingResampler(device_rate, target_rate)
+        vad = EnergyVAD(device_rate, self.vad_threshold_db, self.vad_hangover_ms)
 
         try:
-            with sd.InputStream(
-                samplerate=device_rate,
-                channels=1,
-                dtype="float32",
-                blocksize=int(device_rate * 0.1),  # 100ms chunks
-                device=device_idx,
-            ) as stream:
-                self._stream = stream
-                while self._running:
-                    if not self._recording:
-                        self.msleep(50)
-                        continue
+            source.start(
+                self._audio_callback,
+                block_size,
+                writable=lambda n: self._ring.capacity - self._ring.available >= n,
+            )
+            while self._running:
+                self._drain_commands(block, resampler, vad)
+                if source.finished and self._ring.available < len(block):
+                    # Finite source ran out: finish the utterance like a key release
+                    self._handle_command("stop", time.monotonic(), block, resampler, vad)
+                    break
+                self._emit_pending_finals()
+                self._emit_partial(self._partials.poll())
+                self._emit_metrics()
+                if self._block_size(device_rate) != len(block):
+                    # Chunk size changed live: reallocate the working buffers
+                    block = np.empty(self._block_size(device_rate), dtype=np.float32)
+                    lookback = np.zeros(len(block), dtype=np.float32)
 
-                    data, overflowed = stream.read(int(device_rate * 0.1))
-                    if data.size == 0:
+                if not self._recording:
+                    spotter = self.keyword_spotter  # the UI thread may swap it
+                    if spotter is not None:
+                        self._spot_keyword(spotter, block, kws_resampler)
+                    else:
+                        preroll = int(device_rate * max(0, self.preroll_ms) / 1000)
+                        self._ring.keep_latest(min(preroll, self._ring.capacity // 2))
+                    resampler.reset()
+                    vad.reset()
+                    try:
+                        command, stamp = self._commands.get(timeout=0.05)
+                    except queue.Empty:
                         continue
+                    self._handle_command(command, stamp, block, resampler, vad)
+                    continue
 
-                    samples = data.flatten()
-                    # Resample to engine's expected rate if needed
-                    if device_rate != target_rate:
-                        samples = _resample(samples, device_rate, target_rate)
-
-                    self.engine.accept_waveform(samples)
+                if not self._ring.read_into(block, timeout=0.5):
+                    continue
 
-                    text = self.engine.get_partial_result()
-                    if text:
-                        self.text_partial.emit(text)
+                if self.vad_enabled:
+                    vad.threshold_db = self.vad_threshold_db
+                    vad.hangover_ms = self.vad_hangover_ms
+                    was_open = vad.is_open
+                    if not vad.process(block):
+                        self._blocks_gated += 1
+                        if was_open:
+                            # Speech ended: finish the utterance now
+                            self._finalize_utterance()
+                            resampler.reset()
+                        np.copyto(lookback, block)
+                        continue
+                    if not was_open:
+                        # Include the block before onset so the first syllable survives
+                        self._decode_block(lookback, resampler)
 
-                    if self.engine.is_endpoint():
-                        final_text = self.engine.get_partial_result()
-                        if final_text:
-                            self.text_final.emit(final_text)
-                        self.engine.reset()
+                self._decode_block(block, resampler)
 
         except Exception as e:
             self.error.emit(f"麦克风错误: {e}")
         finally:
+            source.stop()
+            self._emit_pending_finals(force=True)
             self._running = False
-            self._stream = None
+            if self._close_on_exit:
+                self.asr_stream.close()
+
+    def _drain_commands(self, block, resampler, vad):
+        while True:
+            try:
+                command, stamp = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            self._handle_command(command, stamp, block, resampler, vad)
+
+    def _handle_command(self, command: str, stamp: float, block, resampler, vad):
+        if command == "start":
+            if not self._recording:
+                self._recording = True
+                self.state_changed.emit(True)
+        elif command in ("stop", "flush"):
+            if not self._recording:
+                return
+            if command == "stop":
+                self._recording = False
+                self.state_changed.emit(False)
+            # Decode what was captured up to the key release, then close the stream
+            self._decode_captured(block, resampler)
+            self._finalize_utterance(flush=True, ended_at=stamp)
+        elif command == "reset":
+            self._partials.reset()
+            self._utterance_audio = []
+            self.asr_stream.reset()
+            self._ring.clear()
+            resampler.reset()
+            vad.reset()
+
+    def _decode_captured(self, block: np.ndarray, resampler: StreamingResampler):
+        """Decode every sample already in the ring, ending with a partial block."""
+        while self._ring.available:
+            chunk = block[:min(self._ring.available, len(block))]
+            self._ring.read_into(chunk)
+            self._decode_block(chunk, resampler)
+
+    def _spot_keyword(self, spotter: KeywordDetector, block: np.ndarray, resampler: StreamingResampler):
+        """Run the keyword spotter over captured audio; start recording on a hit.
+
+        Audio after the keyword stays in the ring and becomes the start of
+        the utterance.
+        """
+        while self._ring.available >= len(block):
+            self._ring.read_into(block)
+            try:
+                keyword = spotter.accept(resampler.process(block))
+            except Exception as e:
+                # Keep capturing without wake-word gating (push-to-talk still works)
+                self.keyword_spotter = None
+                self.error.emit(f"唤醒词检测失败，已关闭唤醒词: {e}")
+                return
+            if keyword:
+                resampler.reset()
+                self._wake_session = True
+                self.keyword_detected.emit(keyword)
+                self._post("start")
+                return
+
+    def _block_size(self, device_rate: int) -> int:
+        return max(1, int(device_rate * self.chunk_ms / 1000))
+
+    def _decode_block(self, block: np.ndarray, resampler: StreamingResampler):
+        """Resample one capture block, feed it to the engine and emit results."""
+        cpu_start = time.process_time()
+        # Newest sample of this block: everything still in the ring came later
+        queue_depth = self._ring.available / resampler.src_rate if self._ring is not None else 0.0
+        captured_at = self._captured_at - queue_depth
+        t0 = time.perf_counter()
+        if resampler.passthrough:
+            # Captured at the engine's rate: feed the block as is
+            samples = block
+        else:
+            samples = resampler.process(
+                block,
+                out=self.asr_stream.staging_buffer(resampler.output_length(len(block))),
+            )
+        t1 = time.perf_counter()
+        self.asr_stream.accept_waveform(samples)
+        if self.second_pass is not None:
+            self._utterance_audio.append(samples.copy())
+
+        text = self.asr_stream.get_partial_result()
+        endpoint = self.asr_stream.is_endpoint()
+        t2 = time.perf_counter()
+        self.metrics.record_chunk(captured_at, t1 - t0, t2 - t1, len(block) / resampler.src_rate, queue_depth)
+        if text:
+            self._emit_partial(self._partials.update(text))
+
+        if endpoint:
+            self._finalize_utterance()
+        self._decode_cpu += time.process_time() - cpu_start
+        self._blocks_decoded += 1
+
+    def _emit_metrics(self):
+        now = time.monotonic()
+        if now < self._metrics_due or not len(self.metrics.histograms["decode_ms"]):
+            return
+        self._metrics_due = now + METRICS_INTERVAL
+        overload = self.metrics.check_overload()
+        if overload:
+            print(f"ASR is not keeping up with the microphone: {overload}")
+        self.metrics_updated.emit(self.metrics_snapshot())
+
+    def metrics_snapshot(self) -> dict:
+        """ASRMetrics snapshot with this worker's capture and VAD gate counters."""
+        self.metrics.counters.update(
+            overflows=self.overflow_count,
+            dropped_samples=self.dropped_samples,
+            underruns=self.underrun_count,
+            **self.vad_stats,
+        )
+        return self.metrics.snapshot()
+
+    def _emit_partial(self, update):
+        if update is not None:
+            self.text_partial.emit(*update)
+
+    def _finalize_utterance(self, flush: bool = False, ended_at: Optional[float] = None):
+        """Emit the current result as final (or queue its second pass) and reset.
+
+        ``flush`` closes the stream with tail padding and ``input_finished()``
+        so the last word is decoded. ``ended_at`` is the monotonic end of
+        speech (the key release; now for endpoints), for latency metrics.
+        """
+        if ended_at is None:
+            ended_at = time.monotonic()
+        self._partials.reset()
+        if flush:
+            final_text = self.asr_stream.finish()
+        else:
+            final_text = self.asr_stream.get_partial_result()
+            self.asr_stream.reset()
+        audio, self._utterance_audio = self._utterance_audio, []
+        if self._wake_session:
+            # Back to listening for the wake word
+            self._wake_session = False
+            self._recording = False
+            self.state_changed.emit(False)
+        if not final_text:
+            return
+        if self.second_pass is not None and audio:
+            future = self.second_pass.submit(np.concatenate(audio))
+            deadline = time.monotonic() + self.second_pass_budget_ms / 1000
+            self._pending_finals.append((future, final_text, deadline, ended_at))
+        elif self._pending_finals:
+            # Keep finals in order behind utterances still being refined
+            self._pending_finals.append((None, final_text, 0.0, ended_at))
+        else:
+            self._emit_final(final_text, ended_at)
+
+    def _emit_pending_finals(self, force: bool = False):
+        """Emit queued finals in order once refined or past their budget."""
+        while self._pending_finals:
+            future, text, deadline, ended_at = self._pending_finals[0]
+            if future is not None and not future.done() and not force and time.monotonic() < deadline:
+                return
+            self._pending_finals.popleft()
+            if future is not None:
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    text = future.result() or text
+                    self._second_pass_refined += 1
+                else:
+                    future.cancel()
+                    self._second_pass_missed += 1
+            self._emit_final(text, ended_at)
+
+    def _emit_final(self, text: str, ended_at: float):
+        self.metrics.record_utterance(ended_at, text)
+        self.text_final.emit(text)
 
     def stop(self):
-        """Stop the worker thread."""
+        """Stop the worker thread and close its ASR stream."""
         self._running = False
-        self._recording = False
-        self.wait(3000)
+        self._close_on_exit = True
+        if self.wait(3000):
+            self.asr_stream.close()
+        # Otherwise run() is still using the stream; it closes it on the way out
@@ -4,29 +4,113 @@ from __future__ import annotations
 
 import io
 import threading
-from typing import Optional
+import time
+from typing import Callable, Iterable, List, Optional, Tuple
 
 import numpy as np
 import sounddevice as sd
 import soundfile as sf
 
 from app.common.audio_devices import find_device_by_name
+from app.common.cancel import CancelToken
+from app.common.dsp import StreamingResampler, resample
+from app.common.ring_buffer import RingBuffer
 
+STREAM_BUFFER_SECONDS = 30.0  # per-device playback ring for streamed audio
 
-def _resample(data: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
-    """Resample audio data via linear interpolation. Supports mono and stereo."""
-    if src_rate == dst_rate:
-        return data
-    ratio = dst_rate / src_rate
-    src_len = data.shape[0]
-    dst_len = int(src_len * ratio)
-    indices = np.arange(dst_len) / ratio
-    idx_floor = np.floor(indices).astype(int)
-    idx_ceil = np.minimum(idx_floor + 1, src_len - 1)
-    frac = indices - idx_floor
-    if data.ndim == 2:
-        frac = frac[:, np.newaxis]
-    return data[idx_floor] * (1 - frac) + data[idx_ceil] * frac
+
+def _device_rate(device_idx: Optional[int], fallback: int) -> int:
+    try:
+        info = sd.query_devices(device_idx, kind="output")
+        return int(info["default_samplerate"])
+    except Exception:
+        return fallback
+
+
+class _StreamSink:
+    """One output device playing streamed audio from a ring buffer.
+
+    The producer resamples each chunk to the device rate and writes it to
+    the ring; the PortAudio callback plays whatever is buffered and pads
+    with silence, so a slow network only ever causes gaps, never a stall.
+    """
+
+    def __init__(self, device_idx: Optional[int], src_rate: int):
+        self.device_idx = device_idx
+        self.rate = _device_rate(device_idx, src_rate)
+        self.resampler = StreamingResampler(src_rate, self.rate)
+        self.ring = RingBuffer(int(self.rate * STREAM_BUFFER_SECONDS))
+        self.first_audio_at: Optional[float] = None  # monotonic time the first samples reach the DAC
+        self.done = threading.Event()
+        self.stopped = threading.Event()  # the device stream is inactive (nothing audible)
+        self.stopped.set()
+        self._eof = False
+        self._started = False
+        self._stream = sd.OutputStream(
+            samplerate=self.rate,
+            channels=1,
+            dtype="float32",
+            device=device_idx,
+            callback=self._callback,
+            finished_callback=self._on_finished,
+        )
+
+    def _on_finished(self) -> None:
+        self.stopped.set()
+        self.done.set()
+
+    def _callback(self, outdata, frames, time_info, status):
+        n = self.ring.read_available(outdata[:, 0])
+        if n and self.first_audio_at is None:
+            self.first_audio_at = time.monotonic() + max(
+                0.0, time_info.outputBufferDacTime - time_info.currentTime
+            )
+        if n < frames:
+            outdata[n:] = 0
+            if self._eof and self.ring.available == 0:
+                raise sd.CallbackStop
+
+    def write(self, samples: np.ndarray, cancelled: threading.Event) -> None:
+        """Queue source-rate samples, waiting while the ring is full.
+
+        Only a running stream drains the ring, so a stream not started yet
+        is started once its ring is full.
+        """
+        out = self.resampler.process(samples)
+        while len(out) and not cancelled.is_set():
+            n = self.ring.write(out[:self.ring.capacity - self.ring.available])
+            out = out[n:]
+            if len(out):
+                self.start()
+                cancelled.wait(0.01)
+
+    def start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        self.stopped.clear()
+        self._stream.start()
+
+    def finish(self, cancelled: threading.Event) -> None:
+        """Flush the resampler tail and let the stream stop once the ring drains."""
+        if not self.resampler.passthrough:
+            self.write(np.zeros(self.resampler.taps, dtype=np.float32), cancelled)
+        self._eof = True
+
+    def abort(self) -> None:
+        self._eof = True
+        self.ring.clear()
+        try:
+            self._stream.abort()
+        except Exception:
+            pass
+        self.done.set()
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        except Exception:
+            pass
 
 
 class AudioPlayer:
@@ -40,6 +124,8 @@ class AudioPlayer:
         self.speaker_device_name = speaker_device_name
         self.virtual_device_name = virtual_device_name
         self._playing = False
+        self._sinks: List[_StreamSink] = []
+        self._cancelled = threading.Event()
 
     def update_devices(self, speaker_name: str, virtual_name: str):
         self.speaker_device_name = speaker_name
@@ -106,6 +192,97 @@ class AudioPlayer:
 
         threading.Thread(target=_wait, daemon=True).start()
 
+    def _output_devices(self) -> List[Optional[int]]:
+        """Configured speaker and virtual cable indices, or [None] for the default device."""
+        devices = [
+            idx for idx in (
+                find_device_by_name(self.speaker_device_name, is_input=False),
+                find_device_by_name(self.virtual_device_name, is_input=False),
+            ) if idx >= 0
+        ]
+        return devices or [None]
+
+    def play_stream(
+        self,
+        chunks: Iterable[Tuple[np.ndarray, int]],
+        on_finished: Optional[Callable[[], None]] = None,
+        on_first_audio: Optional[Callable[[float], None]] = None,
+        cancel: Optional[CancelToken] = None,
+    ):
+        """Play ``(samples, samplerate)`` chunks on both devices as they arrive.
+
+        Runs the producer in the calling thread and returns once every chunk
+        has been queued (or playback was stopped); the devices keep playing
+        the buffered tail and ``on_finished`` fires when both have drained.
+        ``on_first_audio`` receives the monotonic time the first samples
+        reach a device. Exceptions from ``chunks`` stop playback and propagate.
+
+        Cancelling ``cancel`` (from any thread) silences this playback at
+        once: both rings are emptied and the streams aborted, as by
+        :meth:`stop`.
+        """
+        self._playing = True
+        self._cancelled = cancelled = threading.Event()
+        sinks: List[_StreamSink] = []
+        if cancel is not None:
+            def abort():
+                cancelled.set()
+                for sink in list(sinks):
+                    sink.abort()
+            cancel.on_cancel(abort)
+        try:
+            for samples, samplerate in chunks:
+                if cancelled.is_set():
+                    break
+                if samples.ndim > 1:
+                    samples = samples.mean(axis=1)
+                if not sinks:
+                    sinks.extend(_StreamSink(idx, samplerate) for idx in self._output_devices())
+                    self._sinks = sinks
+                    for sink in sinks:
+                        sink.write(samples, cancelled)
+                        sink.start()
+                    threading.Thread(
+                        target=self._watch_stream, args=(sinks, on_finished, on_first_audio),
+                        daemon=True,
+                    ).start()
+                    if cancelled.is_set():  # cancelled while the streams were opening
+                        for sink in sinks:
+                            sink.abort()
+                    continue
+                for sink in sinks:
+                    sink.write(samples, cancelled)
+        except BaseException:
+            for sink in sinks:
+                sink.abort()
+            raise
+        finally:
+            for sink in sinks:
+                sink.finish(cancelled)
+        if not sinks:
+            self._playing = False
+            if on_finished:
+                on_finished()
+
+    def _watch_stream(self, sinks, on_finished, on_first_audio):
+        """Report the first audible sample, then wait for every device to drain."""
+        reported = on_first_audio is None
+        while True:
+            drained = all(sink.done.wait(0.005) for sink in sinks)
+            started = [s.first_audio_at for s in sinks if s.first_audio_at is not None]
+            if not reported and started:
+                on_first_audio(min(started))
+                reported = True
+            if drained:
+                break
+        for sink in sinks:
+            sink.close()
+        if self._sinks is sinks:
+            self._sinks = []
+            self._playing = False
+        if on_finished:
+            on_finished()
+
     @staticmethod
     def _play_on_device(data: np.ndarray, samplerate: int, device_idx: Optional[int]):
         try:
@@ -118,7 +295,7 @@ class AudioPlayer:
 
             play_data = data
             if device_rate != samplerate:
-                play_data = _resample(data, samplerate, device_rate)
+                play_data = resample(data, samplerate, device_rate)
 
             sd.play(play_data, samplerate=device_rate, device=device_idx, blocking=True)
         except Exception as e:
@@ -128,6 +305,24 @@ class AudioPlayer:
     def is_playing(self) -> bool:
         return self._playing
 
-    def stop(self):
+    def stop(self, on_silent: Optional[Callable[[bool], None]] = None, timeout: float = 0.5):
+        """Silence all playback without waiting for the devices.
+
+        ``on_silent(stopped)`` is called from a helper thread once every
+        device stream has stopped; ``stopped`` is False if one was still
+        active after ``timeout`` seconds.
+        """
         sd.stop()
+        self._cancelled.set()
+        sinks = list(self._sinks)
+        for sink in sinks:
+            sink.abort()
         self._playing = False
+        if on_silent is None:
+            return
+
+        def wait():
+            deadline = time.monotonic() + timeout
+            on_silent(all(sink.stopped.wait(max(0.0, deadline - time.monotonic())) for sink in sinks))
+
+        threading.Thread(target=wait, daemon=True).start()
@@ -0,0 +1,209 @@
+"""Audio inputs for ASRWorker: microphone, WAV files and generated signals.
+
+Every source delivers mono float32 blocks through a PortAudio-style
+callback ``callback(indata, frames, time_info, status)`` with ``indata``
+shaped ``(frames, 1)``, so the worker's capture path is identical whether
+the audio comes from a device or from disk.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+import sounddevice as sd
+import soundfile as sf
+
+from app.common.audio_devices import find_device_by_name
+
+
+class AudioSource:
+    """Base class: ``start`` begins delivering blocks, ``stop`` ends it."""
+
+    sample_rate: int = 16000
+
+    @property
+    def finished(self) -> bool:
+        """True once a finite source has delivered all of its audio."""
+        return False
+
+    def start(self, callback: Callable, blocksize: int,
+              writable: Optional[Callable[[int], bool]] = None) -> None:
+        """Deliver blocks of ``blocksize`` frames to ``callback``.
+
+        ``writable(n)`` tells sources that are not paced by a clock whether
+        the consumer has room for ``n`` more frames.
+        """
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return type(self).__name__
+
+
+class MicrophoneSource(AudioSource):
+    """Live capture through a PortAudio input stream.
+
+    With ``preferred_rate`` set (the recognizer's rate), the device is
+    probed with ``sd.check_input_settings`` and opened at that rate when
+    it accepts it, so no resampling is needed downstream. Otherwise the
+    device's default rate is used.
+    """
+
+    def __init__(self, device_name: str = "", preferred_rate: Optional[int] = None):
+        self.device_name = device_name
+        device_idx = find_device_by_name(device_name, is_input=True)
+        self.device = device_idx if device_idx >= 0 else None  # None = default
+        self._extra_settings = None
+        try:
+            info = sd.query_devices(self.device, kind="input")
+            self.default_rate = int(info["default_samplerate"])
+            if "WASAPI" in sd.query_hostapis(info["hostapi"])["name"]:
+                # Shared mode only offers the mixer rate unless Windows may convert
+                self._extra_settings = sd.WasapiSettings(auto_convert=True)
+        except Exception:
+            self.default_rate = preferred_rate or 16000
+        self.sample_rate = self.default_rate
+        if preferred_rate and preferred_rate != self.default_rate and self._supports(preferred_rate):
+            self.sample_rate = preferred_rate
+        self._stream: Optional[sd.InputStream] = None
+
+    def _supports(self, rate: int) -> bool:
+        try:
+            sd.check_input_settings(
+                device=self.device, channels=1, dtype="float32",
+                samplerate=rate, extra_settings=self._extra_settings,
+            )
+        except Exception:
+            return False
+        return True
+
+    def start(self, callback, blocksize, writable=None) -> None:
+        self._stream = sd.InputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype="float32",
+            blocksize=blocksize,
+            device=self.device,
+            callback=callback,
+            extra_settings=self._extra_settings,
+        )
+        self._stream.start()
+
+    def stop(self) -> None:
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def describe(self) -> str:
+        return f"microphone {self.device_name or 'default'} @ {self.sample_rate} Hz"
+
+
+class _ThreadedSource(AudioSource):
+    """Pushes generated blocks from a thread, at real-time pace or as fast as allowed."""
+
+    def __init__(self, sample_rate: int, realtime: bool = True):
+        self.sample_rate = sample_rate
+        self.realtime = realtime
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._finished = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    def _blocks(self, blocksize: int) -> Iterator[np.ndarray]:
+        raise NotImplementedError
+
+    def start(self, callback, blocksize, writable=None) -> None:
+        self._stop.clear()
+        self._finished.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(callback, blocksize, writable),
+            name="audio-source", daemon=True,
+        )
+        self._thread.start()
+
+    def _run(self, callback, blocksize, writable) -> None:
+        start = time.monotonic()
+        delivered = 0
+        for block in self._blocks(blocksize):
+            if self._stop.is_set():
+                return
+            if self.realtime:
+                # Deliver each block when it would have finished recording
+                delay = start + (delivered + len(block)) / self.sample_rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            elif writable is not None:
+                while not writable(len(block)):
+                    if self._stop.wait(0.001):
+                        return
+            callback(block.reshape(-1, 1), len(block), None, None)
+            delivered += len(block)
+        self._finished.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+
+class WavFileSource(_ThreadedSource):
+    """Replays a WAV file (mixed to mono) at real-time pace or as fast as possible."""
+
+    def __init__(self, path: str, realtime: bool = True):
+        self.path = path
+        data, rate = sf.read(path, dtype="float32", always_2d=True)
+        self.audio = np.ascontiguousarray(data.mean(axis=1), dtype=np.float32)
+        super().__init__(rate, realtime)
+
+    @property
+    def duration(self) -> float:
+        return len(self.audio) / self.sample_rate
+
+    def _blocks(self, blocksize):
+        for start in range(0, len(self.audio), blocksize):
+            yield self.audio[start:start + blocksize]
+
+    def describe(self) -> str:
+        pace = "real-time" if self.realtime else "fast"
+        return f"{self.path} @ {self.sample_rate} Hz ({pace})"
+
+
+class SyntheticSource(_ThreadedSource):
+    """Generated signal: ``noise``, ``sine`` or ``silence`` for ``duration`` seconds."""
+
+    def __init__(self, kind: str = "noise", duration: float = 10.0, sample_rate: int = 16000,
+                 realtime: bool = True, level: float = 0.1, seed: int = 0):
+        if kind not in ("noise", "sine", "silence"):
+            raise ValueError(f"Unknown synthetic signal: {kind}")
+        super().__init__(sample_rate, realtime)
+        self.kind = kind
+        self.duration = duration
+        self.level = level
+        self.seed = seed
+
+    def _blocks(self, blocksize):
+        rng = np.random.default_rng(self.seed)
+        total = int(self.duration * self.sample_rate)
+        for start in range(0, total, blocksize):
+            n = min(blocksize, total - start)
+            if self.kind == "noise":
+                block = rng.standard_normal(n) * self.level
+            elif self.kind == "sine":
+                t = (start + np.arange(n)) / self.sample_rate
+                block = np.sin(2 * np.pi * 440.0 * t) * self.level
+            else:
+                block = np.zeros(n)
+            yield block.astype(np.float32)
+
+    def describe(self) -> str:
+        return f"synthetic {self.kind} {self.duration:.1f} s @ {self.sample_rate} Hz"
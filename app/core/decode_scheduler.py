@@ -0,0 +1,95 @@
+"""Batches decode requests from several streams into ``decode_streams`` calls."""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+
+class BatchDecodeScheduler:
+    """Decodes streams submitted from many threads on one decode thread.
+
+    Callers block in :meth:`decode` until their stream has no ready frames
+    left. Requests that arrive together (or while a batch is running) are
+    grouped per recognizer and decoded with one ``decode_streams`` call per
+    step, so N sources cost one batched model run instead of N.
+    """
+
+    def __init__(self, gather_ms: float = 5.0):
+        # How long to wait for the other expected streams before decoding
+        self.gather_ms = gather_ms
+        self.expected = 1  # open streams; a full batch is decoded right away
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[object, object, Future]] = []  # (recognizer, stream, future)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.batches = 0          # decode_streams calls
+        self.streams_decoded = 0  # stream-steps decoded across all batches
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.streams_decoded / self.batches if self.batches else 0.0
+
+    def decode(self, recognizer, stream) -> None:
+        """Decode ``stream`` until it has no ready frames (blocks the caller)."""
+        future: Future = Future()
+        with self._cond:
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name="asr-decode", daemon=True)
+                self._thread.start()
+            self._pending.append((recognizer, stream, future))
+            self._cond.notify()
+        future.result()
+
+    def _take_batch(self) -> Optional[list]:
+        with self._cond:
+            while self._running and not self._pending:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            # Give the other sources a moment to submit their chunk too
+            deadline = time.monotonic() + self.gather_ms / 1000
+            while self._running and len(self._pending) < self.expected:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._pending = self._pending, []
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            groups: dict = {}
+            for recognizer, stream, future in batch:
+                groups.setdefault(id(recognizer), (recognizer, []))[1].append((stream, future))
+            for recognizer, entries in groups.values():
+                streams = [stream for stream, _ in entries]
+                try:
+                    while True:
+                        ready = [s for s in streams if recognizer.is_ready(s)]
+                        if not ready:
+                            break
+                        recognizer.decode_streams(ready)
+                        self.batches += 1
+                        self.streams_decoded += len(ready)
+                except Exception as e:
+                    for _, future in entries:
+                        future.set_exception(e)
+                    continue
+                for _, future in entries:
+                    future.set_result(None)
+
+    def stop(self) -> None:
+        """Finish queued requests and end the decode thread."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
@@ -11,10 +11,11 @@ from pynput import keyboard
 class HotkeyManager:
     """Manages global hotkey for ASR voice control.
 
-    Supports three modes:
+    Supports four modes:
     - push_to_talk: Record while key is held down
     - toggle: Press to start/stop recording
     - open_mic: Always recording (hotkey ignored)
+    - wake_word: A keyword spotter starts each recording (hotkey ignored)
     """
 
     def __init__(
@@ -75,7 +76,7 @@ class HotkeyManager:
         self.mode = mode
 
     def _on_press(self, key):
-        if self.mode == "open_mic":
+        if self.mode in ("open_mic", "wake_word"):
             return
 
         if not self._keys_match(key):
@@ -100,7 +101,7 @@ class HotkeyManager:
                         self.on_stop()
 
     def _on_release(self, key):
-        if self.mode == "open_mic":
+        if self.mode in ("open_mic", "wake_word"):
             return
 
         if not self._keys_match(key):
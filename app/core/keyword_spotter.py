@@ -0,0 +1,119 @@
+"""Wake-word detection with a sherpa-onnx KeywordSpotter."""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import sherpa_onnx
+
+from app.core.model_registry import ModelInfo, get_registry
+
+
+class KeywordDetector:
+    """Listens for wake words while the full recognizer is idle.
+
+    The keyword model is a small streaming transducer resolved from the
+    models directory and loaded lazily on the first audio. Keywords come
+    from ``keywords_file`` or the ``keywords.txt`` shipped with the model;
+    both must already be tokenized (see models/README.md).
+    """
+
+    def __init__(
+        self,
+        model_dir: Path,
+        keywords_file: str = "",
+        language: str = "zh",
+        sample_rate: int = 16000,
+        num_threads: int = 1,
+        provider: str = "cpu",
+        threshold: float = 0.25,
+        score: float = 1.0,
+    ):
+        self.model_dir = Path(model_dir)
+        self.keywords_file = keywords_file
+        self.language = language
+        self.sample_rate = sample_rate
+        self.num_threads = num_threads
+        self.provider = provider
+        self.threshold = threshold
+        self.score = score
+        self.model: Optional[ModelInfo] = None
+        self._spotter: Optional[sherpa_onnx.KeywordSpotter] = None
+        self._stream = None
+        self._load_lock = threading.Lock()
+
+    def _resolve(self) -> Optional[ModelInfo]:
+        return get_registry(self.model_dir).resolve_keyword_spotter(self.language)
+
+    def _keywords_path(self, model: ModelInfo) -> Optional[str]:
+        if self.keywords_file:
+            return self.keywords_file
+        path = model.files.get("keywords")
+        return str(path) if path else None
+
+    def is_available(self) -> bool:
+        model = self._resolve()
+        return model is not None and self._keywords_path(model) is not None
+
+    def _ensure_loaded(self):
+        """(spotter, stream), loading them on first use; None without keywords.
+
+        The pair is read under the lock so :meth:`unload` from another
+        thread never hands out a spotter without its stream.
+        """
+        with self._load_lock:
+            if self._spotter is not None:
+                return self._spotter, self._stream
+            model = self._resolve()
+            keywords = self._keywords_path(model) if model else None
+            if keywords is None:
+                return None
+            files = {role: str(path) for role, path in model.files.items()}
+            try:
+                spotter = sherpa_onnx.KeywordSpotter(
+                    tokens=files["tokens"],
+                    encoder=files["encoder"],
+                    decoder=files["decoder"],
+                    joiner=files["joiner"],
+                    keywords_file=keywords,
+                    num_threads=self.num_threads,
+                    sample_rate=self.sample_rate,
+                    keywords_score=self.score,
+                    keywords_threshold=self.threshold,
+                    provider=self.provider,
+                )
+                stream = spotter.create_stream()
+            except Exception as e:
+                raise RuntimeError(f"KWS model {model.name} failed to load: {e}") from e
+            self._spotter, self._stream = spotter, stream
+            self.model = model
+            return spotter, stream
+
+    def accept(self, samples: np.ndarray) -> Optional[str]:
+        """Feed float32 audio at ``sample_rate``; returns a keyword once detected.
+
+        Raises RuntimeError if the keyword model cannot be loaded.
+        """
+        loaded = self._ensure_loaded()
+        if loaded is None:
+            return None
+        # Local references: an unload() meanwhile only affects the next call
+        spotter, stream = loaded
+        stream.accept_waveform(self.sample_rate, memoryview(np.ascontiguousarray(samples, dtype=np.float32)))
+        while spotter.is_ready(stream):
+            spotter.decode_stream(stream)
+            keyword = spotter.get_result(stream)
+            if keyword:
+                # Start matching afresh so one utterance triggers once
+                spotter.reset_stream(stream)
+                return keyword
+        return None
+
+    def unload(self) -> None:
+        with self._load_lock:
+            self._spotter = None
+            self._stream = None
+            self.model = None
@@ -0,0 +1,235 @@
+"""Cached index of sherpa-onnx ASR models under the models directory."""
+
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Directory-name tokens that identify a model's language(s)
+_LANGUAGE_TOKENS = {
+    "zh": "zh", "chinese": "zh", "cantonese": "yue", "yue": "yue",
+    "en": "en", "english": "en",
+    "ja": "ja", "japanese": "ja",
+    "ko": "ko", "korean": "ko",
+}
+
+# Key used in the language index for "any language" fallback
+ANY_LANGUAGE = "*"
+
+
+@dataclass
+class ModelInfo:
+    """One recognizer model found on disk."""
+
+    path: Path
+    model_type: str  # paraformer, transducer, ctc, sense_voice, kws
+    streaming: bool  # OnlineRecognizer model (False: OfflineRecognizer)
+    languages: Tuple[str, ...]  # empty when the name gives no hint
+    quantized: bool  # int8 weights selected
+    files: Dict[str, Path] = field(default_factory=dict)  # role -> file
+    size_bytes: int = 0
+    mtime: float = 0.0
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+
+def _pick(entries: Dict[str, os.DirEntry], role: str) -> Tuple[Optional[str], bool]:
+    """Choose the file for ``role`` (encoder, decoder, ...), preferring int8.
+
+    Matches exact names (``encoder.int8.onnx``) as well as the
+    ``encoder-epoch-99-avg-1.int8.onnx`` style used by zipformer releases.
+    """
+    fp32 = int8 = None
+    for name in sorted(entries):
+        if not name.endswith(".onnx") or not (name.startswith(role + ".") or name.startswith(role + "-")):
+            continue
+        if name.endswith(".int8.onnx"):
+            int8 = int8 or name
+        else:
+            fp32 = fp32 or name
+    if int8:
+        return int8, True
+    return fp32, False
+
+
+def _languages_from_name(name: str) -> Tuple[str, ...]:
+    langs: List[str] = []
+    for token in name.lower().replace("_", "-").split("-"):
+        lang = _LANGUAGE_TOKENS.get(token)
+        if lang and lang not in langs:
+            langs.append(lang)
+    return tuple(langs)
+
+
+def inspect_model_dir(path: Path) -> Optional[ModelInfo]:
+    """Classify a directory as a paraformer, transducer, CTC or SenseVoice model.
+
+    Split encoder/decoder paraformers are always streaming. Transducer and
+    single-file layouts ship in both flavours, so they count as streaming
+    only when the release name says so (``sherpa-onnx-streaming-...``).
+    Keyword-spotting transducers (``sherpa-onnx-kws-...``) are typed
+    ``kws`` and kept out of recognizer lookups.
+    """
+    try:
+        entries = {e.name: e for e in os.scandir(path) if e.is_file()}
+    except OSError:
+        return None
+    if "tokens.txt" not in entries:
+        return None
+
+    encoder, enc_q = _pick(entries, "encoder")
+    decoder, dec_q = _pick(entries, "decoder")
+    joiner, join_q = _pick(entries, "joiner")
+    model, model_q = _pick(entries, "model")
+    if model is None:
+        model, model_q = _pick(entries, "ctc")
+
+    lowered = path.name.lower()
+    named_streaming = "streaming" in lowered
+    if encoder and decoder and joiner:
+        model_type, roles, quantized = "transducer", {"encoder": encoder, "decoder": decoder, "joiner": joiner}, enc_q
+        streaming = named_streaming
+        if "kws" in lowered.replace("_", "-").split("-"):
+            model_type, streaming = "kws", True
+            if "keywords.txt" in entries:
+                roles["keywords"] = "keywords.txt"
+    elif encoder and decoder:
+        model_type, roles, quantized = "paraformer", {"encoder": encoder, "decoder": decoder}, enc_q and dec_q
+        streaming = True
+    elif model:
+        roles, quantized, streaming = {"model": model}, model_q, named_streaming
+        if streaming:
+            model_type = "ctc"
+        elif "sense" in lowered:
+            model_type = "sense_voice"
+        elif "paraformer" in lowered:
+            model_type = "paraformer"
+        else:
+            model_type = "ctc"
+    else:
+        return None
+
+    roles["tokens"] = "tokens.txt"
+    files = {role: path / name for role, name in roles.items()}
+    stats = [entries[name].stat() for name in roles.values()]
+    return ModelInfo(
+        path=path,
+        model_type=model_type,
+        streaming=streaming,
+        languages=_languages_from_name(path.name),
+        quantized=quantized,
+        files=files,
+        size_bytes=sum(st.st_size for st in stats),
+        mtime=max(st.st_mtime for st in stats),
+    )
+
+
+def _rank(info: ModelInfo, language: str) -> Tuple:
+    """Sort key: best model for ``language`` first."""
+    return (
+        0 if language in info.languages else 1,
+        len(info.languages) or 99,  # specialised models beat multilingual ones
+        0 if info.quantized else 1,  # int8 is faster and lighter
+        info.name,
+    )
+
+
+class ModelRegistry:
+    """Scans the models directory once and answers lookups from an index.
+
+    The manifest is rebuilt only when the mtime of the models directory or
+    of one of its subdirectories changes (files added, removed or renamed).
+    """
+
+    def __init__(self, model_dir: Path):
+        self.model_dir = Path(model_dir)
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple] = None
+        self._models: List[ModelInfo] = []
+        self._by_language: Dict[Tuple[bool, str], ModelInfo] = {}
+
+    def _dir_signature(self) -> Optional[Tuple]:
+        try:
+            root = os.stat(self.model_dir).st_mtime_ns
+            subdirs = tuple(
+                (e.name, e.stat().st_mtime_ns)
+                for e in os.scandir(self.model_dir) if e.is_dir()
+            )
+        except OSError:
+            return None
+        return root, subdirs
+
+    def _refresh(self) -> None:
+        signature = self._dir_signature()
+        if signature is not None and signature == self._signature:
+            return
+        models: List[ModelInfo] = []
+        if signature is not None:
+            for name, _ in signature[1]:
+                info = inspect_model_dir(self.model_dir / name)
+                if info is not None:
+                    models.append(info)
+            # Models placed directly in the models directory
+            info = inspect_model_dir(self.model_dir)
+            if info is not None:
+                models.append(info)
+
+        index: Dict[Tuple[bool, str], ModelInfo] = {}
+        for streaming in (True, False):
+            group = [m for m in models if m.streaming == streaming and m.model_type != "kws"]
+            languages = {lang for m in group for lang in m.languages}
+            for lang in languages:
+                index[streaming, lang] = min(group, key=lambda m, lang=lang: _rank(m, lang))
+            if group:
+                # Multilingual models make the best "auto"/fallback choice
+                index[streaming, ANY_LANGUAGE] = min(
+                    group, key=lambda m: (-len(m.languages), 0 if m.quantized else 1, m.name),
+                )
+        self._models = models
+        self._by_language = index
+        self._signature = signature
+
+    @property
+    def models(self) -> List[ModelInfo]:
+        with self._lock:
+            self._refresh()
+            return list(self._models)
+
+    def resolve(self, language: str = "auto", streaming: bool = True) -> Optional[ModelInfo]:
+        """Best model for ``language``, falling back to any model of that kind."""
+        with self._lock:
+            self._refresh()
+            return (
+                self._by_language.get((streaming, language))
+                or self._by_language.get((streaming, ANY_LANGUAGE))
+            )
+
+    def resolve_keyword_spotter(self, language: str = "auto") -> Optional[ModelInfo]:
+        """Best keyword-spotting model, preferring one for ``language``."""
+        with self._lock:
+            self._refresh()
+            spotters = [m for m in self._models if m.model_type == "kws"]
+        return min(spotters, key=lambda m: _rank(m, language)) if spotters else None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._signature = None
+
+
+_registries: Dict[Path, ModelRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(model_dir: Path) -> ModelRegistry:
+    """Return the shared registry for ``model_dir``."""
+    key = Path(model_dir).resolve()
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = ModelRegistry(key)
+        return registry
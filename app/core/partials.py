@@ -0,0 +1,68 @@
+"""De-duplication and rate limiting of streaming ASR partial results."""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Optional, Tuple
+
+
+def stable_prefix_length(old: str, new: str) -> int:
+    """Length of the common prefix of two partial hypotheses."""
+    n = min(len(old), len(new))
+    i = 0
+    while i < n and old[i] == new[i]:
+        i += 1
+    return i
+
+
+class PartialCoalescer:
+    """Turns a stream of partial hypotheses into change-only, rate-limited updates.
+
+    :meth:`update` and :meth:`poll` return ``(text, stable_len)`` when an
+    update should be emitted: ``text[:stable_len]`` is unchanged since the
+    previous emission and ``text[stable_len:]`` is the changed suffix.
+    Changes arriving faster than ``max_rate_hz`` are coalesced; only the
+    newest one is delivered once the interval has passed.
+    """
+
+    def __init__(self, max_rate_hz: float = 5.0, clock: Callable[[], float] = time.monotonic):
+        self.max_rate_hz = max_rate_hz
+        self._clock = clock
+        self._emitted = ""
+        self._pending: Optional[str] = None
+        self._last_emit = float("-inf")
+
+    def _interval(self) -> float:
+        return 1.0 / self.max_rate_hz if self.max_rate_hz > 0 else 0.0
+
+    def _emit(self, text: str, now: float) -> Tuple[str, int]:
+        stable = stable_prefix_length(self._emitted, text)
+        self._emitted = text
+        self._pending = None
+        self._last_emit = now
+        return text, stable
+
+    def update(self, text: str) -> Optional[Tuple[str, int]]:
+        """Offer a new partial; returns an update to emit now, if any."""
+        if text == self._emitted:
+            self._pending = None
+            return None
+        now = self._clock()
+        if now - self._last_emit >= self._interval():
+            return self._emit(text, now)
+        self._pending = text
+        return None
+
+    def poll(self) -> Optional[Tuple[str, int]]:
+        """Deliver a coalesced partial once the rate limit allows it."""
+        if self._pending is None:
+            return None
+        now = self._clock()
+        if now - self._last_emit >= self._interval():
+            return self._emit(self._pending, now)
+        return None
+
+    def reset(self) -> None:
+        """Forget state at an utterance boundary (the final supersedes pending partials)."""
+        self._emitted = ""
+        self._pending = None
@@ -2,52 +2,178 @@
 
 from __future__ import annotations
 
-from typing import Optional
+import itertools
+import threading
+import time
+from typing import Iterator, Optional, Tuple
 
+import numpy as np
 from PyQt6.QtCore import QObject, QThread, pyqtSignal, QMetaObject, Qt, Q_ARG
 
-from app.config import AppConfig
-from app.core.asr_engine import ASREngine
+from app.config import APP_DIR, AppConfig
+from app.core.asr_engine import ASREngine, RUNTIME_FIELDS
 from app.core.asr_worker import ASRWorker
 from app.core.audio_player import AudioPlayer
 from app.core.hotkey_manager import HotkeyManager
+from app.core.keyword_spotter import KeywordDetector
 from app.core.osc_client import OSCClient
+from app.core.second_pass import SecondPassRecognizer
+from app.core.text_split import split_text
+from app.core.tts_cache import TTSCache
 from app.core.tts_client import TTSClient
+from app.core.tts_queue import (
+    DROP_EXPIRED, DROP_FULL, PRIORITY_ASR, PRIORITY_MANUAL, PUT_MERGED, PUT_QUEUED, TTSJob,
+    TTSRequestQueue,
+)
 from app.signals import signal_bus
 
 
 class TTSWorker(QThread):
-    """Background thread for TTS synthesis to avoid blocking UI."""
+    """Long-lived thread that turns queued TTS jobs into playback.
+
+    The HTTP requests run on the TTSClient's event loop; this thread only
+    consumes the decoded audio and feeds the player, which may wait for
+    room in its buffers. Jobs come from a TTSRequestQueue until it is
+    closed. The next job's synthesis starts while the previous one is
+    still playing, and its playback begins once that has drained.
+
+    Every job carries a CancelToken that reaches its HTTP requests and its
+    playback; :meth:`cancel_active` cancels the jobs being synthesized or
+    played, which end with ``job_done(False)`` and no error.
+    """
 
-    finished = pyqtSignal(bytes)  # WAV audio data
     error = pyqtSignal(str)
+    streamed = pyqtSignal()           # a job's audio has been received and queued
+    first_audio = pyqtSignal(float)   # ms from submitting a job to its first sound
+    job_done = pyqtSignal(bool)       # once per job: played to the end (or failed)
 
-    def __init__(self, client: TTSClient, text: str, params: dict = None, parent=None):
+    def __init__(self, client: TTSClient, player: AudioPlayer, requests: TTSRequestQueue, parent=None):
         super().__init__(parent)
         self.client = client
-        self.text = text
-        self.params = params or {}
+        self.player = player
+        self.requests = requests
+        self._active = set()  # jobs taken from the queue and not yet done
+        self._active_lock = threading.Lock()
+
+    def cancel_active(self):
+        """Abort the requests and playback of every job in progress."""
+        with self._active_lock:
+            jobs = list(self._active)
+        for job in jobs:
+            job.cancel.cancel()
+
+    def stop(self, timeout_ms: int = 2000):
+        self.requests.close()
+        self.cancel_active()
+        self.wait(timeout_ms)
 
     def run(self):
+        previous: Optional[threading.Event] = None  # set when the last job's audio has drained
+        while True:
+            job = self.requests.get()
+            if job is None:
+                return
+            previous = self._process(job, previous)
+
+    def _audio_chunks(self, job: TTSJob) -> Iterator[Tuple[np.ndarray, int]]:
+        if job.split_method:
+            segments = split_text(job.text, job.split_method)
+            return self.client.synthesize_pipelined(segments, job.concurrency, job.cancel, **job.params)
+        if job.streaming:
+            return self.client.stream_pcm(job.text, job.cancel, **job.params)
+        return iter([self.client.synthesize_pcm(job.text, job.cancel, **job.params)])
+
+    def _completion(self, job: TTSJob, drained: threading.Event):
+        """Callback that reports the job exactly once, from playback or an error."""
+        claimed = threading.Lock()
+
+        def finish(ok: bool = True):
+            if claimed.acquire(blocking=False):
+                with self._active_lock:
+                    self._active.discard(job)
+                drained.set()
+                self.job_done.emit(ok and not job.cancel.cancelled)
+        return finish
+
+    def _process(self, job: TTSJob, previous: Optional[threading.Event]) -> threading.Event:
+        drained = threading.Event()
+        finish = self._completion(job, drained)
+        with self._active_lock:
+            self._active.add(job)
         try:
-            wav_data = self.client.synthesize(self.text, **self.params)
-            self.finished.emit(wav_data)
+            chunks = self._audio_chunks(job)
+            # Synthesize up to the first audio while the previous job is still playing
+            first = next(chunks, None)
+            if previous is not None:
+                previous.wait()
+            if first is None:
+                finish()
+                return drained
+            self.player.play_stream(
+                itertools.chain([first], chunks),
+                on_finished=finish,
+                on_first_audio=lambda at: self.first_audio.emit((at - job.submitted_at) * 1000),
+                cancel=job.cancel,
+            )
+            self.streamed.emit()
         except Exception as e:
-            self.error.emit(str(e))
+            if not job.cancel.cancelled:
+                self.error.emit(str(e))
+            finish(False)
+        return drained
+
+
+class ASRLoader(QThread):
+    """Background thread that loads and warms up the ASR model (and second pass)."""
+
+    progress = pyqtSignal(int, str)  # percent, phase name
+    loaded = pyqtSignal(bool)        # success
+
+    def __init__(self, engine: ASREngine, warm_up: bool = True,
+                 second_pass: Optional[SecondPassRecognizer] = None, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.warm_up = warm_up
+        self.second_pass = second_pass
+
+    def run(self):
+        start = time.perf_counter()
+        self.progress.emit(10, "load")
+        if not self.engine.initialize():
+            self.loaded.emit(False)
+            return
+        if self.warm_up:
+            self.progress.emit(70, "warm_up")
+            try:
+                self.engine.warm_up()
+            except Exception as e:
+                print(f"ASR warm-up failed: {e}")
+        if self.second_pass is not None:
+            self.progress.emit(85, "second_pass")
+            t0 = time.perf_counter()
+            try:
+                self.second_pass.warm_up()
+                self.engine.startup_timings["second_pass"] = time.perf_counter() - t0
+            except Exception as e:
+                print(f"ASR second-pass warm-up failed: {e}")
+        self.progress.emit(100, "ready")
+        self.engine.startup_timings["total"] = time.perf_counter() - start
+        self.loaded.emit(True)
 
 
 class Pipeline(QObject):
     """Orchestrates ASR → TTS → AudioPlayer flow."""
 
-    # Internal signal for thread-safe playback completion
-    _playback_done_signal = pyqtSignal()
+    # Internal signal for thread-safe reporting of dropped TTS requests
+    _job_dropped_signal = pyqtSignal(str, str)  # text, reason
 
     def __init__(self, config: AppConfig, parent=None):
         super().__init__(parent)
         self.config = config
 
         # Core components
-        self.tts_client = TTSClient(config.tts)
+        self.tts_cache = self._tts_cache()
+        self.tts_client = TTSClient(config.tts, cache=self.tts_cache)
         self.audio_player = AudioPlayer(
             speaker_device_name=config.tts.speaker_device_name,
             virtual_device_name=config.tts.virtual_device_name,
@@ -56,35 +182,88 @@ class Pipeline(QObject):
             model_dir=config.asr.model_dir,
             language=config.asr.language,
             sample_rate=config.asr.sample_rate,
+            memory_budget_mb=config.asr.model_memory_budget_mb,
+            **self._asr_runtime_settings(),
         )
+        self.second_pass: Optional[SecondPassRecognizer] = None
+        self.keyword_detector: Optional[KeywordDetector] = None
         self.asr_worker: Optional[ASRWorker] = None
         self.hotkey_manager: Optional[HotkeyManager] = None
         self._tts_worker: Optional[TTSWorker] = None
-        self._busy = False
+        self._asr_loader: Optional[ASRLoader] = None
+        self._asr_reload_pending = False  # settings changed while a load was running
+        self._tts_requests = TTSRequestQueue(
+            maxsize=config.tts.queue_size,
+            max_age=config.tts.queue_max_age,
+            coalesce_chars=config.tts.coalesce_max_chars,
+            on_drop=lambda job, reason: self._job_dropped_signal.emit(job.text, reason),
+        )
+        self._tts_outstanding = 0  # requests queued, synthesizing or playing
+        self._osc_typing = False  # last typing state sent to VRChat
 
         # OSC client
         self.osc_client = OSCClient(config.osc.ip, config.osc.port)
 
-        # Connect internal signal for thread-safe completion callback
-        self._playback_done_signal.connect(self._handle_playback_done)
+        # Connect internal signal for thread-safe drop reports
+        self._job_dropped_signal.connect(self._handle_job_dropped)
 
     def initialize_asr(self) -> bool:
-        """Initialize ASR engine and start worker thread."""
+        """Load the ASR model in the background; the worker starts once it is ready.
+
+        Progress is reported through ``signal_bus.asr_loading_progress`` and
+        completion through ``signal_bus.asr_ready``.
+        """
         if not self.config.asr.enabled:
             return True
+        self._load_asr_model()
+        return True
 
-        if not self.asr_engine.initialize():
+    def _load_asr_model(self):
+        if self._asr_loader is not None and self._asr_loader.isRunning():
+            # Loading with the old settings: load again once it finishes
+            self._asr_reload_pending = True
+            return
+        self._asr_loader = ASRLoader(self.asr_engine, second_pass=self._second_pass(), parent=self)
+        self._asr_loader.progress.connect(signal_bus.asr_loading_progress.emit)
+        self._asr_loader.loaded.connect(self._on_asr_loaded)
+        self._asr_loader.start()
+
+    def _on_asr_loaded(self, ok: bool):
+        if self._asr_reload_pending:
+            self._asr_reload_pending = False
+            self._asr_loader.wait()  # the loader thread is just returning
+            self._load_asr_model()
+            return
+        if not ok:
             signal_bus.tts_error.emit("ASR模型未找到，请下载模型到 models/ 目录")
-            return False
+            signal_bus.asr_ready.emit(False)
+            return
+        if self.asr_worker is None:
+            self._start_asr_worker()
+        signal_bus.asr_ready.emit(True)
 
+    def _start_asr_worker(self):
+        """Create the capture worker and hotkey listener for a loaded engine."""
         self.asr_worker = ASRWorker(
             engine=self.asr_engine,
             microphone_name=self.config.asr.microphone_name,
+            vad_enabled=self._vad_active(),
+            vad_threshold_db=self.config.asr.vad_threshold_db,
+            vad_hangover_ms=self.config.asr.vad_hangover_ms,
+            preroll_ms=self.config.asr.preroll_ms,
+            chunk_ms=self.config.asr.chunk_ms,
+            second_pass=self._second_pass(),
+            second_pass_budget_ms=self.config.asr.second_pass_budget_ms,
+            partial_max_rate_hz=self.config.asr.partial_max_rate_hz,
+            metrics_log_path=self._asr_metrics_log(),
+            keyword_spotter=self._keyword_spotter(),
         )
         self.asr_worker.text_partial.connect(self._on_asr_partial)
         self.asr_worker.text_final.connect(self._on_asr_final)
         self.asr_worker.error.connect(lambda e: signal_bus.tts_error.emit(e))
         self.asr_worker.state_changed.connect(signal_bus.asr_state_changed.emit)
+        self.asr_worker.metrics_updated.connect(signal_bus.asr_metrics.emit)
+        self.asr_worker.keyword_detected.connect(signal_bus.asr_wake_word.emit)
 
         # Set up hotkey
         self.hotkey_manager = HotkeyManager(
@@ -96,7 +275,65 @@ class Pipeline(QObject):
 
         self.asr_worker.start()
         self.hotkey_manager.start()
-        return True
+
+    def _asr_runtime_settings(self) -> dict:
+        """Recognizer settings from ASRConfig, keyed like ASREngine.configure()."""
+        return {name: getattr(self.config.asr, name) for name in RUNTIME_FIELDS}
+
+    def _second_pass(self) -> Optional[SecondPassRecognizer]:
+        """Second-pass recognizer if enabled and an offline model is installed."""
+        asr = self.config.asr
+        if not asr.second_pass_enabled:
+            return None
+        if self.second_pass is None:
+            self.second_pass = SecondPassRecognizer(
+                model_dir=self.asr_engine.model_dir,
+                language=asr.language,
+                sample_rate=asr.sample_rate,
+                num_threads=asr.second_pass_threads,
+                provider=asr.provider,
+            )
+        self.second_pass.language = asr.language
+        return self.second_pass if self.second_pass.is_available() else None
+
+    def _keyword_spotter(self) -> Optional[KeywordDetector]:
+        """Wake-word detector for wake_word mode, if a KWS model is installed."""
+        asr = self.config.asr
+        if asr.voice_mode != "wake_word":
+            return None
+        if self.keyword_detector is None:
+            self.keyword_detector = KeywordDetector(
+                model_dir=self.asr_engine.model_dir,
+                keywords_file=asr.wake_keywords_file,
+                language=asr.language,
+                sample_rate=asr.sample_rate,
+                provider=asr.provider,
+                threshold=asr.wake_threshold,
+            )
+        elif (self.keyword_detector.keywords_file, self.keyword_detector.threshold) != (
+            asr.wake_keywords_file, asr.wake_threshold,
+        ):
+            # Keywords are fixed when the spotter is built
+            self.keyword_detector.keywords_file = asr.wake_keywords_file
+            self.keyword_detector.threshold = asr.wake_threshold
+            self.keyword_detector.unload()
+        if not self.keyword_detector.is_available():
+            signal_bus.tts_error.emit("唤醒词模型未找到，请下载 KWS 模型到 models/ 目录")
+            return None
+        return self.keyword_detector
+
+    def _tts_cache(self) -> Optional[TTSCache]:
+        tts = self.config.tts
+        if not tts.cache_enabled:
+            return None
+        return TTSCache(APP_DIR / "tts_cache", memory_mb=tts.cache_memory_mb, disk_mb=tts.cache_disk_mb)
+
+    def _asr_metrics_log(self):
+        return APP_DIR / "asr_metrics.jsonl" if self.config.asr.metrics_log else None
+
+    def _vad_active(self) -> bool:
+        """The VAD gate only applies to hands-free open_mic mode."""
+        return self.config.asr.vad_enabled and self.config.asr.voice_mode == "open_mic"
 
     def _on_hotkey_start(self):
         if self.asr_worker:
@@ -106,64 +343,116 @@ class Pipeline(QObject):
         if self.asr_worker:
             self.asr_worker.stop_recording()
 
-    def _on_asr_partial(self, text: str):
+    def _on_asr_partial(self, text: str, stable_len: int = 0):
         signal_bus.asr_text_recognized.emit(text)
-        # Show typing indicator in VRChat while speaking
-        if self.config.osc.enabled:
+        # Show typing indicator in VRChat while speaking (once per utterance)
+        if self.config.osc.enabled and not self._osc_typing:
             self.osc_client.set_typing(True)
+            self._osc_typing = True
 
     def _on_asr_final(self, text: str):
         signal_bus.asr_final_result.emit(text)
         # Send to VRChat chatbox via OSC
         if self.config.osc.enabled:
             self.osc_client.set_typing(False)
+            self._osc_typing = False
             self.osc_client.send_chatbox(
                 text, sound=self.config.osc.notification_sound,
             )
         # Auto-synthesize final ASR result
         if self.config.tts.enabled:
-            self.synthesize(text)
+            self.synthesize(text, priority=PRIORITY_ASR)
+
+    def synthesize(self, text: str, priority: int = PRIORITY_MANUAL, **params):
+        """Queue text for TTS and playback.
 
-    def synthesize(self, text: str, **params):
-        """Send text to TTS and play result."""
+        Requests are served by priority (manual Generate before ASR finals)
+        while earlier ones play; short ASR finals may be merged, and
+        requests that wait too long are dropped.
+        """
         if not text.strip():
             return
-        if self._busy:
-            signal_bus.tts_error.emit("正在合成中，请稍候...")
-            return
-
-        self._busy = True
-        signal_bus.pipeline_busy.emit(True)
-        signal_bus.tts_started.emit()
-
-        self._tts_worker = TTSWorker(self.tts_client, text, params)
-        self._tts_worker.finished.connect(self._on_tts_done)
-        self._tts_worker.error.connect(self._on_tts_error)
-        self._tts_worker.start()
-
-    def _on_tts_done(self, wav_data: bytes):
-        signal_bus.tts_finished.emit()
-        signal_bus.tts_audio_ready.emit(wav_data)
-        signal_bus.playback_started.emit()
-
-        self.audio_player.play_wav_bytes(
-            wav_data,
-            on_finished=self._on_playback_done,
+        tts = self.config.tts
+        split_method = None
+        if tts.sentence_pipelining:
+            split_method = params.get("text_split_method") or tts.text_split_method
+        job = TTSJob(
+            text, params,
+            priority=priority,
+            streaming=tts.streaming_mode,
+            split_method=split_method,
+            concurrency=tts.sentence_concurrency,
         )
+        self._ensure_tts_worker()
+        self._tts_outstanding += 1
+        if self._tts_outstanding == 1:
+            signal_bus.pipeline_busy.emit(True)
+        status = self._tts_requests.put(job)
+        if status == PUT_MERGED:
+            self._tts_outstanding -= 1  # merged into a request that is still queued
+        elif status == PUT_QUEUED:
+            signal_bus.tts_started.emit()
+        # A refused job is released by _handle_job_dropped
+
+    def _ensure_tts_worker(self) -> TTSWorker:
+        """The single playback worker, started on first use."""
+        if self._tts_worker is None:
+            self._tts_worker = TTSWorker(
+                self.tts_client, self.audio_player, self._tts_requests, parent=self,
+            )
+            self._tts_worker.first_audio.connect(self._on_first_audio)
+            self._tts_worker.streamed.connect(signal_bus.tts_finished.emit)
+            self._tts_worker.error.connect(self._on_tts_error)
+            self._tts_worker.job_done.connect(self._handle_job_done)
+            self._tts_worker.start()
+        return self._tts_worker
+
+    def stop_tts(self):
+        """Cancel queued and in-flight TTS requests and silence both devices.
+
+        The time from the stop request until the output streams have
+        actually stopped is reported through ``signal_bus.tts_cancelled``
+        once they have; the UI thread does not wait for it.
+        """
+        started = time.perf_counter()
+        self._tts_requests.cancel_pending()
+        if self._tts_worker:
+            self._tts_worker.cancel_active()
+
+        def on_silent(stopped: bool):
+            if stopped:
+                signal_bus.tts_cancelled.emit((time.perf_counter() - started) * 1000)
+            else:
+                signal_bus.tts_error.emit("音频设备未能及时停止播放")
+
+        self.audio_player.stop(on_silent=on_silent)
+        self.tts_client.request_stop()
+
+    def _on_first_audio(self, latency_ms: float):
+        signal_bus.playback_started.emit()
+        signal_bus.tts_first_audio.emit(latency_ms)
 
     def _on_tts_error(self, error: str):
-        self._busy = False
-        signal_bus.pipeline_busy.emit(False)
         signal_bus.tts_error.emit(error)
 
-    def _on_playback_done(self):
-        # Called from background thread — emit signal for thread-safe handling
-        self._playback_done_signal.emit()
-
-    def _handle_playback_done(self):
-        self._busy = False
-        signal_bus.pipeline_busy.emit(False)
-        signal_bus.playback_finished.emit()
+    def _release_tts_request(self):
+        self._tts_outstanding = max(0, self._tts_outstanding - 1)
+        if self._tts_outstanding == 0:
+            signal_bus.pipeline_busy.emit(False)
+
+    def _handle_job_done(self, ok: bool):
+        if ok:
+            signal_bus.playback_finished.emit()
+            if self.tts_cache is not None:
+                signal_bus.tts_cache_stats.emit(self.tts_cache.stats())
+        self._release_tts_request()
+
+    def _handle_job_dropped(self, text: str, reason: str):
+        if reason == DROP_EXPIRED:
+            signal_bus.tts_error.emit(f"语音请求等待过久，已跳过：{text}")
+        elif reason == DROP_FULL:
+            signal_bus.tts_error.emit(f"语音队列已满，已丢弃：{text}")
+        self._release_tts_request()
 
     def update_audio_devices(self):
         """Update audio player devices from config."""
@@ -179,6 +468,27 @@ class Pipeline(QObject):
             self.hotkey_manager.update_mode(self.config.asr.voice_mode)
         if self.asr_worker:
             self.asr_worker.microphone_name = self.config.asr.microphone_name
+            self.asr_worker.vad_enabled = self._vad_active()
+            self.asr_worker.vad_threshold_db = self.config.asr.vad_threshold_db
+            self.asr_worker.vad_hangover_ms = self.config.asr.vad_hangover_ms
+            self.asr_worker.preroll_ms = self.config.asr.preroll_ms
+            self.asr_worker.chunk_ms = self.config.asr.chunk_ms
+            self.asr_worker.second_pass = self._second_pass()
+            self.asr_worker.second_pass_budget_ms = self.config.asr.second_pass_budget_ms
+            self.asr_worker.partial_max_rate_hz = self.config.asr.partial_max_rate_hz
+            self.asr_worker.metrics.log_path = self._asr_metrics_log()
+            self.asr_worker.keyword_spotter = self._keyword_spotter()
+        self.asr_engine.memory_budget_mb = self.config.asr.model_memory_budget_mb
+        # Rebuild the recognizer only when a runtime setting or the model changed
+        runtime_changed = self.asr_engine.configure(**self._asr_runtime_settings())
+        model_changed = self.asr_engine.set_language(self.config.asr.language)
+        if not self.asr_engine.is_initialized or not (runtime_changed or model_changed):
+            return
+        if not runtime_changed and self.asr_engine.is_loaded():
+            # Previously used language: reuse its recognizer without reloading
+            self.asr_engine.initialize()
+        else:
+            self._load_asr_model()
 
     def update_osc_settings(self):
         """Update OSC client address from config."""
@@ -193,9 +503,14 @@ class Pipeline(QObject):
             self.hotkey_manager.stop()
         if self.asr_worker:
             self.asr_worker.stop()
-        if self._tts_worker and self._tts_worker.isRunning():
-            self._tts_worker.quit()
-            self._tts_worker.wait(2000)
+        if self._asr_loader and self._asr_loader.isRunning():
+            self._asr_loader.wait(5000)
+        # Stop feeding the devices before silencing them
+        self._tts_requests.cancel_pending()
+        if self._tts_worker:
+            self._tts_worker.stop()  # also aborts requests still in flight
         self.audio_player.stop()
         self.tts_client.close()
         self.asr_engine.shutdown()
+        if self.second_pass:
+            self.second_pass.shutdown()
@@ -0,0 +1,102 @@
+"""Offline second-pass re-decoding of finished utterances."""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import sherpa_onnx
+
+from app.core.model_registry import ModelInfo, get_registry
+
+
+class SecondPassRecognizer:
+    """Re-decodes whole utterances with a non-streaming OfflineRecognizer.
+
+    The offline model is resolved from the same registry as the streaming
+    one and loaded by :meth:`warm_up` (or lazily on the first submitted
+    utterance). Decoding runs on a small thread pool so the capture loop
+    never waits for it.
+    """
+
+    def __init__(
+        self,
+        model_dir: Path,
+        language: str = "zh",
+        sample_rate: int = 16000,
+        num_threads: int = 2,
+        provider: str = "cpu",
+        max_workers: int = 2,
+    ):
+        self.model_dir = Path(model_dir)
+        self.language = language
+        self.sample_rate = sample_rate
+        self.num_threads = num_threads
+        self.provider = provider
+        self.model: Optional[ModelInfo] = None
+        self._recognizer: Optional[sherpa_onnx.OfflineRecognizer] = None
+        self._load_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asr-2pass")
+
+    def is_available(self) -> bool:
+        return get_registry(self.model_dir).resolve(self.language, streaming=False) is not None
+
+    def _create_recognizer(self, model: ModelInfo) -> sherpa_onnx.OfflineRecognizer:
+        files = {role: str(path) for role, path in model.files.items()}
+        common = dict(
+            tokens=files["tokens"],
+            num_threads=self.num_threads,
+            sample_rate=self.sample_rate,
+            provider=self.provider,
+        )
+        if model.model_type == "sense_voice":
+            language = self.language if self.language in model.languages else ""
+            return sherpa_onnx.OfflineRecognizer.from_sense_voice(
+                model=files["model"], language=language, use_itn=True, **common,
+            )
+        if model.model_type == "paraformer":
+            return sherpa_onnx.OfflineRecognizer.from_paraformer(paraformer=files["model"], **common)
+        if model.model_type == "transducer":
+            return sherpa_onnx.OfflineRecognizer.from_transducer(
+                encoder=files["encoder"], decoder=files["decoder"], joiner=files["joiner"], **common,
+            )
+        return sherpa_onnx.OfflineRecognizer.from_zipformer_ctc(model=files["model"], **common)
+
+    def _ensure_loaded(self) -> Optional[sherpa_onnx.OfflineRecognizer]:
+        model = get_registry(self.model_dir).resolve(self.language, streaming=False)
+        if model is None:
+            return None
+        with self._load_lock:
+            if self._recognizer is None or self.model is None or self.model.path != model.path:
+                self._recognizer = self._create_recognizer(model)
+                self.model = model
+            return self._recognizer
+
+    def _decode(self, audio: np.ndarray) -> str:
+        recognizer = self._ensure_loaded()
+        if recognizer is None:
+            raise RuntimeError("No offline ASR model for the second pass")
+        stream = recognizer.create_stream()
+        stream.accept_waveform(self.sample_rate, memoryview(audio))
+        recognizer.decode_stream(stream)
+        return stream.result.text.strip()
+
+    def warm_up(self, seconds: float = 0.5) -> None:
+        """Load the offline model and decode a short silence on the calling thread.
+
+        Otherwise the first finals after startup pay for loading and
+        onnxruntime's first-run setup and miss the second-pass budget.
+        """
+        self._decode(np.zeros(int(self.sample_rate * seconds), dtype=np.float32))
+
+    def submit(self, audio: np.ndarray) -> Future:
+        """Queue an utterance (float32 at ``sample_rate``); the future yields its text."""
+        return self._executor.submit(self._decode, np.ascontiguousarray(audio, dtype=np.float32))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._recognizer = None
+        self.model = None
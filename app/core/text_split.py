@@ -0,0 +1,122 @@
+"""Client-side text splitting matching GPT-SoVITS ``text_split_method`` (cut0–cut5).
+
+Used to pipeline long inputs: each piece is synthesized as its own
+request so playback can begin after the first one.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Callable, Dict, List
+
+_SPLITS = set("，。？！,.?!~:：—…")
+_PUNCTUATION = set("!?…,.- ")
+_CUT5_PUNDS = set(",.;?!、，。？！；：…")
+MIN_SEGMENT_CHARS = 5  # shorter pieces are merged into a neighbour, as the server does
+
+
+def _split_sentences(text: str) -> List[str]:
+    text = text.replace("……", "。").replace("——", "，")
+    if text[-1] not in _SPLITS:
+        text += "。"
+    sentences, start = [], 0
+    for i, char in enumerate(text):
+        if char in _SPLITS:
+            sentences.append(text[start:i + 1])
+            start = i + 1
+    return sentences
+
+
+def _cut0(text: str) -> List[str]:
+    return [text]
+
+
+def _cut1(text: str) -> List[str]:
+    """Every four sentences."""
+    sentences = _split_sentences(text)
+    return ["".join(sentences[i:i + 4]) for i in range(0, len(sentences), 4)]
+
+
+def _cut2(text: str) -> List[str]:
+    """Pieces of more than 50 characters."""
+    sentences = _split_sentences(text)
+    if len(sentences) < 2:
+        return [text]
+    pieces, current = [], ""
+    for sentence in sentences:
+        current += sentence
+        if len(current) > 50:
+            pieces.append(current)
+            current = ""
+    if current:
+        pieces.append(current)
+    if len(pieces) > 1 and len(pieces[-1]) < 50:
+        pieces[-2:] = [pieces[-2] + pieces[-1]]
+    return pieces
+
+
+def _cut3(text: str) -> List[str]:
+    """At Chinese full stops."""
+    return re.split(r"(?<=。)", text)
+
+
+def _cut4(text: str) -> List[str]:
+    """At English full stops (not decimal points)."""
+    return re.split(r"(?<=(?<!\d)\.)(?!\d)", text)
+
+
+def _cut5(text: str) -> List[str]:
+    """At every punctuation mark (not decimal points)."""
+    pieces, current = [], []
+    for i, char in enumerate(text):
+        current.append(char)
+        if char in _CUT5_PUNDS:
+            if char == "." and 0 < i < len(text) - 1 and text[i - 1].isdigit() and text[i + 1].isdigit():
+                continue
+            pieces.append("".join(current))
+            current = []
+    if current:
+        pieces.append("".join(current))
+    return pieces
+
+
+SPLIT_METHODS: Dict[str, Callable[[str], List[str]]] = {
+    "cut0": _cut0,
+    "cut1": _cut1,
+    "cut2": _cut2,
+    "cut3": _cut3,
+    "cut4": _cut4,
+    "cut5": _cut5,
+}
+
+
+def _join(a: str, b: str) -> str:
+    # Latin text needs the space that stripping removed; CJK does not
+    return f"{a} {b}" if a[-1].isascii() and b[0].isascii() else a + b
+
+
+def _merge_short(pieces: List[str], min_chars: int) -> List[str]:
+    merged: List[str] = []
+    for piece in pieces:
+        if merged and len(merged[-1]) < min_chars:
+            merged[-1] = _join(merged[-1], piece)
+        else:
+            merged.append(piece)
+    if len(merged) > 1 and len(merged[-1]) < min_chars:
+        merged[-2:] = [_join(merged[-2], merged[-1])]
+    return merged
+
+
+def split_text(text: str, method: str = "cut5", min_chars: int = MIN_SEGMENT_CHARS) -> List[str]:
+    """Split ``text`` into synthesis segments with the given cut method.
+
+    Punctuation-only pieces are dropped and pieces shorter than
+    ``min_chars`` are merged into the following one. Unknown methods
+    leave the text whole.
+    """
+    text = text.strip("\n").strip()
+    if not text:
+        return []
+    pieces = [p.strip() for p in SPLIT_METHODS.get(method, _cut0)(text)]
+    pieces = [p for p in pieces if p and not set(p) <= _PUNCTUATION | _CUT5_PUNDS]
+    return _merge_short(pieces, min_chars)
@@ -0,0 +1,157 @@
+"""Routing of TTS requests across several GPT-SoVITS servers."""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Iterable, List, Optional
+
+import httpx
+
+ROUTE_LEAST_OUTSTANDING = "least_outstanding"
+ROUTE_EWMA = "ewma"
+STICKY_SLACK = 2  # extra requests a voice's server may have before the voice moves
+
+
+@dataclass(eq=False)
+class Backend:
+    """One GPT-SoVITS server and what the client knows about it."""
+
+    url: str
+    outstanding: int = 0                  # requests in flight
+    ewma_s: Optional[float] = None        # smoothed seconds until a response starts
+    failures: int = 0                     # consecutive failed requests or probes
+    ejected_until: float = 0.0            # monotonic time it may be tried again
+    weights: dict = field(default_factory=lambda: {"gpt": "", "sovits": ""})
+    requests: int = 0
+    errors: int = 0
+
+
+def is_server_fault(error: BaseException) -> bool:
+    """Whether ``error`` says something about the server rather than the request.
+
+    Connection problems, timeouts and 5xx count against a server; a 4xx
+    (bad reference path, unknown language, ...) would fail anywhere.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+class BackendPool:
+    """Picks a server for each request and tracks their health.
+
+    * ``least_outstanding`` sends a request to the server with the fewest
+      requests in flight; ``ewma`` to the one with the lowest expected wait
+      (smoothed response time times requests in flight plus one).
+    * Requests of a voice stick to the server that served it last, where
+      its weights and reference features are already loaded, unless that
+      server has ``STICKY_SLACK`` more requests in flight than the best one.
+    * After ``eject_failures`` consecutive failures a server gets no
+      requests for ``eject_seconds``; a successful request or health probe
+      brings it back. When every server is ejected they are tried anyway.
+
+    Safe to use from several threads.
+    """
+
+    def __init__(self, urls: Iterable[str], policy: str = ROUTE_LEAST_OUTSTANDING,
+                 eject_failures: int = 3, eject_seconds: float = 30.0, ewma_alpha: float = 0.3):
+        self.policy = policy
+        self.eject_failures = eject_failures
+        self.eject_seconds = eject_seconds
+        self.ewma_alpha = ewma_alpha
+        self.backends: List[Backend] = []
+        self._sticky: Dict[Hashable, Backend] = {}
+        self._lock = threading.Lock()
+        self.hedges = 0  # backup requests sent
+        self.set_urls(urls)
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    def set_urls(self, urls: Iterable[str]) -> None:
+        """Serve from ``urls``, keeping the state of servers already known."""
+        urls = list(dict.fromkeys(url.rstrip("/") for url in urls if url))
+        with self._lock:
+            if urls == [b.url for b in self.backends]:
+                return
+            known = {b.url: b for b in self.backends}
+            self.backends = [known.get(url) or Backend(url) for url in urls]
+            self._sticky = {k: b for k, b in self._sticky.items() if b in self.backends}
+
+    def available(self, now: Optional[float] = None) -> List[Backend]:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return [b for b in self.backends if b.ejected_until <= now]
+
+    def _score(self, backend: Backend):
+        if self.policy == ROUTE_EWMA:
+            return (backend.ewma_s or 0.0) * (backend.outstanding + 1), backend.outstanding
+        return backend.outstanding, backend.ewma_s or 0.0
+
+    def pick(self, voice: Optional[Hashable] = None, exclude: Iterable[Backend] = ()) -> Optional[Backend]:
+        """Server for the next request of ``voice``; None if all are excluded.
+
+        A pick with ``exclude`` (a hedge) does not move the voice.
+        """
+        exclude = set(exclude)
+        now = time.monotonic()
+        with self._lock:
+            candidates = [b for b in self.backends if b not in exclude]
+            if not candidates:
+                return None
+            candidates = [b for b in candidates if b.ejected_until <= now] or candidates
+            best = min(candidates, key=self._score)
+            sticky = self._sticky.get(voice) if voice is not None else None
+            if sticky in candidates and sticky.outstanding <= best.outstanding + STICKY_SLACK:
+                return sticky
+            if voice is not None and not exclude:
+                self._sticky[voice] = best
+            return best
+
+    def acquire(self, backend: Backend) -> None:
+        with self._lock:
+            backend.outstanding += 1
+            backend.requests += 1
+
+    def release(self, backend: Backend) -> None:
+        with self._lock:
+            backend.outstanding -= 1
+
+    def record_success(self, backend: Backend, seconds: Optional[float] = None) -> None:
+        """A response (or probe) succeeded; ``seconds`` updates the latency average."""
+        with self._lock:
+            backend.failures = 0
+            backend.ejected_until = 0.0
+            if seconds is not None:
+                if backend.ewma_s is None:
+                    backend.ewma_s = seconds
+                else:
+                    backend.ewma_s += self.ewma_alpha * (seconds - backend.ewma_s)
+
+    def record_error(self, backend: Backend, error: BaseException) -> None:
+        """Count ``error`` against the server if it was the server's fault."""
+        if not is_server_fault(error):
+            return
+        with self._lock:
+            backend.errors += 1
+            backend.failures += 1
+            if backend.failures >= self.eject_failures:
+                backend.ejected_until = time.monotonic() + self.eject_seconds
+
+    def stats(self) -> List[dict]:
+        """Per-server request counts, errors, latency and state."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "url": b.url,
+                    "requests": b.requests,
+                    "errors": b.errors,
+                    "outstanding": b.outstanding,
+                    "ewma_ms": None if b.ewma_s is None else b.ewma_s * 1000,
+                    "ejected": b.ejected_until > now,
+                }
+                for b in self.backends
+            ]
@@ -0,0 +1,186 @@
+"""Content-addressed cache of synthesized speech: in-memory LRU over an on-disk store."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form for cache keys: NFC with whitespace runs collapsed."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(payload: dict, base_url: str, weights: Dict[str, str]) -> str:
+    """Hash of everything that determines the audio of a /tts request."""
+    material = {
+        "payload": {**payload, "text": normalize_text(payload["text"])},
+        "url": base_url,
+        "weights": weights,
+    }
+    blob = json.dumps(material, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(payload: dict) -> bool:
+    """Only a fixed seed makes synthesis repeatable; seed -1 is random per request."""
+    return payload.get("seed", -1) != -1
+
+
+class TTSCache:
+    """Two-tier cache of decoded float32 PCM keyed by :func:`cache_key`.
+
+    Hits in memory skip both the request and WAV decoding. The disk tier
+    (one WAV per key under ``directory``) survives restarts; entries are
+    promoted to memory on a disk hit. Both tiers evict least recently used
+    entries once their byte budget is exceeded. Safe to use from several
+    threads.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, memory_mb: float = 64, disk_mb: float = 512):
+        self.directory = Path(directory) if directory else None
+        self.memory_budget = int(memory_mb * 1024 * 1024)
+        self.disk_budget = int(disk_mb * 1024 * 1024)
+        self._memory: "OrderedDict[str, Tuple[np.ndarray, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: Optional["OrderedDict[str, int]"] = None  # key -> file size, oldest first
+        self._disk_bytes = 0
+        # Separate locks: file I/O under _disk_lock never delays a memory lookup
+        self._lock = threading.Lock()       # memory tier
+        self._disk_lock = threading.Lock()  # disk index and files
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.wav"
+
+    def _disk_index(self) -> "OrderedDict[str, int]":
+        """Scan the cache directory once, ordering existing files by last use."""
+        if self._disk is None:
+            self._disk = OrderedDict()
+            if self.directory is not None and self.directory.is_dir():
+                files = sorted(self.directory.glob("*.wav"), key=lambda p: p.stat().st_mtime)
+                for path in files:
+                    self._disk[path.stem] = path.stat().st_size
+                self._disk_bytes = sum(self._disk.values())
+        return self._disk
+
+    def _memory_hit(self, key: str) -> Optional[Tuple[np.ndarray, int]]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+        return entry
+
+    def get_memory(self, key: str) -> Optional[Tuple[np.ndarray, int]]:
+        """Memory-tier lookup only, safe on an event loop (no file I/O).
+
+        A miss is not counted; follow it with :meth:`get` off the loop.
+        """
+        with self._lock:
+            return self._memory_hit(key)
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, int]]:
+        """Cached ``(samples, sample_rate)`` for ``key``, or None.
+
+        May scan the cache directory and read a WAV file.
+        """
+        with self._lock:
+            entry = self._memory_hit(key)
+        if entry is not None:
+            return entry
+        with self._disk_lock:
+            disk = self._disk_index()
+            if key in disk:
+                path = self._path(key)
+                try:
+                    samples, rate = sf.read(path, dtype="float32")
+                    os.utime(path)
+                except Exception:
+                    self._drop_file(key)
+                else:
+                    disk.move_to_end(key)
+                    self.disk_hits += 1
+                    with self._lock:
+                        self._remember(key, samples, rate)
+                    return samples, rate
+            self.misses += 1
+            return None
+
+    def put(self, key: str, samples: np.ndarray, sample_rate: int) -> None:
+        samples = np.ascontiguousarray(samples, dtype=np.float32)
+        with self._lock:
+            self._remember(key, samples, sample_rate)
+        if self.directory is None or self.disk_budget <= 0:
+            return
+        with self._disk_lock:
+            disk = self._disk_index()
+            if key in disk:
+                return
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                tmp = self.directory / f"{key}.tmp"
+                sf.write(tmp, samples, sample_rate, format="WAV", subtype="FLOAT")
+                os.replace(tmp, self._path(key))
+                size = self._path(key).stat().st_size
+            except Exception as e:
+                print(f"TTS cache write failed: {e}")
+                return
+            disk[key] = size
+            self._disk_bytes += size
+            while self._disk_bytes > self.disk_budget and len(disk) > 1:
+                self._drop_file(next(iter(disk)))
+
+    def _remember(self, key: str, samples: np.ndarray, sample_rate: int) -> None:
+        if samples.nbytes > self.memory_budget:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old[0].nbytes
+        self._memory[key] = (samples, sample_rate)
+        self._memory_bytes += samples.nbytes
+        while self._memory_bytes > self.memory_budget:
+            _, (evicted, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    def _drop_file(self, key: str) -> None:
+        self._disk_bytes -= self._disk.pop(key, 0)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        """Empty both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        with self._disk_lock:
+            for key in list(self._disk_index()):
+                self._drop_file(key)
+
+    def stats(self) -> dict:
+        """Hit/miss counts, hit ratio and the size of each tier."""
+        with self._lock, self._disk_lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "lookups": lookups,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk) if self._disk is not None else 0,
+                "disk_bytes": self._disk_bytes,
+            }
@@ -2,97 +2,420 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+import asyncio
+import io
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future
+from typing import AsyncIterator, Iterable, Iterator, Optional, Tuple
 
 import httpx
+import numpy as np
+import soundfile as sf
 
+from app.common.cancel import CancelToken
+from app.common.wav_stream import WavStreamDecoder
 from app.config import TTSConfig
+from app.core.tts_backends import Backend, BackendPool
+from app.core.tts_cache import TTSCache, cache_key, is_cacheable
+
+# TTSConfig fields sent with every /tts request
+PAYLOAD_FIELDS = (
+    "text_lang", "ref_audio_path", "prompt_text", "prompt_lang",
+    "top_k", "top_p", "temperature", "speed_factor", "text_split_method",
+    "batch_size", "seed", "media_type", "streaming_mode",
+    "repetition_penalty", "sample_steps", "super_sampling",
+)
+# An empty string override falls back to config for these (prompt_text may be empty)
+_EMPTY_MEANS_DEFAULT = {"text_lang", "ref_audio_path", "prompt_lang", "text_split_method", "media_type"}
+_END = object()  # end-of-stream marker between the loop and a consuming thread
 
 
 class TTSClient:
-    """Synchronous HTTP client for GPT-SoVITS V2 API."""
+    """HTTP client for GPT-SoVITS V2 API backed by one long-lived event loop.
+
+    All requests run on a dedicated thread's asyncio loop through a single
+    ``httpx.AsyncClient``, so connections are kept alive and reused and no
+    thread is created per request. ``submit`` returns a
+    ``concurrent.futures.Future`` usable from any thread; the other methods
+    are blocking wrappers over the same loop. Pool size and connect/read
+    timeouts come from TTSConfig.
+
+    The ``*_pcm`` methods and ``submit`` return decoded audio and go
+    through ``cache`` when one is given and the request uses a fixed seed.
+
+    Requests are spread over ``api_url`` and ``api_urls`` by a
+    :class:`BackendPool`, which a background task keeps informed of each
+    server's health. With ``hedge_delay_ms`` set, a request still
+    unanswered after that long (or failed) is also sent to a second server
+    and the first response wins.
 
-    def __init__(self, config: TTSConfig):
+    Methods taking ``cancel`` abort their request when the token is
+    cancelled: the task on the loop is cancelled, which closes the
+    connection, and the caller gets ``concurrent.futures.CancelledError``.
+    """
+
+    def __init__(self, config: TTSConfig, cache: Optional[TTSCache] = None):
         self.config = config
-        self._client = httpx.Client(timeout=60.0)
+        self.cache = cache
+        self.weights = {"gpt": "", "sovits": ""}  # last weights loaded through this client
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                connect=config.connect_timeout,
+                read=config.read_timeout,
+                write=config.connect_timeout,
+                pool=config.read_timeout,
+            ),
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+        )
+        self.pool = BackendPool(
+            self._urls(), config.routing, config.eject_failures, config.eject_seconds,
+        )
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="tts-client", daemon=True)
+        self._thread.start()
+        self._probe = self._run(self._probe_loop())
 
     @property
     def base_url(self) -> str:
+        """The primary server; also what cache keys are computed against."""
         return self.config.api_url.rstrip("/")
 
+    def _urls(self):
+        return [self.config.api_url, *self.config.api_urls]
+
+    def _pick(self, payload: dict, exclude=()) -> Optional[Backend]:
+        self.pool.set_urls(self._urls())  # the settings page edits api_url live
+        return self.pool.pick(self._voice(payload), exclude)
+
+    def _require_backend(self, payload: dict) -> Backend:
+        backend = self._pick(payload)
+        if backend is None:
+            raise httpx.RequestError("No TTS server configured, set the API URL in the TTS settings")
+        return backend
+
+    def _voice(self, payload: dict) -> tuple:
+        return payload.get("ref_audio_path", ""), self.weights["gpt"], self.weights["sovits"]
+
+    def _run(self, coro) -> Future:
+        """Schedule a coroutine on the client loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _iterate(self, agen: AsyncIterator, cancel: Optional[CancelToken] = None) -> Iterator:
+        """Consume an async generator on the loop as a blocking iterator.
+
+        Closing the iterator early, or cancelling ``cancel``, cancels the
+        generator's task, which closes its connection.
+        """
+        items: queue.SimpleQueue = queue.SimpleQueue()
+
+        async def pump():
+            try:
+                async for item in agen:
+                    items.put(item)
+            except Exception as e:
+                items.put(e)
+            finally:
+                items.put(_END)
+
+        task = self._run(pump())
+        if cancel is not None:
+            def abort():
+                items.put(CancelledError())  # wake the consumer even if pump never ran
+                task.cancel()
+            cancel.on_cancel(abort)
+        try:
+            while True:
+                item = items.get()
+                if item is _END:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            task.cancel()
+
     def check_connection(self) -> bool:
+        """Whether at least one server answers."""
+        self.pool.set_urls(self._urls())
+        return any(self._run(self._probe_all()).result())
+
+    async def _probe_all(self) -> list:
+        return await asyncio.gather(*(self._probe_backend(b) for b in self.pool.backends))
+
+    async def _probe_backend(self, backend: Backend) -> bool:
         try:
-            r = self._client.get(self.base_url + "/docs")
-            return r.status_code == 200
-        except httpx.HTTPError:
+            r = await self._client.get(backend.url + "/docs")
+            r.raise_for_status()
+        except httpx.HTTPError as e:
+            self.pool.record_error(backend, e)
             return False
+        self.pool.record_success(backend)
+        return True
 
-    def synthesize(
-        self,
-        text: str,
-        text_lang: Optional[str] = None,
-        ref_audio_path: Optional[str] = None,
-        prompt_text: Optional[str] = None,
-        prompt_lang: Optional[str] = None,
-        top_k: Optional[int] = None,
-        top_p: Optional[float] = None,
-        temperature: Optional[float] = None,
-        speed_factor: Optional[float] = None,
-        text_split_method: Optional[str] = None,
-        batch_size: Optional[int] = None,
-        seed: Optional[int] = None,
-        media_type: Optional[str] = None,
-        streaming_mode: Optional[bool] = None,
-        repetition_penalty: Optional[float] = None,
-        sample_steps: Optional[int] = None,
-        super_sampling: Optional[bool] = None,
-    ) -> bytes:
-        """Send text to TTS API and return WAV audio bytes."""
+    async def _probe_loop(self):
+        """Probe every server periodically so ejected ones come back when they recover."""
+        while True:
+            await asyncio.sleep(self.config.health_interval or 5.0)
+            if self.config.health_interval > 0 and len(self.pool) > 1:
+                await self._probe_all()
+
+    def build_payload(self, text: str, **overrides) -> dict:
+        """Request body for ``/tts``: config values with non-None ``overrides`` applied.
+
+        Override keys are the TTSConfig generation fields (``top_k``,
+        ``text_split_method``, ``seed``, ...).
+        """
+        unknown = set(overrides) - set(PAYLOAD_FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown TTS parameters: {', '.join(sorted(unknown))}")
         cfg = self.config
-        payload = {
-            "text": text,
-            "text_lang": text_lang or cfg.text_lang,
-            "ref_audio_path": ref_audio_path or cfg.ref_audio_path,
-            "prompt_text": prompt_text if prompt_text is not None else cfg.prompt_text,
-            "prompt_lang": prompt_lang or cfg.prompt_lang,
-            "top_k": top_k if top_k is not None else cfg.top_k,
-            "top_p": top_p if top_p is not None else cfg.top_p,
-            "temperature": temperature if temperature is not None else cfg.temperature,
-            "speed_factor": speed_factor if speed_factor is not None else cfg.speed_factor,
-            "text_split_method": text_split_method or cfg.text_split_method,
-            "batch_size": batch_size if batch_size is not None else cfg.batch_size,
-            "seed": seed if seed is not None else cfg.seed,
-            "media_type": media_type or cfg.media_type,
-            "streaming_mode": streaming_mode if streaming_mode is not None else cfg.streaming_mode,
-            "repetition_penalty": repetition_penalty if repetition_penalty is not None else cfg.repetition_penalty,
-            "sample_steps": sample_steps if sample_steps is not None else cfg.sample_steps,
-            "super_sampling": super_sampling if super_sampling is not None else cfg.super_sampling,
-        }
-
-        r = self._client.post(self.base_url + "/tts", json=payload)
-        r.raise_for_status()
+        payload = {"text": text}
+        for name in PAYLOAD_FIELDS:
+            value = overrides.get(name)
+            if value is None or (value == "" and name in _EMPTY_MEANS_DEFAULT):
+                value = getattr(cfg, name)
+            payload[name] = value
+        return payload
+
+    def synthesize(self, text: str, **overrides) -> bytes:
+        """Send text to TTS API and return WAV audio bytes."""
+        return self._run(self._post(self.build_payload(text, **overrides))).result()
+
+    async def _post(self, payload: dict) -> bytes:
+        primary = self._require_backend(payload)
+        if self.config.hedge_delay_ms <= 0 or len(self.pool) < 2:
+            return await self._post_to(primary, payload)
+        pending = {asyncio.ensure_future(self._post_to(primary, payload))}
+        hedged = False
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=None if hedged else self.config.hedge_delay_ms / 1000,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not hedged:
+                    hedged = True
+                    backup = self._pick(payload, exclude=(primary,))
+                    if backup is not None:
+                        self.pool.hedges += 1
+                        pending.add(asyncio.ensure_future(self._post_to(backup, payload)))
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _post_to(self, backend: Backend, payload: dict) -> bytes:
+        self.pool.acquire(backend)
+        started = time.monotonic()
+        try:
+            await self._ensure_weights(backend)
+            r = await self._client.post(backend.url + "/tts", json=payload)
+            r.raise_for_status()
+        except Exception as e:
+            self.pool.record_error(backend, e)
+            raise
+        finally:
+            self.pool.release(backend)
+        self.pool.record_success(backend, time.monotonic() - started)
         return r.content
 
-    def set_gpt_weights(self, weights_path: str) -> bool:
+    def synthesize_stream(self, text: str, cancel: Optional[CancelToken] = None,
+                          **overrides) -> Iterator[bytes]:
+        """Synthesize with ``streaming_mode`` and yield WAV bytes as the server sends them.
+
+        The first bytes are a WAV header (with a placeholder size) and the
+        rest is PCM for each segment as soon as it is generated; decode with
+        :class:`app.common.wav_stream.WavStreamDecoder`. Closing the
+        generator early closes the connection.
+        """
+        return self._iterate(self._stream(self._stream_payload(text, **overrides)), cancel)
+
+    def _stream_payload(self, text: str, **overrides) -> dict:
+        payload = self.build_payload(text, **overrides)
+        payload["streaming_mode"] = True
+        payload["media_type"] = "wav"
+        return payload
+
+    async def _stream(self, payload: dict) -> AsyncIterator[bytes]:
+        backend = self._require_backend(payload)
+        self.pool.acquire(backend)
+        started = time.monotonic()
         try:
-            r = self._client.get(
-                self.base_url + "/set_gpt_weights",
-                params={"weights_path": weights_path},
-            )
-            return r.status_code == 200
-        except httpx.HTTPError:
-            return False
+            await self._ensure_weights(backend)
+            async with self._client.stream("POST", backend.url + "/tts", json=payload) as r:
+                r.raise_for_status()
+                self.pool.record_success(backend, time.monotonic() - started)
+                async for chunk in r.aiter_bytes():
+                    yield chunk
+        except Exception as e:
+            self.pool.record_error(backend, e)
+            raise
+        finally:
+            self.pool.release(backend)
 
-    def set_sovits_weights(self, weights_path: str) -> bool:
+    def _cache_key(self, payload: dict) -> Optional[str]:
+        if self.cache is None or not is_cacheable(payload):
+            return None
+        return cache_key(payload, self.base_url, self.weights)
+
+    def submit(self, text: str, cancel: Optional[CancelToken] = None, **overrides) -> Future:
+        """Start synthesis and return a Future of decoded ``(samples, sample_rate)``."""
+        future = self._run(self._synthesize_pcm(self.build_payload(text, **overrides)))
+        if cancel is not None:
+            cancel.on_cancel(future.cancel)
+        return future
+
+    async def _synthesize_pcm(self, payload: dict) -> Tuple[np.ndarray, int]:
+        key = self._cache_key(payload)
+        if key:
+            # The disk tier reads files, so only the memory tier is checked on the loop
+            cached = self.cache.get_memory(key) or await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                return cached
+        wav_data = await self._post(payload)
+        # Decoding (and writing the disk cache) stays off the loop
+        return await asyncio.to_thread(self._decode, wav_data, key)
+
+    def _decode(self, wav_data: bytes, key: Optional[str]) -> Tuple[np.ndarray, int]:
+        samples, rate = sf.read(io.BytesIO(wav_data), dtype="float32")
+        if key:
+            self.cache.put(key, samples, rate)
+        return samples, rate
+
+    def synthesize_pcm(self, text: str, cancel: Optional[CancelToken] = None,
+                       **overrides) -> Tuple[np.ndarray, int]:
+        """Like :meth:`synthesize` but returns decoded ``(samples, sample_rate)``."""
+        return self.submit(text, cancel, **overrides).result()
+
+    def stream_pcm(self, text: str, cancel: Optional[CancelToken] = None,
+                   **overrides) -> Iterator[Tuple[np.ndarray, int]]:
+        """Decoded ``(samples, sample_rate)`` chunks of :meth:`synthesize_stream`.
+
+        A cached result is yielded as one chunk; otherwise the chunks are
+        stored once the stream has completed, never after a cancel.
+        """
+        payload = self._stream_payload(text, **overrides)
+        key = self._cache_key(payload)
+        # Runs on the caller's thread, so the disk tier can be read directly
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            yield cached
+            return
+        decoder = WavStreamDecoder()
+        received = []
+        for samples, rate in decoder.frames(self._iterate(self._stream(payload), cancel)):
+            if key:
+                received.append(samples)
+            yield samples, rate
+        if key and received:
+            self.cache.put(key, np.concatenate(received), decoder.sample_rate)
+
+    def synthesize_pipelined(self, segments: Iterable[str], concurrency: int = 2,
+                             cancel: Optional[CancelToken] = None, **overrides) -> Iterator[Tuple[np.ndarray, int]]:
+        """Synthesize segments as separate requests and yield their audio in order.
+
+        At most ``concurrency`` requests are in flight, and the next one is
+        issued as soon as a result is handed out, so later segments are
+        generated while earlier ones play.
+        """
+        segments = iter(segments)
+        concurrency = max(1, concurrency)
+        pending = deque(
+            self.submit(segment, cancel, **overrides)
+            for _, segment in zip(range(concurrency), segments)
+        )
         try:
-            r = self._client.get(
-                self.base_url + "/set_sovits_weights",
+            while pending:
+                audio = pending.popleft().result()
+                segment = next(segments, None)
+                if segment is not None:
+                    pending.append(self.submit(segment, cancel, **overrides))
+                yield audio
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def request_stop(self) -> Optional[Future]:
+        """Ask the server to stop generating, if ``stop_endpoint`` is configured.
+
+        The stock GPT-SoVITS api_v2 has no such endpoint (its ``/control``
+        restarts or exits the whole server), so this is off by default and
+        cancelling relies on closing the connection. Fire-and-forget: the
+        Future resolves to whether the server accepted the request.
+        """
+        if not self.config.stop_endpoint:
+            return None
+        return self._run(self._request_stop())
+
+    async def _request_stop(self) -> bool:
+        path = "/" + self.config.stop_endpoint.lstrip("/")
+        results = await asyncio.gather(
+            *(self._client.get(b.url + path) for b in self.pool.backends), return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"TTS stop request failed: {result}")
+        return any(getattr(r, "status_code", None) == 200 for r in results)
+
+    async def _load_weights(self, backend: Backend, kind: str, weights_path: str) -> bool:
+        try:
+            r = await self._client.get(
+                backend.url + f"/set_{kind}_weights",
                 params={"weights_path": weights_path},
             )
-            return r.status_code == 200
-        except httpx.HTTPError:
+        except httpx.HTTPError as e:
+            self.pool.record_error(backend, e)
             return False
+        if r.status_code == 200:
+            backend.weights[kind] = weights_path
+        return r.status_code == 200
+
+    async def _load_weights_everywhere(self, kind: str, weights_path: str) -> list:
+        return await asyncio.gather(*(self._load_weights(b, kind, weights_path) for b in self.pool.backends))
+
+    async def _ensure_weights(self, backend: Backend) -> None:
+        """Load the current weights on a server that missed a switch (e.g. was down)."""
+        for kind, weights_path in self.weights.items():
+            if weights_path and backend.weights[kind] != weights_path:
+                if not await self._load_weights(backend, kind, weights_path):
+                    raise httpx.RequestError(f"{backend.url} could not load {kind} weights {weights_path}")
+
+    def _set_weights(self, kind: str, weights_path: str) -> bool:
+        """Load weights on every server; True if at least one accepted them.
+
+        GPT-SoVITS weights are global to a server, so all of them switch
+        together; a server that fails catches up before its next request.
+        """
+        self.pool.set_urls(self._urls())
+        loaded = self._run(self._load_weights_everywhere(kind, weights_path)).result()
+        if any(loaded):
+            self.weights[kind] = weights_path
+        return any(loaded)
+
+    def set_gpt_weights(self, weights_path: str) -> bool:
+        return self._set_weights("gpt", weights_path)
+
+    def set_sovits_weights(self, weights_path: str) -> bool:
+        return self._set_weights("sovits", weights_path)
 
     def close(self):
-        self._client.close()
+        if self._loop.is_closed():
+            return
+        self._probe.cancel()
+        self._run(self._client.aclose()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -0,0 +1,166 @@
+"""Bounded priority queue of pending TTS requests."""
+
+from __future__ import annotations
+
+import itertools
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from app.common.cancel import CancelToken
+
+PRIORITY_MANUAL = 0  # Generate button: served first
+PRIORITY_ASR = 1     # automatic speech of ASR finals
+
+DROP_FULL = "full"        # evicted (or refused) because the queue was full
+DROP_EXPIRED = "expired"  # waited longer than max_age before synthesis started
+DROP_CLOSED = "closed"    # still queued at shutdown
+DROP_CANCELLED = "cancelled"  # removed by cancel_pending (Stop)
+
+# Outcome of TTSRequestQueue.put
+PUT_QUEUED = "queued"    # waiting for synthesis as its own job
+PUT_MERGED = "merged"    # text appended to a job already queued
+PUT_REFUSED = "refused"  # not queued (full or closed); reported through on_drop
+
+_SENTENCE_END = set("。！？!?.…；;，,、")
+_sequence = itertools.count()
+
+
+@dataclass(eq=False)
+class TTSJob:
+    """One utterance for TTSWorker: the text plus how to synthesize it."""
+
+    text: str
+    params: dict = field(default_factory=dict)
+    priority: int = PRIORITY_MANUAL
+    streaming: bool = False                 # one streamed request
+    split_method: Optional[str] = None      # set: one request per segment, played in order
+    concurrency: int = 2                    # segment requests in flight
+    submitted_at: float = field(default_factory=time.monotonic)
+    expires_at: float = math.inf            # set by the queue from max_age
+    seq: int = field(default_factory=lambda: next(_sequence))
+    cancel: CancelToken = field(default_factory=CancelToken)  # aborts its requests and playback
+
+
+def _join(a: str, b: str) -> str:
+    """Join two finals so the TTS still pauses between them."""
+    if a[-1] in _SENTENCE_END:
+        return f"{a} {b}" if a[-1].isascii() and b[0].isascii() else a + b
+    return f"{a}, {b}" if a[-1].isascii() and b[0].isascii() else f"{a}，{b}"
+
+
+class TTSRequestQueue:
+    """Requests waiting for synthesis, highest priority first, FIFO within a priority.
+
+    * At most ``maxsize`` jobs wait. A new job evicts the oldest job of the
+      lowest priority present, or is refused if everything queued is more
+      important than it.
+    * A job not started within ``max_age`` seconds of submission is
+      dropped, so stale speech is never played late.
+    * An ASR job is merged into the previous queued ASR job with the same
+      parameters while the combined text stays within ``coalesce_chars``,
+      so bursts of short finals become one request.
+
+    Dropped jobs are reported through ``on_drop(job, reason)``, called
+    outside the lock from the thread that caused the drop.
+    """
+
+    def __init__(self, maxsize: int = 8, max_age: float = 20.0, coalesce_chars: int = 40,
+                 on_drop: Optional[Callable[[TTSJob, str], None]] = None):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self.coalesce_chars = coalesce_chars
+        self.on_drop = on_drop
+        self._jobs: List[TTSJob] = []  # arrival order
+        self._cond = threading.Condition()
+        self._closed = False
+        self.coalesced = 0
+        self.dropped = {DROP_FULL: 0, DROP_EXPIRED: 0, DROP_CLOSED: 0, DROP_CANCELLED: 0}
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._jobs)
+
+    def _report(self, dropped: List[TTSJob], reason: str) -> None:
+        self.dropped[reason] += len(dropped)
+        if self.on_drop:
+            for job in dropped:
+                self.on_drop(job, reason)
+
+    def _coalesce(self, job: TTSJob) -> bool:
+        if job.priority != PRIORITY_ASR or not self._jobs:
+            return False
+        last = self._jobs[-1]
+        if (last.priority != PRIORITY_ASR or last.params != job.params
+                or len(last.text) + len(job.text) > self.coalesce_chars):
+            return False
+        last.text = _join(last.text, job.text)
+        # The merged text must not wait longer than its oldest part may
+        last.expires_at = min(last.expires_at, job.expires_at)
+        self.coalesced += 1
+        return True
+
+    def put(self, job: TTSJob) -> str:
+        """Queue ``job``; returns PUT_QUEUED, PUT_MERGED or PUT_REFUSED."""
+        dropped: List[TTSJob] = []
+        with self._cond:
+            job.expires_at = job.submitted_at + self.max_age
+            closed = self._closed
+            if closed:
+                dropped.append(job)
+            elif self._coalesce(job):
+                return PUT_MERGED
+            else:
+                if len(self._jobs) >= self.maxsize:
+                    victim = min(self._jobs, key=lambda j: (-j.priority, j.seq))
+                    if victim.priority < job.priority:
+                        victim = job  # everything queued matters more
+                    else:
+                        self._jobs.remove(victim)
+                    dropped.append(victim)
+                if job not in dropped:
+                    self._jobs.append(job)
+                    self._cond.notify()
+        self._report(dropped, DROP_CLOSED if closed else DROP_FULL)
+        return PUT_REFUSED if job in dropped else PUT_QUEUED
+
+    def get(self, timeout: Optional[float] = None) -> Optional[TTSJob]:
+        """Next job to synthesize; None once closed (or after ``timeout``)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        expired: List[TTSJob] = []
+        try:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    expired += [j for j in self._jobs if j.expires_at <= now]
+                    self._jobs = [j for j in self._jobs if j.expires_at > now]
+                    if self._jobs:
+                        job = min(self._jobs, key=lambda j: (j.priority, j.seq))
+                        self._jobs.remove(job)
+                        return job
+                    if self._closed:
+                        return None
+                    remaining = None if deadline is None else deadline - now
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+        finally:
+            self._report(expired, DROP_EXPIRED)
+
+    def cancel_pending(self) -> None:
+        """Drop every waiting job, cancelling its token."""
+        with self._cond:
+            jobs, self._jobs = self._jobs, []
+        for job in jobs:
+            job.cancel.cancel()
+        self._report(jobs, DROP_CANCELLED)
+
+    def close(self) -> None:
+        """Wake ``get`` callers with None and drop what is still queued."""
+        with self._cond:
+            self._closed = True
+            remaining, self._jobs = self._jobs, []
+            self._cond.notify_all()
+        self._report(remaining, DROP_CLOSED)
@@ -0,0 +1,70 @@
+"""Lightweight voice-activity detection used to gate the recognizer."""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+class EnergyVAD:
+    """Vectorized energy + zero-crossing-rate speech detector.
+
+    Each block is split into 10 ms frames. A frame counts as speech when
+    its level exceeds both ``threshold_db`` and the tracked noise floor by
+    ``margin_db`` and its zero-crossing rate is below ``max_zcr`` (loud
+    frames are accepted regardless of ZCR so fricatives are not cut).
+    Once speech is seen the gate stays open for ``hangover_ms``.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        threshold_db: float = -45.0,
+        hangover_ms: int = 600,
+        margin_db: float = 10.0,
+        max_zcr: float = 0.5,
+    ):
+        self.sample_rate = sample_rate
+        self.threshold_db = threshold_db
+        self.hangover_ms = hangover_ms
+        self.margin_db = margin_db
+        self.max_zcr = max_zcr
+        self._frame_len = max(1, sample_rate // 100)
+        self._noise_db = threshold_db - margin_db
+        self._hangover_left = 0.0  # ms of hangover remaining
+        self.is_open = False
+
+    def reset(self) -> None:
+        self._hangover_left = 0.0
+        self.is_open = False
+
+    def frame_decisions(self, block: np.ndarray) -> np.ndarray:
+        """Return a boolean speech decision for every full 10 ms frame."""
+        n_frames = len(block) // self._frame_len
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+        frames = block[:n_frames * self._frame_len].reshape(n_frames, self._frame_len)
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self._frame_len
+
+        floor = max(self.threshold_db, self._noise_db + self.margin_db)
+        speech = (energy_db > floor) & ((zcr < self.max_zcr) | (energy_db > floor + self.margin_db))
+
+        # Track the noise floor slowly from non-speech frames
+        quiet = energy_db[~speech]
+        if quiet.size:
+            self._noise_db = 0.95 * self._noise_db + 0.05 * float(quiet.mean())
+        return speech
+
+    def process(self, block: np.ndarray) -> bool:
+        """Update the gate with one block; True while speech (or hangover) is active."""
+        block_ms = 1000.0 * len(block) / self.sample_rate
+        if self.frame_decisions(block).any():
+            self._hangover_left = float(self.hangover_ms)
+            self.is_open = True
+        elif self._hangover_left > 0:
+            self._hangover_left -= block_ms
+            self.is_open = self._hangover_left > 0
+        else:
+            self.is_open = False
+        return self.is_open
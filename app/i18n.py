@@ -42,6 +42,11 @@ _translations: dict[str, dict[str, str]] = {
     "asr.standby": {"en": "Standby", "ja": "待機", "zh": "待机"},
     "asr.recording": {"en": "Recording", "ja": "録音中", "zh": "录音中"},
     "asr.waiting": {"en": "Waiting for voice input...", "ja": "音声入力を待機中...", "zh": "等待语音输入..."},
+    "asr.loading": {
+        "en": "Loading speech model... {percent}%",
+        "ja": "音声モデルを読み込み中... {percent}%",
+        "zh": "正在加载语音模型... {percent}%",
+    },
 
     # --- Settings page ---
     "settings.asr_group": {"en": "Speech Recognition (ASR)", "ja": "音声認識 (ASR)", "zh": "语音识别 (ASR)"},
@@ -66,6 +71,7 @@ _translations: dict[str, dict[str, str]] = {
     "voice_mode.push_to_talk": {"en": "Push to Talk", "ja": "押して話す", "zh": "按住说话"},
     "voice_mode.toggle": {"en": "Toggle", "ja": "トグル", "zh": "按键切换"},
     "voice_mode.open_mic": {"en": "Open Mic", "ja": "常時オン", "zh": "持续开启"},
+    "voice_mode.wake_word": {"en": "Wake Word", "ja": "ウェイクワード", "zh": "唤醒词"},
     "settings.hotkey": {"en": "Hotkey", "ja": "ホットキー", "zh": "热键"},
     "settings.hotkey_desc": {
         "en": "Key to trigger speech recognition (click capture then press desired key)",
@@ -8,12 +8,19 @@ class SignalBus(QObject):
     asr_text_recognized = pyqtSignal(str)       # partial/final recognized text
     asr_final_result = pyqtSignal(str)           # final ASR result
     asr_state_changed = pyqtSignal(bool)         # recording started/stopped
+    asr_loading_progress = pyqtSignal(int, str)  # percent, phase name
+    asr_ready = pyqtSignal(bool)                 # model loaded (or failed)
+    asr_metrics = pyqtSignal(dict)               # per-stage timing histograms
+    asr_wake_word = pyqtSignal(str)              # keyword that started a recording
 
     # TTS signals
     tts_started = pyqtSignal()
     tts_finished = pyqtSignal()
     tts_error = pyqtSignal(str)
     tts_audio_ready = pyqtSignal(bytes)          # WAV audio data
+    tts_first_audio = pyqtSignal(float)          # ms from request to first sound (streaming)
+    tts_cache_stats = pyqtSignal(dict)           # TTSCache.stats(): hit ratio and tier sizes
+    tts_cancelled = pyqtSignal(float)            # ms from Stop until playback is silent
 
     # Playback signals
     playback_started = pyqtSignal()
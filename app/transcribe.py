@@ -0,0 +1,159 @@
+"""Batch offline transcription of WAV files.
+
+Decodes files with the same model resolution as the live ASR engine,
+spread over a process pool (one recognizer per worker process), and
+writes one JSON line per file with timings.
+
+Usage::
+
+    python -m app.transcribe PATH_OR_GLOB [...] [--jobs 4] [--batch 8]
+                             [--threads 1] [--language zh] [--output results.jsonl]
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+import soundfile as sf
+
+from app.common.dsp import resample
+from app.config import AppConfig
+from app.core.asr_engine import ASREngine
+
+# Recognizer owned by each worker process (set by _init_worker)
+_engine: Optional[ASREngine] = None
+
+
+def collect_files(patterns: Iterable[str]) -> List[Path]:
+    """Expand directories (recursively) and glob patterns into sorted WAV paths."""
+    files = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            files.update(p for p in path.rglob("*") if p.suffix.lower() == ".wav")
+        elif path.is_file():
+            files.add(path)
+        else:
+            files.update(Path(p) for p in glob.glob(pattern, recursive=True))
+    return sorted(files)
+
+
+def _init_worker(model_dir: str, language: str, sample_rate: int, num_threads: int, provider: str) -> None:
+    global _engine
+    _engine = ASREngine(
+        model_dir=model_dir,
+        language=language,
+        sample_rate=sample_rate,
+        num_threads=num_threads,
+        provider=provider,
+    )
+    if not _engine.initialize():
+        raise RuntimeError("ASR model not found, see models/README.md")
+
+
+def _transcribe_batch(paths: Sequence[str]) -> List[dict]:
+    """Worker entry point: load, resample and batch-decode a group of files."""
+    engine = _engine
+    t0 = time.perf_counter()
+    waveforms, durations, errors = [], [], {}
+    for path in paths:
+        try:
+            data, rate = sf.read(path, dtype="float32")
+            if data.ndim == 2:
+                data = data.mean(axis=1)
+            waveforms.append(resample(data, rate, engine.sample_rate))
+            durations.append(len(data) / rate)
+        except Exception as e:  # unreadable file: report it, keep the batch going
+            errors[path] = str(e)
+    load_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    texts = iter(engine.decode_batch(waveforms))
+    decode_seconds = time.perf_counter() - t0
+    batch_audio = sum(durations)
+
+    results = []
+    it_durations = iter(durations)
+    for path in paths:
+        if path in errors:
+            results.append({"file": path, "error": errors[path]})
+            continue
+        duration = next(it_durations)
+        results.append({
+            "file": path,
+            "text": next(texts),
+            "duration": round(duration, 3),
+            "batch_size": len(waveforms),
+            "batch_load_seconds": round(load_seconds, 4),
+            "batch_decode_seconds": round(decode_seconds, 4),
+            "rtf": round(decode_seconds / batch_audio, 4) if batch_audio else None,
+            "pid": os.getpid(),
+            "model": engine.model.name if engine.model else None,
+        })
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Batch transcribe WAV files to JSONL")
+    parser.add_argument("inputs", nargs="+", help="WAV files, directories or glob patterns")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (each loads its own recognizer)")
+    parser.add_argument("--batch", type=int, default=8, help="files per decode_streams batch")
+    parser.add_argument("--threads", type=int, default=1, help="onnxruntime threads per worker")
+    parser.add_argument("--language", help="default: asr.language from config.json")
+    parser.add_argument("--model-dir", help="default: asr.model_dir from config.json")
+    parser.add_argument("--output", help="JSONL output path (default: stdout)")
+    args = parser.parse_args(argv)
+    config = AppConfig.load(create=False)  # a command-line tool must not write config.json
+    args.language = args.language or config.asr.language
+    args.model_dir = args.model_dir or config.asr.model_dir
+
+    files = [str(p) for p in collect_files(args.inputs)]
+    if not files:
+        print("No WAV files found", file=sys.stderr)
+        return 1
+    batches = [files[i:i + args.batch] for i in range(0, len(files), args.batch)]
+    jobs = max(1, min(args.jobs, len(batches)))
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    total_audio = 0.0
+    failures = 0
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(args.model_dir, args.language, config.asr.sample_rate, args.threads, config.asr.provider),
+        ) as pool:
+            futures = [pool.submit(_transcribe_batch, batch) for batch in batches]
+            for future in as_completed(futures):
+                for record in future.result():
+                    total_audio += record.get("duration", 0.0)
+                    failures += "error" in record
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    wall = time.perf_counter() - start
+    cores = jobs * args.threads
+    print(
+        f"{len(files)} files ({failures} failed), {total_audio:.1f}s audio in {wall:.1f}s "
+        f"with {jobs} workers x {args.threads} threads: "
+        f"{total_audio / wall:.1f}x real time, {total_audio / wall / cores:.2f}x per core",
+        file=sys.stderr,
+    )
+    return 0 if failures == 0 else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -63,6 +63,8 @@ class ASRControlCard(CardWidget):
             self.progress_ring.hide()
 
     def set_text(self, text: str):
+        if text and text == self.text_label.text():
+            return
         self.text_label.setText(text if text else t("asr.waiting"))
         if not text:
             self.text_label.setStyleSheet("color: gray;")
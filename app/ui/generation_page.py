@@ -214,8 +214,7 @@ class GenerationPage(ScrollArea):
         tts.super_sampling = self.super_sampling_switch.isChecked()
 
     def set_busy(self, busy: bool):
-        """Toggle busy state UI."""
-        self.generate_btn.setEnabled(not busy)
+        """Toggle busy state UI (Generate stays enabled: requests are queued)."""
         self.stop_btn.setEnabled(busy)
         if busy:
             self.status_ring.show()
@@ -114,6 +114,10 @@ class MainWindow(MSFluentWindow):
         signal_bus.asr_text_recognized.connect(self.generation_page.asr_card.set_text)
         signal_bus.asr_final_result.connect(self._on_asr_final)
         signal_bus.asr_state_changed.connect(self.generation_page.asr_card.set_recording)
+        signal_bus.asr_loading_progress.connect(
+            lambda percent, _phase: self.generation_page.asr_card.set_text(t("asr.loading", percent=percent))
+        )
+        signal_bus.asr_ready.connect(lambda _ok: self.generation_page.asr_card.set_text(""))
         signal_bus.playback_finished.connect(
             lambda: self._show_info(t("msg.playback_finished"))
         )
@@ -140,7 +144,7 @@ class MainWindow(MSFluentWindow):
                 t("msg.no_ref_audio_desc"),
             )
 
-        # Initialize ASR if enabled
+        # Initialize ASR if enabled (model loads on a background thread)
         if self.config.asr.enabled:
             if not self.pipeline.asr_engine.is_model_available():
                 self._show_warning(
@@ -174,7 +178,7 @@ class MainWindow(MSFluentWindow):
         self.pipeline.synthesize(text, **params)
 
     def _on_stop(self):
-        self.pipeline.audio_player.stop()
+        self.pipeline.stop_tts()
         self.generation_page.set_busy(False)
 
     def _on_asr_final(self, text: str):
@@ -67,7 +67,7 @@ class SettingsPage(ScrollArea):
             t("settings.voice_mode_desc"),
             self.asr_group,
         )
-        self._voice_modes = ["push_to_talk", "toggle", "open_mic"]
+        self._voice_modes = ["push_to_talk", "toggle", "open_mic", "wake_word"]
         self.voice_mode_combo = ComboBox()
         for mode in self._voice_modes:
             self.voice_mode_combo.addItem(t(f"voice_mode.{mode}"), userData=mode)
@@ -0,0 +1,60 @@
+"""Micro-benchmark: ways of handing a float32 chunk to sherpa-onnx.
+
+Usage::
+
+    python -m benchmarks.bench_accept_waveform [--rate 16000] [--iterations 2000]
+
+sherpa-onnx binds waveforms as ``std::vector<float>``, so the cost that
+matters is the pybind11 conversion. It is measured through
+``CircularBuffer.push`` (same binding, no model needed) and, when an ASR
+model is available under ``models/``, through ``OnlineStream.accept_waveform``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+
+import numpy as np
+import sherpa_onnx
+
+
+def _report(label: str, seconds: float, iterations: int) -> None:
+    print(f"{label:<48} {seconds / iterations * 1e6:9.2f} us/chunk")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=int, default=16000, help="chunk sample rate")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    chunk = np.random.default_rng(0).standard_normal(args.rate // 10).astype(np.float32)
+    n = args.iterations
+    inputs = {
+        "tolist()": lambda: chunk.tolist(),
+        "ndarray": lambda: chunk,
+        "memoryview (ASREngine path)": lambda: memoryview(chunk),
+    }
+
+    print(f"100 ms chunk = {len(chunk)} samples, {n} iterations")
+    for label, make in inputs.items():
+        buf = sherpa_onnx.CircularBuffer(len(chunk) * (n + 1))
+        _report(f"CircularBuffer.push({label})",
+                timeit.timeit(lambda: buf.push(make()), number=n), n)
+
+    from app.core.asr_engine import ASREngine
+
+    engine = ASREngine(sample_rate=args.rate)
+    if not engine.initialize():
+        print("No ASR model found; skipping OnlineStream.accept_waveform timings")
+        return
+    for label, make in inputs.items():
+        stream = engine._recognizer.create_stream()
+        _report(f"accept_waveform({label})",
+                timeit.timeit(lambda: stream.accept_waveform(args.rate, make()), number=n), n)
+    engine.shutdown()
+
+
+if __name__ == "__main__":
+    main()
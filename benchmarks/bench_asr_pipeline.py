@@ -0,0 +1,79 @@
+"""Benchmark: replay WAV files through the production ASR capture path.
+
+Usage::
+
+    python -m benchmarks.bench_asr_pipeline corpus/*.wav [--fast] [--chunk-ms 100]
+
+Each file is played into an ASRWorker through a WavFileSource, exactly as
+a push-to-talk utterance: recording starts with the file and the end of
+the file counts as the key release. The worker's ring buffer, resampler,
+engine stream and flush all run as in the app, with no microphone needed.
+Real-time pacing (default) measures latency as a user sees it; ``--fast``
+feeds audio as quickly as the worker consumes it and measures throughput.
+Needs an ASR model under ``models/``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.core.asr_engine import ASREngine
+from app.core.asr_metrics import ASRMetrics
+from app.core.asr_worker import ASRWorker
+from app.core.audio_sources import WavFileSource
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("wavs", nargs="+", help="speech recordings, one utterance each")
+    parser.add_argument("--fast", action="store_true", help="no real-time pacing")
+    parser.add_argument("--chunk-ms", type=int, default=100)
+    args = parser.parse_args()
+
+    engine = ASREngine()
+    if not engine.initialize():
+        print("No ASR model found, see models/README.md")
+        return 1
+    engine.warm_up()
+
+    metrics = ASRMetrics(window=100_000)
+    first_partial_ms = []
+    audio_seconds = 0.0
+    t_start = time.perf_counter()
+    for path in args.wavs:
+        source = WavFileSource(path, realtime=not args.fast)
+        audio_seconds += source.duration
+        worker = ASRWorker(engine, source=source, chunk_ms=args.chunk_ms, partial_max_rate_hz=0)
+        worker.metrics = metrics
+        finals, first = [], []
+        started = time.monotonic()
+        worker.text_partial.connect(
+            lambda text, stable_len: first or first.append((time.monotonic() - started) * 1000)
+        )
+        worker.text_final.connect(finals.append)
+        worker.start_recording()
+        worker.run()  # returns when the file has been played and flushed
+        worker.asr_stream.close()
+        first_partial_ms.extend(first)
+        print(f"{path}: {' '.join(finals)}")
+    wall = time.perf_counter() - t_start
+
+    snap = metrics.snapshot()
+    print()
+    print(f"files: {len(args.wavs)}, audio {audio_seconds:.1f} s, wall {wall:.1f} s, "
+          f"throughput {audio_seconds / wall:.1f}x real time")
+    print(f"chunk RTF       mean {snap['rtf']['mean']:.3f}  p95 {snap['rtf']['p95']:.3f}")
+    print(f"decode          mean {snap['decode_ms']['mean']:.1f} ms  p95 {snap['decode_ms']['p95']:.1f} ms")
+    print(f"partial latency mean {snap['capture_lag_ms']['mean']:.1f} ms  "
+          f"p95 {snap['capture_lag_ms']['p95']:.1f} ms (capture to decoded)")
+    print(f"final latency   mean {snap['endpoint_to_emit_ms']['mean']:.1f} ms  "
+          f"p95 {snap['endpoint_to_emit_ms']['p95']:.1f} ms (end of audio to final)")
+    if first_partial_ms:
+        print(f"first partial   mean {sum(first_partial_ms) / len(first_partial_ms):.0f} ms after start")
+    engine.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
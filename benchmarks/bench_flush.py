@@ -0,0 +1,75 @@
+"""Benchmark: end-of-utterance flush, fixed 0.8 s of zeros vs ``ASREngine.finish``.
+
+Usage::
+
+    python -m benchmarks.bench_flush speech.wav [--chunk-ms 100] [--paddings 0,0.3,0.66]
+
+Streams the recording chunk by chunk as the worker does, then times the
+step between key release and final text: the old path (0.8 s of zeros
+decoded without ``input_finished()``) and ``finish()`` with the model's
+default tail padding plus every padding in ``--paddings``. The final text
+of each is printed so a padding that clips the last word shows up.
+Needs an ASR model under ``models/``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.asr_autotune import load_reference
+from app.core.asr_engine import ASREngine
+
+
+def _feed(engine: ASREngine, audio: np.ndarray, chunk_ms: int) -> None:
+    chunk = max(1, engine.sample_rate * chunk_ms // 1000)
+    for start in range(0, len(audio), chunk):
+        engine.accept_waveform(audio[start:start + chunk])
+        engine.get_partial_result()
+
+
+def _legacy_flush(engine: ASREngine) -> str:
+    """What stop_recording did before the worker owned the flush."""
+    engine.accept_waveform(np.zeros(int(engine.sample_rate * 0.8), dtype=np.float32))
+    text = engine.get_partial_result()
+    engine.reset()
+    return text
+
+
+def _report(label: str, engine: ASREngine, audio: np.ndarray, chunk_ms: int, flush) -> None:
+    _feed(engine, audio, chunk_ms)
+    t0 = time.perf_counter()
+    text = flush()
+    print(f"{label:<28} {(time.perf_counter() - t0) * 1000:8.1f} ms  {text}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("wav", help="speech recording")
+    parser.add_argument("--chunk-ms", type=int, default=100)
+    parser.add_argument("--paddings", default="0,0.3,0.66",
+                        help="comma-separated tail paddings in seconds")
+    args = parser.parse_args()
+
+    engine = ASREngine()
+    if not engine.initialize():
+        print("No ASR model found, see models/README.md")
+        return 1
+    engine.warm_up()
+    audio = load_reference(args.wav, engine.sample_rate)
+    print(f"model: {engine.model.name} ({engine.model.model_type}), "
+          f"default tail padding {engine.tail_padding:.2f} s")
+
+    _report("0.8 s zeros (before)", engine, audio, args.chunk_ms, lambda: _legacy_flush(engine))
+    _report("finish() default", engine, audio, args.chunk_ms, engine.finish)
+    for value in args.paddings.split(","):
+        engine.tail_padding_seconds = float(value)
+        _report(f"finish() padding={float(value):.2f}s", engine, audio, args.chunk_ms, engine.finish)
+    engine.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,92 @@
+"""Benchmark: N sources on one recognizer, per-stream vs batched decoding.
+
+Usage::
+
+    python -m benchmarks.bench_multistream speech.wav [--streams 1,2,4,8] [--chunk-ms 100]
+
+Every source is fed the same recording chunk by chunk from its own thread,
+the way one ASRWorker per microphone would. Reports audio seconds decoded
+per wall-clock second for one ``decode_stream`` per source and for the
+engine's batched ``decode_streams`` scheduler, plus the peak RSS, which
+should stay flat as sources are added. Needs an ASR model under ``models/``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import resource
+import threading
+import time
+
+from app.asr_autotune import load_reference
+from app.core.asr_engine import ASREngine
+
+
+def _run_source(stream, audio, chunk: int) -> None:
+    for start in range(0, len(audio), chunk):
+        stream.accept_waveform(audio[start:start + chunk])
+        stream.get_partial_result()
+    stream.finish()
+
+
+def _run(engine: ASREngine, audio, n_streams: int, chunk: int, batched: bool) -> float:
+    streams = [engine.open_stream() for _ in range(n_streams)]
+    if not batched:
+        # Bypass the scheduler: every source decodes on its own
+        for s in streams:
+            s.engine = _InlineDecoder(engine)
+    threads = [threading.Thread(target=_run_source, args=(s, audio, chunk)) for s in streams]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    for s in streams:
+        engine.close_stream(s)
+    return n_streams * len(audio) / engine.sample_rate / elapsed
+
+
+class _InlineDecoder:
+    """Engine proxy that always decodes a stream by itself."""
+
+    def __init__(self, engine: ASREngine):
+        self._engine = engine
+
+    def __getattr__(self, name):
+        return getattr(self._engine, name)
+
+    @staticmethod
+    def decode(recognizer, stream) -> None:
+        while recognizer.is_ready(stream):
+            recognizer.decode_stream(stream)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("wav", help="speech recording")
+    parser.add_argument("--streams", default="1,2,4,8")
+    parser.add_argument("--chunk-ms", type=int, default=100)
+    args = parser.parse_args()
+
+    engine = ASREngine()
+    if not engine.initialize():
+        print("No ASR model found, see models/README.md")
+        return 1
+    engine.warm_up()
+    audio = load_reference(args.wav, engine.sample_rate)
+    chunk = engine.sample_rate * args.chunk_ms // 1000
+
+    print(f"{'streams':>7} {'separate x RT':>14} {'batched x RT':>13} {'peak RSS MB':>12}")
+    for n in (int(v) for v in args.streams.split(",")):
+        separate = _run(engine, audio, n, chunk, batched=False)
+        batched = _run(engine, audio, n, chunk, batched=True)
+        rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{n:>7} {separate:>14.1f} {batched:>13.1f} {rss_mb:>12.0f}")
+    print(f"mean batch size: {engine.batch_stats['mean_batch_size']:.2f}")
+    engine.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,56 @@
+"""Benchmark: legacy linear interpolation vs streaming polyphase resampler.
+
+Usage::
+
+    python -m benchmarks.bench_resampler [--iterations 500]
+
+Times one 100 ms block per call for the capture (44.1k/48k -> 16k) and
+playback (32k -> 48k) conversions used by the app.
+"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+
+import numpy as np
+
+from app.common.dsp import StreamingResampler
+
+CASES = [(44100, 16000), (48000, 16000), (32000, 48000)]
+
+
+def _linear(data: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """The per-call linear interpolation the app used before the shared resampler."""
+    ratio = dst_rate / src_rate
+    n_samples = int(len(data) * ratio)
+    indices = np.arange(n_samples) / ratio
+    indices_floor = np.floor(indices).astype(int)
+    indices_ceil = np.minimum(indices_floor + 1, len(data) - 1)
+    frac = indices - indices_floor
+    return data[indices_floor] * (1 - frac) + data[indices_ceil] * frac
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+    n = args.iterations
+
+    print(f"{'conversion':<16} {'linear':>12} {'polyphase':>12}")
+    for src, dst in CASES:
+        block = np.random.default_rng(0).standard_normal(src // 10).astype(np.float32)
+        rs = StreamingResampler(src, dst)
+        out = np.empty(rs.output_length(len(block)), dtype=np.float32)
+        rs.process(block)  # warm the table cache
+
+        linear = timeit.timeit(lambda: _linear(block, src, dst), number=n) / n
+        poly = timeit.timeit(
+            lambda: rs.process(block, out=out[:rs.output_length(len(block))]), number=n,
+        ) / n
+        label = f"{src / 1000:g}k -> {dst / 1000:g}k"
+        print(f"{label:<16} {linear * 1e6:9.1f} us {poly * 1e6:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
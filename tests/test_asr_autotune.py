@@ -0,0 +1,31 @@
+"""Tests for ASR autotune selection logic."""
+
+from app.asr_autotune import TrialResult, choose
+
+
+def _r(threads, chunk, rtf, latency):
+    return TrialResult(num_threads=threads, chunk_ms=chunk, rtf=rtf, partial_latency_ms=latency, text="")
+
+
+def test_choose_lowest_latency_meeting_target():
+    results = [
+        _r(1, 50, 0.6, 40.0),   # fastest partials but misses the target
+        _r(2, 50, 0.25, 45.0),
+        _r(4, 100, 0.1, 60.0),
+    ]
+    best = choose(results, rtf_target=0.3)
+    assert (best.num_threads, best.chunk_ms) == (2, 50)
+
+
+def test_choose_prefers_fewer_threads_on_tie():
+    results = [_r(4, 100, 0.1, 55.0), _r(2, 100, 0.2, 55.0)]
+    assert choose(results, rtf_target=0.3).num_threads == 2
+
+
+def test_choose_falls_back_to_fastest():
+    results = [_r(1, 100, 0.9, 60.0), _r(2, 100, 0.7, 58.0)]
+    assert choose(results, rtf_target=0.3).num_threads == 2
+
+
+def test_choose_empty():
+    assert choose([], rtf_target=0.3) is None
@@ -0,0 +1,232 @@
+"""Tests for the sherpa-onnx ASR engine wrapper."""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from app.core.asr_engine import ASREngine
+
+
+def test_accept_waveform_passes_memoryview_without_copy():
+    engine = ASREngine(sample_rate=16000)
+    stream = MagicMock()
+    engine._recognizer = MagicMock(**{"create_stream.return_value": stream})
+    chunk = np.zeros(1600, dtype=np.float32)
+
+    engine.accept_waveform(chunk)
+
+    args = stream.accept_waveform.call_args.args
+    assert args[0] == 16000
+    assert isinstance(args[1], memoryview)
+    assert args[1].obj is chunk
+
+
+def test_accept_waveform_converts_via_staging_buffer():
+    engine = ASREngine(sample_rate=16000)
+    stream = MagicMock()
+    engine._recognizer = MagicMock(**{"create_stream.return_value": stream})
+    chunk = np.ones(3200, dtype=np.float64)
+
+    engine.accept_waveform(chunk)
+    staged = np.asarray(stream.accept_waveform.call_args.args[1])
+    assert staged.dtype == np.float32
+    assert np.all(staged == 1.0)
+
+    # Second call of the same size reuses the same memory
+    engine.accept_waveform(chunk)
+    staged2 = np.asarray(stream.accept_waveform.call_args.args[1])
+    assert np.shares_memory(staged, staged2)
+
+
+def test_configure_reports_changes():
+    engine = ASREngine(num_threads=4)
+    assert engine.configure(num_threads=4) is False
+    assert engine.configure(num_threads=2, provider="cpu") is True
+    assert engine.num_threads == 2
+
+
+def test_configure_rejects_unknown_setting():
+    import pytest
+
+    engine = ASREngine()
+    with pytest.raises(ValueError):
+        engine.configure(beam_size=4)
+
+
+def test_warm_up_uses_throwaway_stream():
+    engine = ASREngine()
+    engine._recognizer = MagicMock()
+    engine._recognizer.is_ready.return_value = False
+
+    engine.warm_up(seconds=0.1)
+
+    engine._recognizer.create_stream.assert_called_once()
+    assert engine._default_stream is None
+    assert "warm_up" in engine.startup_timings
+
+
+def test_initialize_builds_recognizer_for_model_type(tmp_path):
+    from unittest.mock import patch
+
+    d = tmp_path / "streaming-zipformer-en"
+    d.mkdir()
+    for f in ["encoder.int8.onnx", "decoder.int8.onnx", "joiner.int8.onnx", "tokens.txt"]:
+        (d / f).write_bytes(b"x")
+
+    engine = ASREngine(model_dir=str(tmp_path), language="en")
+    with patch("app.core.asr_engine.sherpa_onnx.OnlineRecognizer") as mock_rec:
+        assert engine.initialize() is True
+        mock_rec.from_transducer.assert_called_once()
+        kwargs = mock_rec.from_transducer.call_args.kwargs
+        assert kwargs["joiner"].endswith("joiner.int8.onnx")
+    assert engine.model.model_type == "transducer"
+
+
+def _make_paraformer(root, name, size=10):
+    d = root / name
+    d.mkdir()
+    for f in ["encoder.onnx", "decoder.onnx", "tokens.txt"]:
+        (d / f).write_bytes(b"x" * size)
+    return d
+
+
+def test_language_switch_reuses_loaded_recognizer(tmp_path):
+    from unittest.mock import patch
+
+    _make_paraformer(tmp_path, "paraformer-zh")
+    _make_paraformer(tmp_path, "paraformer-ja")
+    engine = ASREngine(model_dir=str(tmp_path), language="zh")
+    with patch("app.core.asr_engine.sherpa_onnx.OnlineRecognizer") as mock_rec:
+        mock_rec.from_paraformer.side_effect = lambda **kw: MagicMock()
+        engine.initialize()
+        assert engine.set_language("ja") is True
+        assert not engine.is_loaded()
+        engine.initialize()
+        assert engine.set_language("zh") is True
+        assert engine.is_loaded()
+        engine.initialize()
+        # zh was reused from the pool: only two loads in total
+        assert mock_rec.from_paraformer.call_count == 2
+    assert engine.model.name == "paraformer-zh"
+
+
+def test_pool_evicts_lru_over_budget(tmp_path):
+    from unittest.mock import patch
+
+    mb = 1024 * 1024
+    for lang in ("zh", "ja", "ko"):
+        d = tmp_path / f"paraformer-{lang}"
+        d.mkdir()
+        for f in ["encoder.onnx", "decoder.onnx", "tokens.txt"]:
+            (d / f).write_bytes(b"")
+        # Sparse 1 MB encoder keeps the test fast while counting toward the budget
+        with open(d / "encoder.onnx", "wb") as fh:
+            fh.truncate(mb)
+
+    engine = ASREngine(model_dir=str(tmp_path), language="zh", memory_budget_mb=2)
+    with patch("app.core.asr_engine.sherpa_onnx.OnlineRecognizer") as mock_rec:
+        mock_rec.from_paraformer.side_effect = lambda **kw: MagicMock()
+        for lang in ("zh", "ja", "ko"):
+            engine.set_language(lang)
+            engine.initialize()
+    assert engine.loaded_models == ["paraformer-ja", "paraformer-ko"]
+
+
+def test_runtime_change_clears_pool(tmp_path):
+    from unittest.mock import patch
+
+    _make_paraformer(tmp_path, "paraformer-zh")
+    engine = ASREngine(model_dir=str(tmp_path), language="zh")
+    with patch("app.core.asr_engine.sherpa_onnx.OnlineRecognizer"):
+        engine.initialize()
+    assert engine.is_loaded()
+    engine.configure(num_threads=1)
+    assert not engine.is_loaded()
+
+
+def test_decode_batch_uses_decode_streams():
+    engine = ASREngine()
+    rec = engine._recognizer = MagicMock()
+    streams = [MagicMock(), MagicMock()]
+    rec.create_stream.side_effect = streams
+    ready_calls = {id(s): [True, False] for s in streams}
+    rec.is_ready.side_effect = lambda s: ready_calls[id(s)].pop(0) if ready_calls[id(s)] else False
+    rec.get_result.side_effect = lambda s: "a " if s is streams[0] else "b"
+
+    texts = engine.decode_batch([np.zeros(1600, dtype=np.float32)] * 2)
+
+    assert texts == ["a", "b"]
+    rec.decode_streams.assert_called_once_with(streams)
+    for s in streams:
+        s.input_finished.assert_called_once()
+
+
+def test_finish_pads_closes_and_replaces_stream():
+    engine = ASREngine(sample_rate=16000)
+    engine.model = MagicMock(model_type="transducer")
+    rec = engine._recognizer = MagicMock()
+    old, new = MagicMock(), MagicMock()
+    rec.create_stream.side_effect = [old, new]
+    rec.is_ready.side_effect = [True, False]
+    rec.get_result.return_value = " hello "
+
+    assert engine.finish() == "hello"
+
+    padding = old.accept_waveform.call_args.args[1]
+    assert len(padding) == int(16000 * 0.3)
+    old.input_finished.assert_called_once()
+    assert engine._default_stream._stream is new
+    assert engine._default_stream not in engine._streams
+
+
+def test_decode_batch_pads_with_engine_tail_padding():
+    engine = ASREngine(sample_rate=16000)
+    engine.model = MagicMock(model_type="transducer")
+    rec = engine._recognizer = MagicMock()
+    rec.is_ready.return_value = False
+
+    engine.decode_batch([np.zeros(1600, dtype=np.float32)])
+    padding = rec.create_stream.return_value.accept_waveform.call_args.args[1]
+    assert len(padding) == int(16000 * 0.3)
+
+    engine.decode_batch([np.zeros(1600, dtype=np.float32)], tail_padding=0.5)
+    padding = rec.create_stream.return_value.accept_waveform.call_args.args[1]
+    assert len(padding) == 8000
+
+
+def test_tail_padding_override():
+    engine = ASREngine()
+    engine.model = MagicMock(model_type="paraformer")
+    assert engine.tail_padding == 0.66
+    engine.tail_padding_seconds = 0.0
+    assert engine.tail_padding == 0.0
+
+
+def test_streams_share_recognizer_and_follow_model_switch():
+    engine = ASREngine()
+    engine._recognizer = first = MagicMock()
+    a, b = engine.open_stream(), engine.open_stream()
+    a.accept_waveform(np.zeros(160, dtype=np.float32))
+    b.accept_waveform(np.zeros(160, dtype=np.float32))
+    assert first.create_stream.call_count == 2
+    assert engine.stream_count == 2
+
+    engine._recognizer = second = MagicMock()
+    a.accept_waveform(np.zeros(160, dtype=np.float32))
+    second.create_stream.assert_called_once()
+
+    a.close()
+    b.close()
+    assert engine.stream_count == 0
+
+
+def test_single_stream_decodes_inline():
+    engine = ASREngine()
+    rec = engine._recognizer = MagicMock()
+    rec.is_ready.side_effect = [True, False]
+    rec.get_result.return_value = "hi"
+    stream = engine.open_stream()
+
+    assert stream.get_partial_result() == "hi"
+    rec.decode_stream.assert_called_once()
+    rec.decode_streams.assert_not_called()
@@ -0,0 +1,55 @@
+"""Tests for ASR timing histograms."""
+
+import json
+import time
+
+from app.core.asr_metrics import ASRMetrics, RollingHistogram
+
+
+def test_histogram_buckets_and_percentiles():
+    hist = RollingHistogram(window=4, bounds=(10, 100))
+    for value in (1, 5, 50, 500, 7):  # the first value rolls out of the window
+        hist.add(value)
+    assert hist.counts() == [2, 1, 1]
+    summary = hist.summary()
+    assert summary["count"] == 4
+    assert summary["last"] == 7
+    assert summary["max"] == 500
+    assert summary["p50"] == 50
+
+
+def test_chunk_records_rtf_and_lag():
+    metrics = ASRMetrics()
+    metrics.record_chunk(time.monotonic() - 0.05, 0.001, 0.009, audio_s=0.1, queue_depth_s=0.02)
+    snap = metrics.snapshot()
+    assert abs(snap["rtf"]["last"] - 0.1) < 1e-9
+    assert snap["decode_ms"]["last"] == 9.0
+    assert snap["queue_depth_ms"]["last"] == 20.0
+    assert snap["capture_lag_ms"]["last"] >= 50.0
+
+
+def test_utterance_written_as_json_line(tmp_path):
+    log = tmp_path / "asr_metrics.jsonl"
+    metrics = ASRMetrics(log_path=log)
+    metrics.record_chunk(time.monotonic(), 0.0, 0.02, audio_s=0.1, queue_depth_s=0.0)
+    metrics.record_utterance(time.monotonic() - 0.2, "hello")
+
+    record = json.loads(log.read_text(encoding="utf-8").splitlines()[0])
+    assert record["event"] == "asr_utterance"
+    assert record["chunks"] == 1
+    assert record["rtf"] == 0.2
+    assert record["endpoint_to_emit_ms"] >= 200
+
+
+def test_overload_reported_once():
+    metrics = ASRMetrics()
+    for _ in range(20):
+        metrics.record_chunk(time.monotonic(), 0.0, 0.2, audio_s=0.1, queue_depth_s=0.0)
+    assert "rtf" in metrics.check_overload()
+    assert metrics.check_overload() is None
+
+
+def test_counters_are_part_of_snapshot():
+    metrics = ASRMetrics()
+    metrics.counters["overflows"] = 3
+    assert metrics.snapshot()["counters"] == {"overflows": 3}
@@ -0,0 +1,203 @@
+"""Tests for ASR worker utterance finalization."""
+
+from concurrent.futures import Future
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from app.core.asr_worker import ASRWorker
+
+
+def _worker(second_pass=None, budget_ms=1500):
+    engine = MagicMock()
+    engine.open_stream.return_value.get_partial_result.return_value = "streaming text"
+    w = ASRWorker(engine, second_pass=second_pass, second_pass_budget_ms=budget_ms)
+    finals = []
+    w.text_final.connect(finals.append)
+    return w, finals
+
+
+def test_final_emitted_directly_without_second_pass():
+    w, finals = _worker()
+    w._finalize_utterance()
+    assert finals == ["streaming text"]
+    w.asr_stream.reset.assert_called_once()
+
+
+def test_second_pass_result_replaces_streaming_text():
+    future = Future()
+    second_pass = MagicMock()
+    second_pass.submit.return_value = future
+    w, finals = _worker(second_pass)
+    w._utterance_audio = [np.zeros(160, dtype=np.float32)]
+
+    w._finalize_utterance()
+    w._emit_pending_finals()
+    assert finals == []  # still refining, within budget
+
+    future.set_result("refined text")
+    w._emit_pending_finals()
+    assert finals == ["refined text"]
+    assert w.second_pass_stats == {"refined": 1, "missed_budget": 0}
+
+
+def test_second_pass_missing_budget_falls_back():
+    second_pass = MagicMock()
+    second_pass.submit.return_value = Future()
+    w, finals = _worker(second_pass, budget_ms=0)
+    w._utterance_audio = [np.zeros(160, dtype=np.float32)]
+
+    w._finalize_utterance()
+    w._emit_pending_finals()
+    assert finals == ["streaming text"]
+    assert w.second_pass_stats["missed_budget"] == 1
+
+
+def test_stop_command_flushes_on_worker_thread():
+    w, finals = _worker()
+    w.asr_stream.finish.return_value = "flushed text"
+    w._ring = MagicMock(available=0)
+    states = []
+    w.state_changed.connect(states.append)
+
+    w.start_recording()
+    w.stop_recording()
+    # Posting does not touch the engine; the run loop handles the commands
+    w.asr_stream.finish.assert_not_called()
+    w._drain_commands(np.empty(1600, dtype=np.float32), MagicMock(), MagicMock())
+
+    assert states == [True, False]
+    assert finals == ["flushed text"]
+    assert w.latency_stats["count"] == 1
+
+
+def test_stop_without_start_is_ignored():
+    w, finals = _worker()
+    w.stop_recording()
+    w._drain_commands(np.empty(1600, dtype=np.float32), MagicMock(), MagicMock())
+    w.asr_stream.finish.assert_not_called()
+    assert finals == []
+
+
+def test_wake_session_returns_to_listening_after_final():
+    w, finals = _worker()
+    states = []
+    w.state_changed.connect(states.append)
+    w._wake_session = True
+    w._recording = True
+
+    w._finalize_utterance()
+
+    assert finals == ["streaming text"]
+    assert states == [False]
+    assert not w.is_recording
+
+
+def test_run_replays_finite_source_to_final():
+    from app.core.audio_sources import SyntheticSource
+
+    source = SyntheticSource("noise", duration=0.5, sample_rate=16000, realtime=False)
+    engine = MagicMock(sample_rate=16000)
+    stream = engine.open_stream.return_value
+    stream.staging_buffer.side_effect = lambda n: np.empty(n, dtype=np.float32)
+    stream.get_partial_result.return_value = "partial"
+    stream.is_endpoint.return_value = False
+    stream.finish.return_value = "final text"
+    w = ASRWorker(engine, source=source)
+    finals = []
+    w.text_final.connect(finals.append)
+
+    w.start_recording()
+    w.run()  # returns once the source is exhausted
+
+    assert finals == ["final text"]
+    fed = sum(len(c.args[0]) for c in stream.accept_waveform.call_args_list)
+    assert fed == 8000
+
+
+def test_full_ring_counts_overflow_in_metrics():
+    from types import SimpleNamespace
+    from app.common.ring_buffer import RingBuffer
+
+    w, _ = _worker()
+    w._ring = RingBuffer(100)
+    status = SimpleNamespace(input_overflow=True, input_underflow=False)
+    w._audio_callback(np.zeros((80, 1), dtype=np.float32), 80, None, None)
+    w._audio_callback(np.zeros((80, 1), dtype=np.float32), 80, None, status)
+
+    assert (w.overflow_count, w.dropped_samples) == (1, 60)  # one driver overflow, 60 samples
+    counters = w.metrics_snapshot()["counters"]
+    assert (counters["overflows"], counters["dropped_samples"]) == (1, 60)
+
+
+def test_vad_gate_decodes_only_around_speech():
+    from app.core.audio_sources import _ThreadedSource
+
+    rate = 16000
+    t = np.arange(rate // 2) / rate
+    signal = np.concatenate([
+        np.zeros(rate // 2), 0.3 * np.sin(2 * np.pi * 300 * t), np.zeros(rate * 3 // 2),
+    ]).astype(np.float32)
+
+    class ArraySource(_ThreadedSource):
+        def _blocks(self, blocksize):
+            for i in range(0, len(signal), blocksize):
+                yield signal[i:i + blocksize]
+
+    engine = MagicMock(sample_rate=rate)
+    stream = engine.open_stream.return_value
+    stream.get_partial_result.return_value = "hello"
+    stream.is_endpoint.return_value = False
+    stream.finish.return_value = ""
+    w = ASRWorker(engine, vad_enabled=True, vad_hangover_ms=200,
+                  source=ArraySource(rate, realtime=False))
+    finals = []
+    w.text_final.connect(finals.append)
+
+    w.start_recording()
+    w.run()
+
+    # Speech opens the gate (with the block before onset), the hangover closes it
+    assert finals == ["hello"]
+    stats = w.vad_stats
+    assert 1 + 5 <= stats["blocks_decoded"] <= 1 + 5 + 2
+    assert stats["blocks_gated"] + stats["blocks_decoded"] - 1 == 25
+    stream.reset.assert_called_once()
+    assert w.metrics_snapshot()["counters"]["blocks_gated"] == stats["blocks_gated"]
+
+
+def test_keyword_spotter_failure_disables_wake_word():
+    from app.common.ring_buffer import RingBuffer
+    from app.common.dsp import StreamingResampler
+
+    w, _ = _worker()
+    spotter = MagicMock()
+    spotter.accept.side_effect = RuntimeError("KWS model failed to load")
+    w.keyword_spotter = spotter
+    w._ring = RingBuffer(3200)
+    w._ring.write(np.zeros(1600, dtype=np.float32))
+    errors = []
+    w.error.connect(errors.append)
+
+    w._spot_keyword(spotter, np.empty(1600, dtype=np.float32), StreamingResampler(16000, 16000))
+
+    assert w.keyword_spotter is None
+    assert len(errors) == 1 and "唤醒词" in errors[0] and "KWS model failed" in errors[0]
+
+
+def test_stop_leaves_stream_to_run_when_wait_times_out():
+    from app.core.audio_sources import SyntheticSource
+
+    engine = MagicMock(sample_rate=16000)
+    stream = engine.open_stream.return_value
+    stream.staging_buffer.side_effect = lambda n: np.empty(n, dtype=np.float32)
+    stream.finish.return_value = ""
+    w = ASRWorker(engine, source=SyntheticSource("noise", duration=0.2, sample_rate=16000, realtime=False))
+    w.wait = MagicMock(return_value=False)  # run() still busy after the timeout
+
+    w.stop()
+    stream.close.assert_not_called()
+
+    w.start_recording()
+    w.run()  # the still-running loop finishes and closes the stream itself
+    stream.close.assert_called_once()
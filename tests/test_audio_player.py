@@ -88,3 +88,156 @@ def test_play_wav_bytes():
         player.play_wav_bytes(wav_bytes, lambda: done.set())
         done.wait(timeout=2.0)
         mock_play.assert_called_once()
+
+
+class _FakeOutputStream:
+    """Runs the playback callback from a thread like PortAudio would."""
+
+    instances = []
+
+    def __init__(self, samplerate, channels, dtype, device, callback, finished_callback):
+        self.samplerate = samplerate
+        self.device = device
+        self.callback = callback
+        self.finished_callback = finished_callback
+        self.played = []
+        self.aborted = False
+        _FakeOutputStream.instances.append(self)
+
+    def start(self):
+        import threading
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        import time
+        from types import SimpleNamespace
+        info = SimpleNamespace(outputBufferDacTime=0.0, currentTime=0.0)
+        while not self.aborted:
+            out = np.zeros((480, 1), dtype=np.float32)
+            try:
+                self.callback(out, 480, info, None)
+            except Exception:  # sd.CallbackStop
+                self.played.append(out[:, 0].copy())
+                break
+            self.played.append(out[:, 0].copy())
+            time.sleep(0.001)
+        self.finished_callback()
+
+    def abort(self):
+        self.aborted = True
+
+    def close(self):
+        pass
+
+
+def test_play_stream_plays_chunks_on_both_devices():
+    import threading
+    player = AudioPlayer(speaker_device_name="Speakers", virtual_device_name="CABLE")
+    _FakeOutputStream.instances = []
+    chunks = [(np.full(1000, 0.5, dtype=np.float32), 48000) for _ in range(5)]
+    done = threading.Event()
+    first = []
+
+    with patch("app.core.audio_player.find_device_by_name") as mock_find, \
+         patch("app.core.audio_player.sd.OutputStream", _FakeOutputStream), \
+         patch("app.core.audio_player.sd.query_devices", return_value=_DEVICE_INFO):
+        mock_find.side_effect = lambda name, is_input: {"Speakers": 3, "CABLE": 5}.get(name, -1)
+        player.play_stream(iter(chunks), on_finished=done.set, on_first_audio=first.append)
+        assert done.wait(timeout=2.0)
+
+    assert {s.device for s in _FakeOutputStream.instances} == {3, 5}
+    for stream in _FakeOutputStream.instances:
+        played = np.concatenate(stream.played)
+        assert np.count_nonzero(played) == 5000
+        np.testing.assert_allclose(played[:5000], 0.5)
+    assert len(first) == 1
+    assert not player.is_playing
+
+
+def test_play_stream_without_audio_finishes_immediately():
+    player = AudioPlayer()
+    finished = []
+    player.play_stream(iter([]), on_finished=lambda: finished.append(True))
+    assert finished == [True]
+
+
+def test_play_stream_cancel_silences_both_devices():
+    import threading
+    from app.common.cancel import CancelToken
+    player = AudioPlayer(speaker_device_name="Speakers", virtual_device_name="CABLE")
+    _FakeOutputStream.instances = []
+    token = CancelToken()
+    done = threading.Event()
+
+    def chunks():
+        yield np.full(48000, 0.5, dtype=np.float32), 48000
+        token.cancel()
+        yield np.full(48000, 0.5, dtype=np.float32), 48000
+
+    with patch("app.core.audio_player.find_device_by_name") as mock_find, \
+         patch("app.core.audio_player.sd.OutputStream", _FakeOutputStream), \
+         patch("app.core.audio_player.sd.query_devices", return_value=_DEVICE_INFO):
+        mock_find.side_effect = lambda name, is_input: {"Speakers": 3, "CABLE": 5}.get(name, -1)
+        player.play_stream(chunks(), on_finished=done.set, cancel=token)
+        assert done.wait(timeout=2.0)
+
+    assert len(_FakeOutputStream.instances) == 2
+    for stream in _FakeOutputStream.instances:
+        assert stream.aborted
+        assert np.count_nonzero(np.concatenate(stream.played or [np.zeros(1)])) < 48000
+    assert not player.is_playing
+
+
+def test_stop_reports_when_streams_are_inactive():
+    import threading
+    player = AudioPlayer(speaker_device_name="Speakers", virtual_device_name="CABLE")
+    _FakeOutputStream.instances = []
+    sinks = []
+    done, silent = threading.Event(), threading.Event()
+    results = []
+
+    def on_silent(stopped):
+        results.append(stopped)
+        results.append(all(s.stopped.is_set() for s in sinks))
+        silent.set()
+
+    def chunks():
+        yield np.full(48000, 0.5, dtype=np.float32), 48000
+        sinks.extend(player._sinks)
+        player.stop(on_silent=on_silent)  # returns without waiting for the devices
+        assert silent.wait(timeout=2.0)
+        results.append(all(s.aborted for s in _FakeOutputStream.instances))
+
+    with patch("app.core.audio_player.find_device_by_name") as mock_find, \
+         patch("app.core.audio_player.sd.stop"), \
+         patch("app.core.audio_player.sd.OutputStream", _FakeOutputStream), \
+         patch("app.core.audio_player.sd.query_devices", return_value=_DEVICE_INFO):
+        mock_find.side_effect = lambda name, is_input: {"Speakers": 3, "CABLE": 5}.get(name, -1)
+        player.play_stream(chunks(), on_finished=done.set)
+        assert done.wait(timeout=2.0)
+
+    assert results == [True, True, True]
+
+
+def test_play_stream_accepts_chunk_longer_than_ring():
+    import threading
+    player = AudioPlayer()
+    _FakeOutputStream.instances = []
+    done = threading.Event()
+    chunk = np.full(48000, 0.5, dtype=np.float32)  # 1 s, the ring holds 0.25 s
+
+    with patch("app.core.audio_player.STREAM_BUFFER_SECONDS", 0.25), \
+         patch("app.core.audio_player.find_device_by_name", return_value=-1), \
+         patch("app.core.audio_player.sd.OutputStream", _FakeOutputStream), \
+         patch("app.core.audio_player.sd.query_devices", return_value=_DEVICE_INFO):
+        producer = threading.Thread(
+            target=player.play_stream, args=(iter([(chunk, 48000)]),), kwargs={"on_finished": done.set},
+            daemon=True,
+        )
+        producer.start()
+        producer.join(timeout=5.0)
+        assert not producer.is_alive()
+        assert done.wait(timeout=5.0)
+
+    (stream,) = _FakeOutputStream.instances
+    assert np.count_nonzero(np.concatenate(stream.played)) == 48000
@@ -0,0 +1,106 @@
+"""Tests for file and synthetic ASR audio sources."""
+
+import threading
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from app.core.audio_sources import SyntheticSource, WavFileSource
+
+
+def _collect(source, blocksize, writable=None):
+    blocks, done = [], threading.Event()
+
+    def callback(indata, frames, time_info, status):
+        assert indata.shape == (frames, 1)
+        blocks.append(indata[:, 0].copy())
+
+    source.start(callback, blocksize, writable)
+    for _ in range(200):
+        if source.finished:
+            break
+        done.wait(0.01)
+    source.stop()
+    return blocks
+
+
+def test_wav_source_mixes_to_mono_and_delivers_everything(tmp_path):
+    path = tmp_path / "a.wav"
+    stereo = np.stack([np.full(1000, 0.2), np.full(1000, 0.4)], axis=1)
+    sf.write(path, stereo, 8000)
+    source = WavFileSource(str(path), realtime=False)
+
+    blocks = _collect(source, 300)
+
+    assert source.sample_rate == 8000
+    assert [len(b) for b in blocks] == [300, 300, 300, 100]
+    assert np.allclose(np.concatenate(blocks), 0.3, atol=1e-4)
+
+
+def test_fast_source_waits_for_consumer_room():
+    source = SyntheticSource("sine", duration=0.1, sample_rate=1000, realtime=False)
+    room = {"free": 0}
+    blocks = []
+
+    def callback(indata, frames, time_info, status):
+        blocks.append(frames)
+
+    source.start(callback, 10, writable=lambda n: room["free"] >= n)
+    threading.Event().wait(0.05)
+    assert blocks == []  # no room yet
+    room["free"] = 1000
+    for _ in range(100):
+        if source.finished:
+            break
+        threading.Event().wait(0.01)
+    source.stop()
+    assert sum(blocks) == 100
+
+
+def test_synthetic_rejects_unknown_kind():
+    with pytest.raises(ValueError):
+        SyntheticSource("chirp")
+
+
+def _mock_sd(mock_sd, default_rate, supported):
+    mock_sd.query_devices.return_value = {"default_samplerate": default_rate, "hostapi": 0}
+    mock_sd.query_hostapis.return_value = {"name": "ALSA"}
+
+    def check(samplerate, **kwargs):
+        if samplerate not in supported:
+            raise ValueError("Invalid sample rate")
+
+    mock_sd.check_input_settings.side_effect = check
+
+
+def test_microphone_opens_at_engine_rate_when_supported():
+    from unittest.mock import patch
+
+    from app.core.audio_sources import MicrophoneSource
+
+    with patch("app.core.audio_sources.sd") as mock_sd, \
+            patch("app.core.audio_sources.find_device_by_name", return_value=-1):
+        _mock_sd(mock_sd, 48000.0, supported={16000, 48000})
+        assert MicrophoneSource(preferred_rate=16000).sample_rate == 16000
+
+        _mock_sd(mock_sd, 48000.0, supported={48000})
+        assert MicrophoneSource(preferred_rate=16000).sample_rate == 48000
+
+
+def test_microphone_allows_wasapi_conversion():
+    from unittest.mock import patch
+
+    from app.core.audio_sources import MicrophoneSource
+
+    with patch("app.core.audio_sources.sd") as mock_sd, \
+            patch("app.core.audio_sources.find_device_by_name", return_value=3):
+        _mock_sd(mock_sd, 48000.0, supported={16000, 48000})
+        mock_sd.query_hostapis.return_value = {"name": "Windows WASAPI"}
+        source = MicrophoneSource(preferred_rate=16000)
+
+    mock_sd.WasapiSettings.assert_called_once_with(auto_convert=True)
+    kwargs = mock_sd.check_input_settings.call_args.kwargs
+    assert kwargs["device"] == 3
+    assert kwargs["extra_settings"] is mock_sd.WasapiSettings.return_value
+    assert source.sample_rate == 16000
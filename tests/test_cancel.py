@@ -0,0 +1,32 @@
+"""Tests for CancelToken."""
+
+from app.common.cancel import CancelToken
+
+
+def test_callbacks_run_once_on_cancel():
+    token = CancelToken()
+    calls = []
+    token.on_cancel(lambda: calls.append("a"))
+    token.on_cancel(lambda: calls.append("b"))
+    assert not token.cancelled and calls == []
+    token.cancel()
+    token.cancel()
+    assert token.cancelled and token.cancelled_at is not None
+    assert calls == ["a", "b"]
+
+
+def test_late_callback_runs_immediately():
+    token = CancelToken()
+    token.cancel()
+    calls = []
+    token.on_cancel(lambda: calls.append(True))
+    assert calls == [True]
+
+
+def test_failing_callback_does_not_stop_the_others():
+    token = CancelToken()
+    calls = []
+    token.on_cancel(lambda: 1 / 0)
+    token.on_cancel(lambda: calls.append(True))
+    token.cancel()
+    assert calls == [True]
@@ -35,6 +35,13 @@ def test_load_missing_file(tmp_path):
     assert path.exists()
 
 
+def test_load_without_create_does_not_write(tmp_path):
+    path = tmp_path / "nonexistent.json"
+    cfg = AppConfig.load(path, create=False)
+    assert cfg.asr.language == "zh"
+    assert not path.exists()
+
+
 def test_load_corrupt_file(tmp_path):
     path = tmp_path / "bad.json"
     path.write_text("not json", encoding="utf-8")
@@ -0,0 +1,52 @@
+"""Tests for batched decoding of several streams."""
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.decode_scheduler import BatchDecodeScheduler
+
+
+class _FakeRecognizer:
+    """Each stream has a number of ready chunks; decode_streams consumes one each."""
+
+    def __init__(self):
+        self.batches = []
+
+    def is_ready(self, stream):
+        return stream["ready"] > 0
+
+    def decode_streams(self, streams):
+        self.batches.append(len(streams))
+        for s in streams:
+            s["ready"] -= 1
+
+
+def test_concurrent_requests_share_batches():
+    rec = _FakeRecognizer()
+    scheduler = BatchDecodeScheduler(gather_ms=200)
+    scheduler.expected = 3
+    streams = [{"ready": 2} for _ in range(3)]
+
+    threads = [threading.Thread(target=scheduler.decode, args=(rec, s)) for s in streams]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(2.0)
+    scheduler.stop()
+
+    assert all(s["ready"] == 0 for s in streams)
+    assert rec.batches == [3, 3]
+    assert scheduler.mean_batch_size == 3
+
+
+def test_decode_error_reaches_caller():
+    rec = MagicMock()
+    rec.is_ready.return_value = True
+    rec.decode_streams.side_effect = RuntimeError("boom")
+    scheduler = BatchDecodeScheduler(gather_ms=0)
+
+    with pytest.raises(RuntimeError):
+        scheduler.decode(rec, object())
+    scheduler.stop()
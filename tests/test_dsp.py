@@ -0,0 +1,58 @@
+"""Tests for the streaming polyphase resampler."""
+
+import numpy as np
+import pytest
+
+from app.common.dsp import StreamingResampler, resample
+
+
+def _sine(freq, rate, seconds=1.0):
+    t = np.arange(int(rate * seconds)) / rate
+    return np.sin(2 * np.pi * freq * t).astype(np.float32)
+
+
+@pytest.mark.parametrize("src,dst", [(48000, 16000), (44100, 16000), (32000, 48000)])
+def test_chunked_matches_whole_signal(src, dst):
+    """Carrying filter state across blocks must give seamless output."""
+    x = _sine(440, src)
+    block = src // 10
+
+    chunked = StreamingResampler(src, dst)
+    pieces = [chunked.process(x[i:i + block]) for i in range(0, len(x), block)]
+    whole = StreamingResampler(src, dst).process(x)
+
+    np.testing.assert_allclose(np.concatenate(pieces), whole, atol=1e-6)
+
+
+@pytest.mark.parametrize("src,dst", [(48000, 16000), (44100, 16000), (32000, 48000)])
+def test_resample_length_and_accuracy(src, dst):
+    y = resample(_sine(440, src), src, dst)
+    assert len(y) == dst
+    ref = _sine(440, dst)
+    assert np.abs(y - ref)[200:-200].max() < 0.05
+
+
+def test_output_length_predicts_process():
+    rs = StreamingResampler(44100, 16000)
+    for _ in range(5):
+        expected = rs.output_length(4410)
+        assert len(rs.process(np.zeros(4410, dtype=np.float32))) == expected
+
+
+def test_stereo():
+    x = _sine(440, 32000)
+    y = resample(np.stack([x, x], axis=1), 32000, 48000)
+    assert y.shape == (48000, 2)
+    np.testing.assert_allclose(y[:, 0], y[:, 1])
+
+
+def test_same_rate_passthrough():
+    x = _sine(440, 16000)
+    assert resample(x, 16000, 16000) is x
+    out = np.empty_like(x)
+    assert StreamingResampler(16000, 16000).process(x, out=out) is out
+
+
+def test_passthrough_when_rates_match():
+    assert StreamingResampler(16000, 16000).passthrough
+    assert not StreamingResampler(48000, 16000).passthrough
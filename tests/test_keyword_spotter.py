@@ -0,0 +1,77 @@
+"""Tests for wake-word detection."""
+
+from unittest.mock import patch
+
+import numpy as np
+
+from app.core.keyword_spotter import KeywordDetector
+
+
+def _make_kws(root, keywords=True):
+    d = root / "sherpa-onnx-kws-zipformer-wenetspeech-3.3M"
+    d.mkdir()
+    files = ["encoder.int8.onnx", "decoder.onnx", "joiner.int8.onnx", "tokens.txt"]
+    if keywords:
+        files.append("keywords.txt")
+    for f in files:
+        (d / f).write_bytes(b"x")
+    return d
+
+
+def test_unavailable_without_keywords(tmp_path):
+    _make_kws(tmp_path, keywords=False)
+    assert not KeywordDetector(tmp_path).is_available()
+    assert KeywordDetector(tmp_path, keywords_file="kw.txt").is_available()
+
+
+def test_detection_returns_keyword_once(tmp_path):
+    d = _make_kws(tmp_path)
+    detector = KeywordDetector(tmp_path, threshold=0.1)
+    with patch("app.core.keyword_spotter.sherpa_onnx.KeywordSpotter") as mock_cls:
+        spotter = mock_cls.return_value
+        spotter.is_ready.side_effect = [True, True, False]
+        spotter.get_result.side_effect = ["", "小爱同学"]
+
+        assert detector.accept(np.zeros(1600, dtype=np.float32)) == "小爱同学"
+
+        kwargs = mock_cls.call_args.kwargs
+        assert kwargs["keywords_file"] == str(d / "keywords.txt")
+        assert kwargs["keywords_threshold"] == 0.1
+        spotter.reset_stream.assert_called_once()
+
+        spotter.is_ready.side_effect = [False]
+        assert detector.accept(np.zeros(1600, dtype=np.float32)) is None
+        mock_cls.assert_called_once()  # loaded once, lazily
+
+
+def test_unload_during_accept_finishes_on_old_spotter(tmp_path):
+    _make_kws(tmp_path)
+    detector = KeywordDetector(tmp_path)
+    with patch("app.core.keyword_spotter.sherpa_onnx.KeywordSpotter") as mock_cls:
+        spotter = mock_cls.return_value
+        ready = iter([True, True, False])
+
+        def is_ready(stream):
+            detector.unload()  # settings change on the UI thread mid-decode
+            return next(ready)
+
+        spotter.is_ready.side_effect = is_ready
+        spotter.get_result.side_effect = ["", "小爱同学"]
+
+        assert detector.accept(np.zeros(1600, dtype=np.float32)) == "小爱同学"
+        assert detector.model is None
+
+        spotter.is_ready.side_effect = [False]
+        assert detector.accept(np.zeros(1600, dtype=np.float32)) is None
+        assert mock_cls.call_count == 2  # reloaded after the unload
+
+
+def test_load_failure_raises_runtime_error(tmp_path):
+    import pytest
+
+    _make_kws(tmp_path)
+    detector = KeywordDetector(tmp_path)
+    with patch("app.core.keyword_spotter.sherpa_onnx.KeywordSpotter", side_effect=OSError("bad model")):
+        with pytest.raises(RuntimeError, match="bad model"):
+            detector.accept(np.zeros(1600, dtype=np.float32))
+    assert detector.model is None
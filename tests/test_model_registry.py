@@ -0,0 +1,106 @@
+"""Tests for the cached ASR model registry."""
+
+import os
+import time
+
+from app.core.model_registry import ModelRegistry, inspect_model_dir
+
+
+def _make_model(root, name, files):
+    d = root / name
+    d.mkdir()
+    for f in files:
+        (d / f).write_bytes(b"x" * 10)
+    return d
+
+
+def test_detects_paraformer_and_prefers_int8(tmp_path):
+    d = _make_model(tmp_path, "paraformer-bilingual-zh-en", [
+        "encoder.onnx", "encoder.int8.onnx", "decoder.onnx", "decoder.int8.onnx", "tokens.txt",
+    ])
+    info = inspect_model_dir(d)
+    assert info.model_type == "paraformer"
+    assert info.quantized
+    assert info.files["encoder"].name == "encoder.int8.onnx"
+    assert info.languages == ("zh", "en")
+    assert info.size_bytes == 30
+
+
+def test_detects_transducer_and_ctc(tmp_path):
+    t = _make_model(tmp_path, "streaming-zipformer-korean", [
+        "encoder-epoch-99-avg-1.onnx", "decoder-epoch-99-avg-1.onnx",
+        "joiner-epoch-99-avg-1.onnx", "tokens.txt",
+    ])
+    c = _make_model(tmp_path, "streaming-zipformer-ctc-en", ["model.int8.onnx", "tokens.txt"])
+    assert inspect_model_dir(t).model_type == "transducer"
+    assert inspect_model_dir(t).languages == ("ko",)
+    assert inspect_model_dir(c).model_type == "ctc"
+    assert inspect_model_dir(t).streaming and inspect_model_dir(c).streaming
+
+
+def test_detects_offline_models(tmp_path):
+    sv = _make_model(tmp_path, "sense-voice-zh-en-ja-ko-yue", ["model.int8.onnx", "tokens.txt"])
+    pf = _make_model(tmp_path, "paraformer-zh-2023-09-14", ["model.onnx", "tokens.txt"])
+    info = inspect_model_dir(sv)
+    assert (info.model_type, info.streaming) == ("sense_voice", False)
+    assert info.languages == ("zh", "en", "ja", "ko", "yue")
+    assert (inspect_model_dir(pf).model_type, inspect_model_dir(pf).streaming) == ("paraformer", False)
+
+
+def test_incomplete_model_ignored(tmp_path):
+    d = _make_model(tmp_path, "broken", ["encoder.onnx", "tokens.txt"])
+    assert inspect_model_dir(d) is None
+
+
+def test_resolve_by_language_with_fallback(tmp_path):
+    _make_model(tmp_path, "paraformer-bilingual-zh-en", ["encoder.onnx", "decoder.onnx", "tokens.txt"])
+    _make_model(tmp_path, "streaming-zipformer-en", ["encoder.onnx", "decoder.onnx", "joiner.onnx", "tokens.txt"])
+    reg = ModelRegistry(tmp_path)
+
+    assert reg.resolve("en").name == "streaming-zipformer-en"  # single-language beats bilingual
+    assert reg.resolve("zh").name == "paraformer-bilingual-zh-en"
+    assert reg.resolve("ja").name == "paraformer-bilingual-zh-en"  # multilingual fallback
+    assert reg.resolve("auto").name == "paraformer-bilingual-zh-en"
+
+
+def test_streaming_and_offline_indexed_separately(tmp_path):
+    _make_model(tmp_path, "streaming-paraformer-zh", ["encoder.onnx", "decoder.onnx", "tokens.txt"])
+    _make_model(tmp_path, "sense-voice-zh-en", ["model.onnx", "tokens.txt"])
+    reg = ModelRegistry(tmp_path)
+    assert reg.resolve("zh").name == "streaming-paraformer-zh"
+    assert reg.resolve("zh", streaming=False).name == "sense-voice-zh-en"
+    assert reg.resolve("en", streaming=False).name == "sense-voice-zh-en"
+
+
+def test_model_in_root_dir(tmp_path):
+    for f in ["encoder.onnx", "decoder.onnx", "tokens.txt"]:
+        (tmp_path / f).write_bytes(b"x")
+    assert ModelRegistry(tmp_path).resolve("zh").path == tmp_path
+
+
+def test_manifest_cached_until_mtime_changes(tmp_path):
+    reg = ModelRegistry(tmp_path)
+    assert reg.resolve("zh") is None
+
+    d = _make_model(tmp_path, "paraformer-zh", ["encoder.onnx", "decoder.onnx", "tokens.txt"])
+    # Make sure the directory mtime visibly moves on coarse-resolution filesystems
+    future = time.time() + 10
+    os.utime(tmp_path, (future, future))
+    assert reg.resolve("zh").path == d
+
+
+def test_missing_dir(tmp_path):
+    assert ModelRegistry(tmp_path / "nope").resolve("zh") is None
+
+
+def test_keyword_spotter_kept_out_of_recognizer_lookups(tmp_path):
+    _make_model(tmp_path, "sherpa-onnx-kws-zipformer-wenetspeech-3.3M-2024-01-01", [
+        "encoder-epoch-12-avg-2-chunk-16-left-64.int8.onnx", "decoder-epoch-12-avg-2-chunk-16-left-64.onnx",
+        "joiner-epoch-12-avg-2-chunk-16-left-64.int8.onnx", "tokens.txt", "keywords.txt",
+    ])
+    reg = ModelRegistry(tmp_path)
+    assert reg.resolve("zh") is None
+    assert reg.resolve("zh", streaming=False) is None
+    kws = reg.resolve_keyword_spotter("zh")
+    assert kws.model_type == "kws"
+    assert kws.files["keywords"].name == "keywords.txt"
@@ -0,0 +1,58 @@
+"""Tests for partial-result de-duplication and rate limiting."""
+
+from app.core.partials import PartialCoalescer, stable_prefix_length
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_stable_prefix_length():
+    assert stable_prefix_length("hello wor", "hello world") == 9
+    assert stable_prefix_length("abc", "abd") == 2
+    assert stable_prefix_length("", "x") == 0
+
+
+def test_unchanged_partial_not_emitted():
+    c = PartialCoalescer(max_rate_hz=0)
+    assert c.update("你好") == ("你好", 0)
+    assert c.update("你好") is None
+    assert c.update("你好世界") == ("你好世界", 2)
+
+
+def test_rate_limit_coalesces_to_latest():
+    clock = _Clock()
+    c = PartialCoalescer(max_rate_hz=5.0, clock=clock)
+    assert c.update("a") == ("a", 0)
+
+    clock.now = 0.05
+    assert c.update("ab") is None
+    clock.now = 0.1
+    assert c.update("abc") is None
+    assert c.poll() is None
+
+    clock.now = 0.2
+    assert c.poll() == ("abc", 1)
+    assert c.poll() is None
+
+
+def test_pending_dropped_when_text_reverts():
+    clock = _Clock()
+    c = PartialCoalescer(max_rate_hz=5.0, clock=clock)
+    c.update("a")
+    clock.now = 0.05
+    c.update("ab")
+    c.update("a")
+    clock.now = 1.0
+    assert c.poll() is None
+
+
+def test_reset_starts_new_utterance():
+    c = PartialCoalescer(max_rate_hz=0)
+    c.update("first")
+    c.reset()
+    assert c.update("first") == ("first", 0)
@@ -5,6 +5,7 @@ import pytest
 
 from app.config import AppConfig
 from app.core.pipeline import Pipeline, TTSWorker
+from app.core.tts_queue import PRIORITY_ASR, TTSJob, TTSRequestQueue
 
 
 @pytest.fixture
@@ -25,20 +26,27 @@ def test_pipeline_creation(config):
         p.shutdown()
 
 
-def test_synthesize_when_busy(config):
-    with patch("app.core.pipeline.TTSClient"):
+def test_synthesize_when_busy_queues_request(config):
+    with patch("app.core.pipeline.TTSClient"), patch("app.core.pipeline.TTSWorker"):
         p = Pipeline(config)
-        p._busy = True
 
-        errors = []
+        errors, busy = [], []
         from app.signals import signal_bus
         signal_bus.tts_error.connect(lambda e: errors.append(e))
+        signal_bus.pipeline_busy.connect(lambda b: busy.append(b))
+
+        p.synthesize("第一句话")
+        p.synthesize("第二句话")  # arrives while the first is in progress
+        assert errors == []
+        assert len(p._tts_requests) == 2
+        assert busy == [True]
 
-        p.synthesize("test")
-        assert len(errors) == 1
-        assert "稍候" in errors[0]
+        p._handle_job_done(True)
+        p._handle_job_done(True)
+        assert busy == [True, False]
 
         signal_bus.tts_error.disconnect()
+        signal_bus.pipeline_busy.disconnect()
         p.shutdown()
 
 
@@ -70,3 +78,318 @@ def test_check_tts_connection(config):
         p = Pipeline(config)
         assert p.check_tts_connection() is True
         p.shutdown()
+
+
+def test_initialize_asr_loads_in_background(config):
+    config.asr.enabled = True
+    with patch("app.core.pipeline.TTSClient"), \
+         patch("app.core.pipeline.ASRLoader") as mock_loader_cls:
+        mock_loader_cls.return_value.isRunning.return_value = False
+        p = Pipeline(config)
+        assert p.initialize_asr() is True
+        mock_loader_cls.return_value.start.assert_called_once()
+        # The capture worker is only created once loading finishes
+        assert p.asr_worker is None
+        p.shutdown()
+
+
+def test_loader_warms_second_pass():
+    from app.core.pipeline import ASRLoader
+
+    engine = MagicMock(startup_timings={})
+    engine.initialize.return_value = True
+    second_pass = MagicMock()
+    loader = ASRLoader(engine, second_pass=second_pass)
+    phases, loaded = [], []
+    loader.progress.connect(lambda _percent, phase: phases.append(phase))
+    loader.loaded.connect(loaded.append)
+
+    loader.run()
+
+    second_pass.warm_up.assert_called_once()
+    assert phases == ["load", "warm_up", "second_pass", "ready"]
+    assert loaded == [True]
+    assert {"second_pass", "total"} <= set(engine.startup_timings)
+
+
+def test_settings_change_during_load_reloads_afterwards(config):
+    config.asr.enabled = True
+    with patch("app.core.pipeline.TTSClient"), \
+         patch("app.core.pipeline.ASRLoader") as mock_loader_cls:
+        loader = mock_loader_cls.return_value
+        loader.isRunning.return_value = False
+        p = Pipeline(config)
+        p.initialize_asr()
+        loader.isRunning.return_value = True
+        p._load_asr_model()  # e.g. a runtime setting changed mid-load
+        assert loader.start.call_count == 1
+
+        loader.isRunning.return_value = False
+        with patch.object(p, "_start_asr_worker") as mock_start:
+            p._on_asr_loaded(True)  # the stale load finishing
+            assert loader.start.call_count == 2
+            mock_start.assert_not_called()
+            p._on_asr_loaded(True)
+            mock_start.assert_called_once()
+        p.shutdown()
+
+
+def test_asr_load_failure_reports_error(config):
+    with patch("app.core.pipeline.TTSClient"):
+        p = Pipeline(config)
+        from app.signals import signal_bus
+        ready = []
+        signal_bus.asr_ready.connect(lambda ok: ready.append(ok))
+
+        p._on_asr_loaded(False)
+        assert ready == [False]
+        assert p.asr_worker is None
+
+        signal_bus.asr_ready.disconnect()
+        p.shutdown()
+
+
+def test_asr_partials_send_typing_once(config):
+    config.osc.enabled = True
+    with patch("app.core.pipeline.TTSClient"), patch("app.core.pipeline.OSCClient") as mock_osc:
+        config.tts.enabled = False
+        p = Pipeline(config)
+        p._on_asr_partial("你", 0)
+        p._on_asr_partial("你好", 1)
+        p._on_asr_final("你好")
+        p._on_asr_partial("再", 0)
+        typing_calls = [c.args[0] for c in mock_osc.return_value.set_typing.call_args_list]
+        assert typing_calls == [True, False, True]
+        p.shutdown()
+
+
+def _run_jobs(client, player, *jobs):
+    """Process jobs with a TTSWorker synchronously on the calling thread."""
+    requests = TTSRequestQueue()
+    worker = TTSWorker(client, player, requests)
+    events = {"error": [], "streamed": [], "first_audio": [], "job_done": []}
+    worker.error.connect(events["error"].append)
+    worker.streamed.connect(lambda: events["streamed"].append(True))
+    worker.first_audio.connect(events["first_audio"].append)
+    worker.job_done.connect(events["job_done"].append)
+    for job in jobs:
+        requests.put(job)
+    requests._closed = True  # get() returns None once the queued jobs are taken
+    worker.run()
+    return events
+
+
+def test_tts_worker_streams_into_player():
+    import numpy as np
+
+    client = MagicMock()
+    client.stream_pcm.return_value = iter([(np.full(8, 0.5, dtype=np.float32), 16000)])
+    received = []
+
+    def play_stream(chunks, on_finished, on_first_audio, cancel):
+        received.extend(chunks)
+        on_first_audio(0.0)
+        on_finished()
+
+    player = MagicMock()
+    player.play_stream.side_effect = play_stream
+    job = TTSJob("你好", {"top_k": 3}, streaming=True)
+    events = _run_jobs(client, player, job)
+
+    client.stream_pcm.assert_called_once_with("你好", job.cancel, top_k=3)
+    client.synthesize.assert_not_called()
+    (samples, rate), = received
+    assert rate == 16000
+    assert len(samples) == 8 and samples[0] == 0.5
+    assert events["streamed"] == [True]
+    assert len(events["first_audio"]) == 1
+    assert events["job_done"] == [True]
+
+
+def test_tts_worker_pipelines_segments():
+    import numpy as np
+
+    client = MagicMock()
+    client.synthesize_pipelined.return_value = iter([
+        (np.full(10, 0.25, dtype=np.float32), 32000),
+        (np.full(10, -0.25, dtype=np.float32), 32000),
+    ])
+    received = []
+    player = MagicMock()
+    player.play_stream.side_effect = lambda chunks, on_finished, **kwargs: (
+        received.extend(chunks), on_finished(),
+    )
+
+    job = TTSJob("今天天气很好。我们去公园吧。", {"top_k": 3}, split_method="cut3", concurrency=3)
+    _run_jobs(client, player, job)
+
+    client.synthesize_pipelined.assert_called_once_with(
+        ["今天天气很好。", "我们去公园吧。"], 3, job.cancel, top_k=3,
+    )
+    assert [rate for _, rate in received] == [32000, 32000]
+    assert received[0][0][0] == 0.25 and received[1][0][0] == -0.25
+
+
+def test_tts_worker_reports_errors_and_keeps_serving():
+    import numpy as np
+
+    client = MagicMock()
+    client.synthesize_pcm.side_effect = [RuntimeError("server down"), (np.zeros(4, dtype=np.float32), 16000)]
+    player = MagicMock()
+    player.play_stream.side_effect = lambda chunks, on_finished, **kwargs: (list(chunks), on_finished())
+
+    events = _run_jobs(client, player, TTSJob("一"), TTSJob("二"))
+
+    assert events["error"] == ["server down"]
+    assert events["streamed"] == [True]
+    assert events["job_done"] == [False, True]
+
+
+def test_tts_worker_synthesizes_next_job_during_playback():
+    import threading
+    import numpy as np
+
+    order = []
+    playing = []
+
+    def synthesize_pcm(text, cancel, **params):
+        order.append(f"synth {text}")
+        return np.zeros(4, dtype=np.float32), 16000
+
+    def play_stream(chunks, on_finished, **kwargs):
+        list(chunks)
+        order.append(f"play {len(playing)}")
+        playing.append(on_finished)
+        if len(playing) == 1:
+            # The first job keeps playing for a while after being queued
+            threading.Timer(0.05, lambda: (order.append("drained 0"), on_finished())).start()
+        else:
+            on_finished()
+
+    client = MagicMock()
+    client.synthesize_pcm.side_effect = synthesize_pcm
+    player = MagicMock()
+    player.play_stream.side_effect = play_stream
+
+    _run_jobs(client, player, TTSJob("一"), TTSJob("二"))
+
+    assert order == ["synth 一", "play 0", "synth 二", "drained 0", "play 1"]
+
+
+def test_tts_worker_cancelled_job_ends_quietly():
+    from concurrent.futures import CancelledError
+
+    job = TTSJob("一")
+
+    def synthesize_pcm(text, cancel, **params):
+        cancel.cancel()
+        raise CancelledError()
+
+    client = MagicMock()
+    client.synthesize_pcm.side_effect = synthesize_pcm
+    events = _run_jobs(client, MagicMock(), job)
+
+    assert events["error"] == []
+    assert events["job_done"] == [False]
+
+
+def test_stop_tts_cancels_queued_and_active_jobs(config):
+    with patch("app.core.pipeline.TTSClient"), \
+         patch("app.core.pipeline.AudioPlayer") as mock_player, \
+         patch("app.core.pipeline.TTSWorker") as mock_worker, \
+         patch("app.core.pipeline.signal_bus") as mock_bus:
+        p = Pipeline(config)
+        p.synthesize("一")
+        p.synthesize("二")
+        queued = list(p._tts_requests._jobs)
+        p.stop_tts()
+
+        assert all(job.cancel.cancelled for job in queued)
+        assert len(p._tts_requests) == 0
+        mock_worker.return_value.cancel_active.assert_called_once()
+        mock_player.return_value.stop.assert_called_once()
+        p.tts_client.request_stop.assert_called_once()
+        mock_bus.tts_cancelled.emit.assert_not_called()  # reported once the devices stop
+        mock_player.return_value.stop.call_args.kwargs["on_silent"](True)
+        mock_bus.tts_cancelled.emit.assert_called_once()
+        mock_bus.tts_error.emit.assert_not_called()
+        mock_bus.pipeline_busy.emit.assert_called_with(False)
+        p.shutdown()
+
+
+def test_shutdown_stops_tts_worker_before_player(config):
+    with patch("app.core.pipeline.TTSClient"), \
+         patch("app.core.pipeline.AudioPlayer") as mock_player, \
+         patch("app.core.pipeline.TTSWorker") as mock_worker:
+        p = Pipeline(config)
+        p.synthesize("一")
+        order = []
+        mock_worker.return_value.stop.side_effect = lambda: order.append("worker")
+        mock_player.return_value.stop.side_effect = lambda: order.append("player")
+        queued = list(p._tts_requests._jobs)
+        p.shutdown()
+
+        assert order == ["worker", "player"]
+        assert all(job.cancel.cancelled for job in queued)
+
+
+def test_synthesize_pipelines_sentences_when_enabled(config):
+    config.tts.sentence_pipelining = True
+    with patch("app.core.pipeline.TTSClient"), patch("app.core.pipeline.TTSWorker"):
+        p = Pipeline(config)
+        p.synthesize("今天天气很好。我们去公园吧！", text_split_method="cut5")
+        job = p._tts_requests.get(timeout=0)
+        assert job.split_method == "cut5"
+        assert job.params == {"text_split_method": "cut5"}
+        p.shutdown()
+
+
+def test_refused_request_does_not_report_started(config):
+    config.osc.enabled = False
+    with patch("app.core.pipeline.TTSClient"), patch("app.core.pipeline.TTSWorker"):
+        p = Pipeline(config)
+        p._tts_requests.maxsize = 1
+        from app.signals import signal_bus
+        started, errors, busy = [], [], []
+        signal_bus.tts_started.connect(lambda: started.append(True))
+        signal_bus.tts_error.connect(errors.append)
+        signal_bus.pipeline_busy.connect(busy.append)
+
+        p.synthesize("手动输入的文字")
+        p._on_asr_final("你好")  # queue full of more important requests
+
+        assert started == [True]
+        assert errors == ["语音队列已满，已丢弃：你好"]
+        assert p._tts_outstanding == 1
+        assert busy == [True]
+
+        signal_bus.tts_started.disconnect()
+        signal_bus.tts_error.disconnect()
+        signal_bus.pipeline_busy.disconnect()
+        p.shutdown()
+
+
+def test_synthesize_reuses_one_worker(config):
+    with patch("app.core.pipeline.TTSClient"), patch("app.core.pipeline.TTSWorker") as mock_worker:
+        p = Pipeline(config)
+        p.synthesize("第一句话")
+        p.synthesize("第二句话")
+        assert mock_worker.call_count == 1
+        assert len(p._tts_requests) == 2
+        p.shutdown()
+        mock_worker.return_value.stop.assert_called_once()
+
+
+def test_asr_finals_are_low_priority_and_coalesced(config):
+    config.osc.enabled = False
+    with patch("app.core.pipeline.TTSClient"), patch("app.core.pipeline.TTSWorker"):
+        p = Pipeline(config)
+        p._on_asr_final("你好")
+        p._on_asr_final("在吗")
+        p.synthesize("手动输入的文字")
+        first = p._tts_requests.get(timeout=0)
+        second = p._tts_requests.get(timeout=0)
+        assert first.text == "手动输入的文字"
+        assert (second.text, second.priority) == ("你好，在吗", PRIORITY_ASR)
+        assert p._tts_outstanding == 2
+        p.shutdown()
@@ -0,0 +1,97 @@
+"""Tests for the SPSC capture ring buffer."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from app.common.ring_buffer import RingBuffer
+
+
+def test_write_then_read():
+    rb = RingBuffer(8)
+    rb.write(np.arange(5, dtype=np.float32))
+    assert rb.available == 5
+    out = rb.read(5, timeout=0)
+    np.testing.assert_array_equal(out, np.arange(5, dtype=np.float32))
+    assert rb.available == 0
+
+
+def test_wraparound():
+    rb = RingBuffer(6)
+    rb.write(np.arange(4, dtype=np.float32))
+    rb.read(4, timeout=0)
+    rb.write(np.arange(10, 15, dtype=np.float32))
+    out = rb.read(5, timeout=0)
+    np.testing.assert_array_equal(out, np.arange(10, 15, dtype=np.float32))
+
+
+def test_overflow_drops_and_counts():
+    rb = RingBuffer(4)
+    stored = rb.write(np.ones(6, dtype=np.float32))
+    assert stored == 4
+    assert rb.overflow_count == 2
+
+
+def test_read_timeout_counts_underrun():
+    rb = RingBuffer(4)
+    rb.write(np.ones(2, dtype=np.float32))
+    assert rb.read(3, timeout=0.01) is None
+    assert rb.underrun_count == 1
+    # Partial data stays buffered
+    assert rb.available == 2
+
+
+def test_reader_wakes_on_write():
+    rb = RingBuffer(16)
+    result = []
+
+    def reader():
+        result.append(rb.read(4, timeout=2.0))
+
+    t = threading.Thread(target=reader)
+    t.start()
+    rb.write(np.full(4, 0.5, dtype=np.float32))
+    t.join(timeout=2.0)
+    assert result and result[0] is not None
+    assert np.all(result[0] == 0.5)
+
+
+def test_clear():
+    rb = RingBuffer(4)
+    rb.write(np.ones(3, dtype=np.float32))
+    rb.clear()
+    assert rb.available == 0
+
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        RingBuffer(0)
+
+
+def test_keep_latest_trims_to_preroll_window():
+    rb = RingBuffer(16)
+    rb.write(np.arange(10, dtype=np.float32))
+    rb.keep_latest(3)
+    np.testing.assert_array_equal(rb.read(3, timeout=0), [7, 8, 9])
+
+
+def test_keep_latest_never_rewinds():
+    rb = RingBuffer(16)
+    rb.write(np.arange(4, dtype=np.float32))
+    rb.read(3, timeout=0)
+    rb.keep_latest(10)
+    assert rb.available == 1
+
+
+def test_read_available_returns_partial_without_waiting():
+    rb = RingBuffer(6)
+    rb.write(np.arange(4, dtype=np.float32))
+    rb.read(3, timeout=0)
+    rb.write(np.arange(10, 14, dtype=np.float32))  # wraps around
+    out = np.full(8, -1.0, dtype=np.float32)
+    assert rb.read_available(out) == 5
+    np.testing.assert_array_equal(out[:5], [3, 10, 11, 12, 13])
+    assert out[5] == -1.0
+    assert rb.read_available(out) == 0
+    assert rb.underrun_count == 0
@@ -0,0 +1,56 @@
+"""Tests for the offline second-pass recognizer."""
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.core.second_pass import SecondPassRecognizer
+
+
+def _make_sense_voice(root):
+    d = root / "sense-voice-zh-en"
+    d.mkdir()
+    for f in ["model.int8.onnx", "tokens.txt"]:
+        (d / f).write_bytes(b"x")
+
+
+def test_decodes_with_lazily_loaded_offline_model(tmp_path):
+    _make_sense_voice(tmp_path)
+    sp = SecondPassRecognizer(tmp_path, language="zh")
+    assert sp.is_available()
+
+    with patch("app.core.second_pass.sherpa_onnx.OfflineRecognizer") as mock_rec:
+        recognizer = mock_rec.from_sense_voice.return_value
+        recognizer.create_stream.return_value.result.text = " 你好世界 "
+        text = sp.submit(np.zeros(16000, dtype=np.float32)).result(timeout=5)
+        sp.submit(np.zeros(1600, dtype=np.float32)).result(timeout=5)
+
+    assert text == "你好世界"
+    mock_rec.from_sense_voice.assert_called_once()
+    assert mock_rec.from_sense_voice.call_args.kwargs["language"] == "zh"
+    sp.shutdown()
+
+
+def test_missing_offline_model(tmp_path):
+    sp = SecondPassRecognizer(tmp_path)
+    assert not sp.is_available()
+    with pytest.raises(RuntimeError):
+        sp.submit(np.zeros(160, dtype=np.float32)).result(timeout=5)
+    sp.shutdown()
+
+
+def test_warm_up_loads_model_before_first_utterance(tmp_path):
+    _make_sense_voice(tmp_path)
+    sp = SecondPassRecognizer(tmp_path, language="zh")
+
+    with patch("app.core.second_pass.sherpa_onnx.OfflineRecognizer") as mock_rec:
+        recognizer = mock_rec.from_sense_voice.return_value
+        recognizer.create_stream.return_value.result.text = ""
+        sp.warm_up()
+        assert sp.model is not None
+        recognizer.decode_stream.assert_called_once()
+        sp.submit(np.zeros(1600, dtype=np.float32)).result(timeout=5)
+
+    mock_rec.from_sense_voice.assert_called_once()
+    sp.shutdown()
@@ -0,0 +1,43 @@
+"""Tests for client-side GPT-SoVITS text splitting."""
+
+import pytest
+
+from app.core.text_split import split_text
+
+TEXT = "今天天气很好。我们去公园吧！你觉得怎么样？好的，出发。价格是3.5元。"
+
+
+def test_cut0_keeps_text_whole():
+    assert split_text(TEXT, "cut0") == [TEXT]
+
+
+def test_cut5_splits_at_punctuation_but_not_decimals():
+    assert split_text(TEXT, "cut5") == [
+        "今天天气很好。", "我们去公园吧！", "你觉得怎么样？", "好的，出发。", "价格是3.5元。",
+    ]
+
+
+def test_cut3_splits_at_chinese_full_stop():
+    assert split_text(TEXT, "cut3") == ["今天天气很好。", "我们去公园吧！你觉得怎么样？好的，出发。", "价格是3.5元。"]
+
+
+def test_cut4_splits_at_english_full_stop():
+    assert split_text("Hello there. It costs 3.5 dollars. See you soon.", "cut4") == [
+        "Hello there.", "It costs 3.5 dollars.", "See you soon.",
+    ]
+
+
+def test_cut1_groups_four_sentences():
+    assert len(split_text(TEXT, "cut1")) == 2
+
+
+def test_short_pieces_are_merged():
+    assert split_text("嗯，好。我知道了，谢谢你们的帮助。", "cut5") == ["嗯，好。我知道了，", "谢谢你们的帮助。"]
+    assert split_text("我知道了，谢谢。", "cut5") == ["我知道了，谢谢。"]
+    assert split_text("Hi. It is late. Bye", "cut4") == ["Hi. It is late. Bye"]
+
+
+@pytest.mark.parametrize("method", ["cut0", "cut1", "cut2", "cut3", "cut4", "cut5"])
+def test_empty_and_punctuation_only(method):
+    assert split_text("", method) == []
+    assert split_text("。。。", method) == []
@@ -0,0 +1,57 @@
+"""Tests for the batch transcription CLI."""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+import soundfile as sf
+
+import app.transcribe as transcribe
+
+
+def _wav(path, seconds=0.5, rate=16000):
+    sf.write(path, np.zeros(int(rate * seconds), dtype=np.float32), rate)
+    return path
+
+
+def test_collect_files_dir_and_glob(tmp_path):
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    a = _wav(tmp_path / "a.wav")
+    b = _wav(sub / "b.WAV")
+    (tmp_path / "notes.txt").write_text("x")
+
+    assert transcribe.collect_files([str(tmp_path)]) == [a, b]
+    assert transcribe.collect_files([str(tmp_path / "*.wav")]) == [a]
+
+
+def test_transcribe_batch_reports_timings_and_errors(tmp_path, monkeypatch):
+    engine = MagicMock()
+    engine.sample_rate = 16000
+    engine.decode_batch.return_value = ["hello"]
+    engine.model.name = "paraformer-zh"
+    monkeypatch.setattr(transcribe, "_engine", engine)
+
+    good = str(_wav(tmp_path / "good.wav", seconds=1.0, rate=48000))
+    bad = str(tmp_path / "bad.wav")
+    (tmp_path / "bad.wav").write_bytes(b"not audio")
+
+    results = transcribe._transcribe_batch([good, bad])
+
+    assert results[0]["text"] == "hello"
+    assert results[0]["duration"] == 1.0
+    assert results[0]["batch_size"] == 1
+    assert "rtf" in results[0]
+    assert "error" in results[1]
+    # Input is resampled to the engine rate before decoding
+    assert len(engine.decode_batch.call_args.args[0][0]) == 16000
+
+
+def test_help_does_not_write_config(tmp_path, monkeypatch):
+    import pytest
+    import app.config
+    path = tmp_path / "config.json"
+    monkeypatch.setattr(app.config, "CONFIG_PATH", path)
+    with pytest.raises(SystemExit):
+        transcribe.main(["--help"])
+    assert transcribe.main([str(tmp_path / "missing" / "*.wav")]) == 1
+    assert not path.exists()
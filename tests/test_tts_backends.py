@@ -0,0 +1,83 @@
+"""Tests for routing TTS requests across several servers."""
+
+import httpx
+
+from app.core.tts_backends import ROUTE_EWMA, STICKY_SLACK, BackendPool, is_server_fault
+
+URLS = ["http://a:9880", "http://b:9880/"]
+
+
+def _status_error(code):
+    request = httpx.Request("POST", "http://a:9880/tts")
+    return httpx.HTTPStatusError("", request=request, response=httpx.Response(code, request=request))
+
+
+def test_least_outstanding_prefers_idle_server():
+    pool = BackendPool(URLS)
+    a, b = pool.backends
+    assert b.url == "http://b:9880"
+    pool.acquire(a)
+    assert pool.pick() is b
+    pool.release(a)
+    assert pool.pick() is a
+
+
+def test_ewma_prefers_faster_server():
+    pool = BackendPool(URLS, policy=ROUTE_EWMA)
+    a, b = pool.backends
+    pool.record_success(a, 2.0)
+    pool.record_success(b, 0.5)
+    assert pool.pick() is b
+    for _ in range(4):
+        pool.acquire(b)
+    assert pool.pick() is a  # 0.5 s x 5 in flight is worse than 2.0 s idle
+
+
+def test_voice_sticks_to_its_server_until_it_is_much_busier():
+    pool = BackendPool(URLS)
+    a, b = pool.backends
+    pool.acquire(a)
+    assert pool.pick("voice") is b
+    pool.release(a)
+    for _ in range(STICKY_SLACK):
+        pool.acquire(b)
+    assert pool.pick("voice") is b
+    pool.acquire(b)
+    assert pool.pick("voice") is a
+    assert pool.pick("voice", exclude=[a]) is b
+    assert pool.pick("voice") is a  # a hedge does not move the voice
+
+
+def test_server_faults_eject_until_success():
+    pool = BackendPool(URLS, eject_failures=2, eject_seconds=60)
+    a, b = pool.backends
+    pool.record_error(a, _status_error(400))
+    pool.record_error(a, _status_error(404))
+    assert a in pool.available()
+    pool.record_error(a, httpx.ConnectError("refused"))
+    pool.record_error(a, _status_error(503))
+    assert pool.available() == [b]
+    assert pool.pick() is b
+    pool.record_error(b, httpx.ReadTimeout("slow"))
+    pool.record_error(b, httpx.ReadTimeout("slow"))
+    assert pool.available() == []
+    assert pool.pick() is not None  # everything ejected: try anyway
+    pool.record_success(a)
+    assert pool.available() == [a]
+    assert [s["ejected"] for s in pool.stats()] == [False, True]
+
+
+def test_set_urls_keeps_known_servers():
+    pool = BackendPool(URLS)
+    a, _ = pool.backends
+    pool.record_success(a, 1.0)
+    pool.set_urls(["http://a:9880", "http://c:9880", "http://a:9880/"])
+    assert [b.url for b in pool.backends] == ["http://a:9880", "http://c:9880"]
+    assert pool.backends[0] is a and a.ewma_s == 1.0
+
+
+def test_only_connection_errors_and_5xx_are_server_faults():
+    assert is_server_fault(httpx.ConnectError("refused"))
+    assert is_server_fault(_status_error(502))
+    assert not is_server_fault(_status_error(400))
+    assert not is_server_fault(ValueError("bad wav"))
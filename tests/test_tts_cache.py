@@ -0,0 +1,113 @@
+"""Tests for the two-tier TTS audio cache."""
+
+import numpy as np
+
+from app.core.tts_cache import TTSCache, cache_key, is_cacheable
+
+PAYLOAD = {"text": "你好 世界", "seed": 42, "top_k": 5}
+WEIGHTS = {"gpt": "", "sovits": ""}
+URL = "http://127.0.0.1:9880"
+
+
+def _audio(n, value=0.5):
+    return np.full(n, value, dtype=np.float32)
+
+
+def test_key_ignores_whitespace_but_not_parameters():
+    key = cache_key(PAYLOAD, URL, WEIGHTS)
+    assert cache_key({**PAYLOAD, "text": "  你好\n世界 "}, URL, WEIGHTS) == key
+    assert cache_key({**PAYLOAD, "top_k": 6}, URL, WEIGHTS) != key
+    assert cache_key(PAYLOAD, "http://other:9880", WEIGHTS) != key
+    assert cache_key(PAYLOAD, URL, {"gpt": "a.ckpt", "sovits": ""}) != key
+
+
+def test_only_fixed_seed_is_cacheable():
+    assert is_cacheable(PAYLOAD)
+    assert not is_cacheable({**PAYLOAD, "seed": -1})
+
+
+def test_memory_lru_evicts_oldest_by_bytes():
+    cache = TTSCache(memory_mb=1000 * 4 * 2 / (1024 * 1024))  # room for two 1000-sample entries
+    cache.put("a", _audio(1000), 32000)
+    cache.put("b", _audio(1000), 32000)
+    assert cache.get("a") is not None  # a is now most recently used
+    cache.put("c", _audio(1000), 32000)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_disk_tier_survives_restart_and_promotes(tmp_path):
+    TTSCache(tmp_path).put("k", _audio(500, 0.25), 24000)
+
+    cache = TTSCache(tmp_path)
+    samples, rate = cache.get("k")
+    assert rate == 24000
+    np.testing.assert_array_equal(samples, _audio(500, 0.25))
+    cache.get("k")
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 0)
+    assert stats["hit_ratio"] == 1.0
+
+
+def test_get_memory_never_reads_disk(tmp_path):
+    TTSCache(tmp_path).put("k", _audio(500), 24000)
+
+    cache = TTSCache(tmp_path)
+    assert cache.get_memory("k") is None
+    assert cache._disk is None  # directory not even scanned
+    assert cache.get("k") is not None
+    assert cache.get_memory("k") is not None
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 0)
+
+
+def test_memory_lookup_not_blocked_by_disk_read(tmp_path):
+    import threading
+    import time
+    from unittest.mock import patch
+
+    import soundfile as sf
+
+    cache = TTSCache(tmp_path)
+    cache.put("disk", _audio(500), 24000)
+    cache.put("mem", _audio(500), 24000)
+    cache._memory.pop("disk")
+    reading, release = threading.Event(), threading.Event()
+    real_read = sf.read
+
+    def slow_read(*args, **kwargs):
+        reading.set()
+        release.wait(2.0)
+        return real_read(*args, **kwargs)
+
+    with patch("app.core.tts_cache.sf.read", side_effect=slow_read):
+        reader = threading.Thread(target=cache.get, args=("disk",))
+        reader.start()
+        assert reading.wait(2.0)
+        started = time.monotonic()
+        assert cache.get_memory("mem") is not None
+        assert time.monotonic() - started < 0.5
+        release.set()
+        reader.join()
+    assert cache.get_memory("disk") is not None
+
+
+def test_disk_evicts_least_recently_used(tmp_path):
+    entry_bytes = 1000 * 4 + 100  # float samples plus WAV header
+    cache = TTSCache(tmp_path, memory_mb=0, disk_mb=2.5 * entry_bytes / (1024 * 1024))
+    for key in ("a", "b", "c"):
+        cache.put(key, _audio(1000), 16000)
+    assert sorted(p.stem for p in tmp_path.glob("*.wav")) == ["b", "c"]
+    assert cache.stats()["disk_bytes"] <= cache.disk_budget
+
+
+def test_stats_and_clear(tmp_path):
+    cache = TTSCache(tmp_path)
+    assert cache.get("missing") is None
+    cache.put("k", _audio(10), 16000)
+    cache.get("k")
+    stats = cache.stats()
+    assert stats["lookups"] == 2 and stats["hit_ratio"] == 0.5
+    cache.clear()
+    assert cache.get("k") is None
+    assert list(tmp_path.glob("*.wav")) == []
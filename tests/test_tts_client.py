@@ -1,14 +1,24 @@
 """Tests for TTS client."""
 
+import asyncio
+import threading
+from concurrent.futures import CancelledError
 from unittest.mock import patch, MagicMock
 
 import httpx
 import pytest
 
+from app.common.cancel import CancelToken
 from app.config import TTSConfig
+from app.core.tts_cache import TTSCache
 from app.core.tts_client import TTSClient
 
 
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
 @pytest.fixture
 def tts_config():
     return TTSConfig(
@@ -96,3 +106,277 @@ def test_set_gpt_weights(client):
             "http://127.0.0.1:9880/set_gpt_weights",
             params={"weights_path": "/path/to/weights.ckpt"},
         )
+
+
+def test_synthesize_stream_forces_streaming_wav(client):
+    mock_response = MagicMock()
+    mock_response.aiter_bytes.return_value = _aiter([b"RIFF", b"pcm"])
+    stream_cm = MagicMock()
+    stream_cm.__aenter__.return_value = mock_response
+
+    with patch.object(client._client, "stream", return_value=stream_cm) as mock_stream:
+        chunks = list(client.synthesize_stream("你好", media_type="ogg", top_k=7))
+
+    assert chunks == [b"RIFF", b"pcm"]
+    method, url = mock_stream.call_args.args
+    assert (method, url) == ("POST", "http://127.0.0.1:9880/tts")
+    payload = mock_stream.call_args.kwargs["json"]
+    assert payload["streaming_mode"] is True
+    assert payload["media_type"] == "wav"
+    assert payload["top_k"] == 7
+    assert payload["text_split_method"] == "cut5"
+
+
+def test_build_payload_rejects_unknown_parameter(client):
+    with pytest.raises(TypeError):
+        client.build_payload("hi", topk=3)
+
+
+def test_synthesize_pipelined_keeps_order_and_bounds_concurrency(client):
+    import asyncio
+
+    in_flight, peak = [0], [0]
+
+    async def fake_post(payload):
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.02 if payload["text"] == "a" else 0.001)  # the first segment is the slowest
+        in_flight[0] -= 1
+        return _wav_response(value=ord(payload["text"]) / 1000).content
+
+    with patch.object(client, "_post", side_effect=fake_post) as mock_post:
+        results = list(client.synthesize_pipelined(["a", "b", "c", "d", "e"], concurrency=2, top_k=9))
+
+    assert [round(float(samples[0]) * 1000) for samples, _ in results] == [97, 98, 99, 100, 101]
+    assert all(call.args[0]["top_k"] == 9 for call in mock_post.call_args_list)
+    assert peak[0] == 2
+
+
+def _wav_response(value=0.5, rate=32000):
+    import io
+    import numpy as np
+    import soundfile as sf
+    buf = io.BytesIO()
+    sf.write(buf, np.full(100, value, dtype=np.float32), rate, format="WAV")
+    response = MagicMock()
+    response.content = buf.getvalue()
+    return response
+
+
+def test_synthesize_pcm_serves_repeats_from_cache(tts_config):
+    client = TTSClient(tts_config, cache=TTSCache())
+    with patch.object(client._client, "post", return_value=_wav_response()) as mock_post:
+        first, rate = client.synthesize_pcm("谢谢", seed=7)
+        second, _ = client.synthesize_pcm(" 谢谢 ", seed=7)
+        client.synthesize_pcm("谢谢", seed=8)
+
+    assert mock_post.call_count == 2
+    assert rate == 32000 and second is first
+    assert client.cache.stats()["memory_hits"] == 1
+    client.close()
+
+
+def test_disk_cache_is_read_off_the_loop(tts_config, tmp_path):
+    import threading
+    import numpy as np
+
+    client = TTSClient(tts_config, cache=TTSCache(tmp_path))
+    key = client._cache_key(client.build_payload("谢谢", seed=7))
+    client.cache.put(key, np.full(10, 0.5, dtype=np.float32), 16000)
+    client.cache = TTSCache(tmp_path)  # empty memory tier: the hit comes from disk
+    threads = []
+    real_get = client.cache.get
+    client.cache.get = lambda k: threads.append(threading.current_thread()) or real_get(k)
+
+    samples, rate = client.synthesize_pcm("谢谢", seed=7)
+
+    assert rate == 16000 and samples[0] == 0.5
+    assert threads and threads[0] is not client._thread
+    client.close()
+
+
+def test_random_seed_and_new_weights_bypass_cache(tts_config):
+    client = TTSClient(tts_config, cache=TTSCache())
+    with patch.object(client._client, "post", return_value=_wav_response()) as mock_post, \
+         patch.object(client._client, "get", return_value=MagicMock(status_code=200)):
+        client.synthesize_pcm("hi", seed=-1)
+        client.synthesize_pcm("hi", seed=-1)
+        assert client.cache.stats()["lookups"] == 0
+        client.synthesize_pcm("hi", seed=1)
+        client.set_sovits_weights("/w/new.pth")
+        client.synthesize_pcm("hi", seed=1)
+
+    assert mock_post.call_count == 4
+    client.close()
+
+
+def test_stream_pcm_decodes_and_caches_complete_stream(tts_config):
+    import io
+    import numpy as np
+    import soundfile as sf
+    buf = io.BytesIO()
+    sf.write(buf, np.full(64, 0.25, dtype=np.float32), 24000, format="WAV")
+    wav = buf.getvalue()
+
+    client = TTSClient(tts_config, cache=TTSCache())
+    mock_response = MagicMock()
+    mock_response.aiter_bytes.return_value = _aiter([wav[:50], wav[50:77], wav[77:]])
+    stream_cm = MagicMock()
+    stream_cm.__aenter__.return_value = mock_response
+
+    with patch.object(client._client, "stream", return_value=stream_cm) as mock_stream:
+        chunks = list(client.stream_pcm("你好", seed=3))
+        cached = list(client.stream_pcm("你好", seed=3))
+
+    assert mock_stream.call_count == 1
+    assert all(rate == 24000 for _, rate in chunks)
+    np.testing.assert_allclose(np.concatenate([c for c, _ in chunks]), 0.25, atol=1e-4)
+    (samples, rate), = cached
+    assert rate == 24000 and len(samples) == 64
+    client.close()
+
+
+def test_pool_and_timeouts_come_from_config():
+    cfg = TTSConfig(connect_timeout=2.5, read_timeout=30.0, max_connections=2)
+    c = TTSClient(cfg)
+    assert c._client.timeout.connect == 2.5
+    assert c._client.timeout.read == 30.0
+    pool = c._client._transport._pool
+    assert pool._max_connections == 2
+    c.close()
+    c.close()  # idempotent
+
+
+def test_cancel_aborts_request_in_flight(client):
+    started = threading.Event()
+
+    async def slow_post(*args, **kwargs):
+        started.set()
+        await asyncio.sleep(60)
+
+    token = CancelToken()
+    with patch.object(client._client, "post", side_effect=slow_post):
+        future = client.submit("你好", token)
+        assert started.wait(timeout=2.0)
+        token.cancel()
+        with pytest.raises(CancelledError):
+            future.result(timeout=2.0)
+
+
+def test_cancel_ends_stream_without_caching_partial_audio(tts_config):
+    import io
+    import numpy as np
+    import soundfile as sf
+    buf = io.BytesIO()
+    sf.write(buf, np.full(64, 0.25, dtype=np.float32), 24000, format="WAV")
+    wav = buf.getvalue()
+
+    async def endless():
+        yield wav[:60]
+        await asyncio.sleep(60)
+
+    client = TTSClient(tts_config, cache=TTSCache())
+    mock_response = MagicMock()
+    mock_response.aiter_bytes.return_value = endless()
+    stream_cm = MagicMock()
+    stream_cm.__aenter__.return_value = mock_response
+    token = CancelToken()
+
+    with patch.object(client._client, "stream", return_value=stream_cm):
+        chunks = client.stream_pcm("你好", token, seed=3)
+        samples, rate = next(chunks)
+        token.cancel()
+        with pytest.raises(CancelledError):
+            next(chunks)
+
+    assert rate == 24000 and len(samples) == 8
+    assert client.cache.stats()["memory_entries"] == 0
+    client.close()
+
+
+def test_request_stop_only_with_configured_endpoint(tts_config):
+    client = TTSClient(tts_config)
+    assert client.request_stop() is None
+    client.config.stop_endpoint = "/stop"
+    with patch.object(client._client, "get", return_value=MagicMock(status_code=200)) as mock_get:
+        assert client.request_stop().result(timeout=2.0) is True
+    assert mock_get.call_args.args[0] == "http://127.0.0.1:9880/stop"
+    client.close()
+
+
+def _two_server_config(**kwargs):
+    return TTSConfig(api_url="http://a:9880", api_urls=["http://b:9880"], **kwargs)
+
+
+def test_hedged_request_takes_first_response():
+    client = TTSClient(_two_server_config(hedge_delay_ms=20))
+    cancelled = []
+
+    async def post(url, json):
+        if url.startswith("http://a"):
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(url)
+                raise
+        return MagicMock(content=b"from " + url.encode())
+
+    with patch.object(client._client, "post", side_effect=post):
+        assert client.synthesize("你好") == b"from http://b:9880/tts"
+
+    assert client.pool.hedges == 1
+    assert cancelled == ["http://a:9880/tts"]
+    assert all(b.outstanding == 0 for b in client.pool.backends)
+    client.close()
+
+
+def test_hedged_request_fails_over_to_second_server():
+    client = TTSClient(_two_server_config(hedge_delay_ms=1000))
+
+    async def post(url, json):
+        if url.startswith("http://a"):
+            raise httpx.ConnectError("refused")
+        return MagicMock(content=b"ok")
+
+    with patch.object(client._client, "post", side_effect=post):
+        assert client.synthesize("你好") == b"ok"
+    assert client.pool.backends[0].failures == 1
+    client.close()
+
+
+def test_weights_are_loaded_on_every_server_and_caught_up_later():
+    client = TTSClient(_two_server_config())
+    loads = []
+
+    async def get(url, params):
+        loads.append(url)
+        return MagicMock(status_code=503 if url.startswith("http://b") and len(loads) <= 2 else 200)
+
+    with patch.object(client._client, "get", side_effect=get), \
+         patch.object(client._client, "post", return_value=MagicMock(content=b"ok")) as mock_post:
+        assert client.set_gpt_weights("/w/a.ckpt") is True
+        a, b = client.pool.backends
+        assert a.weights["gpt"] == "/w/a.ckpt" and b.weights["gpt"] == ""
+        client.pool.acquire(a)  # route the next request to b
+        client.synthesize("你好")
+        client.pool.release(a)
+
+    assert mock_post.call_args.args[0] == "http://b:9880/tts"
+    assert loads[-1] == "http://b:9880/set_gpt_weights"
+    assert b.weights["gpt"] == "/w/a.ckpt"
+    client.close()
+
+
+def test_requests_without_server_raise_clear_error(tts_config):
+    import httpx
+    import pytest
+
+    tts_config.api_url = ""
+    client = TTSClient(tts_config)
+    with patch.object(client._client, "post") as mock_post:
+        with pytest.raises(httpx.RequestError, match="No TTS server configured"):
+            client.synthesize("你好")
+        with pytest.raises(httpx.RequestError, match="No TTS server configured"):
+            list(client.synthesize_stream("你好"))
+    mock_post.assert_not_called()
+    client.close()
@@ -0,0 +1,106 @@
+"""Tests for the bounded priority TTS request queue."""
+
+import threading
+import time
+
+from app.core.tts_queue import (
+    DROP_CANCELLED, DROP_CLOSED, DROP_EXPIRED, DROP_FULL, PRIORITY_ASR, PRIORITY_MANUAL,
+    PUT_MERGED, PUT_QUEUED, PUT_REFUSED, TTSJob, TTSRequestQueue,
+)
+
+
+def _queue(**kwargs):
+    drops = []
+    q = TTSRequestQueue(on_drop=lambda job, reason: drops.append((job.text, reason)), **kwargs)
+    return q, drops
+
+
+def test_manual_requests_jump_ahead_of_asr():
+    q, _ = _queue(coalesce_chars=0)
+    q.put(TTSJob("asr one", priority=PRIORITY_ASR))
+    q.put(TTSJob("asr two", priority=PRIORITY_ASR))
+    q.put(TTSJob("typed", priority=PRIORITY_MANUAL))
+    assert [q.get(timeout=0).text for _ in range(3)] == ["typed", "asr one", "asr two"]
+    assert q.get(timeout=0) is None
+
+
+def test_short_asr_finals_are_coalesced():
+    q, _ = _queue(coalesce_chars=12)
+    assert q.put(TTSJob("你好", priority=PRIORITY_ASR)) == PUT_QUEUED
+    assert q.put(TTSJob("在吗", priority=PRIORITY_ASR)) == PUT_MERGED
+    assert q.put(TTSJob("好的。", priority=PRIORITY_ASR)) == PUT_MERGED
+    assert q.put(TTSJob("这句话太长了不能合并进去", priority=PRIORITY_ASR)) == PUT_QUEUED
+    assert q.put(TTSJob("typed", priority=PRIORITY_MANUAL)) == PUT_QUEUED
+    assert q.put(TTSJob("ok", priority=PRIORITY_ASR)) == PUT_QUEUED  # last queued job is manual
+    texts = [q.get(timeout=0).text for _ in range(len(q))]
+    assert texts == ["typed", "你好，在吗，好的。", "这句话太长了不能合并进去", "ok"]
+    assert q.coalesced == 2
+
+
+def test_english_finals_are_joined_with_spaces():
+    q, _ = _queue()
+    q.put(TTSJob("hello", priority=PRIORITY_ASR))
+    q.put(TTSJob("how are you?", priority=PRIORITY_ASR))
+    q.put(TTSJob("brb", priority=PRIORITY_ASR))
+    assert q.get(timeout=0).text == "hello, how are you? brb"
+
+
+def test_different_params_are_not_coalesced():
+    q, _ = _queue()
+    q.put(TTSJob("一", {"speed_factor": 1.0}, priority=PRIORITY_ASR))
+    assert q.put(TTSJob("二", {"speed_factor": 1.5}, priority=PRIORITY_ASR)) == PUT_QUEUED
+    assert len(q) == 2
+
+
+def test_full_queue_evicts_oldest_low_priority_or_refuses():
+    q, drops = _queue(maxsize=2, coalesce_chars=0)
+    q.put(TTSJob("asr 1", priority=PRIORITY_ASR))
+    q.put(TTSJob("asr 2", priority=PRIORITY_ASR))
+    assert q.put(TTSJob("typed 1", priority=PRIORITY_MANUAL)) == PUT_QUEUED
+    assert drops == [("asr 1", DROP_FULL)]
+    q.put(TTSJob("typed 2", priority=PRIORITY_MANUAL))
+    # Everything queued is more important
+    assert q.put(TTSJob("asr 3", priority=PRIORITY_ASR)) == PUT_REFUSED
+    assert drops == [("asr 1", DROP_FULL), ("asr 2", DROP_FULL), ("asr 3", DROP_FULL)]
+    assert [q.get(timeout=0).text for _ in range(2)] == ["typed 1", "typed 2"]
+    assert q.dropped[DROP_FULL] == 3
+
+
+def test_stale_requests_are_dropped():
+    q, drops = _queue(max_age=10.0)
+    q.put(TTSJob("old", submitted_at=time.monotonic() - 11))
+    q.put(TTSJob("new"))
+    assert q.get(timeout=0).text == "new"
+    assert drops == [("old", DROP_EXPIRED)]
+
+
+def test_coalesced_job_keeps_earliest_deadline():
+    q, drops = _queue(max_age=10.0)
+    q.put(TTSJob("早", priority=PRIORITY_ASR, submitted_at=time.monotonic() - 11))
+    assert q.put(TTSJob("晚", priority=PRIORITY_ASR)) == PUT_MERGED
+    assert q.get(timeout=0) is None
+    assert drops == [("早，晚", DROP_EXPIRED)]
+
+
+def test_close_wakes_waiting_consumer():
+    q, drops = _queue()
+    result = []
+    consumer = threading.Thread(target=lambda: result.append(q.get()))
+    consumer.start()
+    time.sleep(0.02)
+    q.close()
+    consumer.join(timeout=1.0)
+    assert result == [None]
+    assert q.put(TTSJob("late")) == PUT_REFUSED
+    assert drops == [("late", DROP_CLOSED)]
+
+
+def test_cancel_pending_cancels_and_reports_every_job():
+    q, drops = _queue(coalesce_chars=0)
+    jobs = [TTSJob("one"), TTSJob("two", priority=PRIORITY_ASR)]
+    for job in jobs:
+        q.put(job)
+    q.cancel_pending()
+    assert len(q) == 0
+    assert all(job.cancel.cancelled for job in jobs)
+    assert drops == [("one", DROP_CANCELLED), ("two", DROP_CANCELLED)]
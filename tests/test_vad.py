@@ -0,0 +1,47 @@
+"""Tests for the energy/ZCR voice-activity gate."""
+
+import numpy as np
+
+from app.core.vad import EnergyVAD
+
+RATE = 16000
+BLOCK = RATE // 10
+
+
+def _tone(amplitude=0.3, freq=200):
+    t = np.arange(BLOCK) / RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def _silence():
+    return np.zeros(BLOCK, dtype=np.float32)
+
+
+def test_silence_keeps_gate_closed():
+    vad = EnergyVAD(RATE)
+    for _ in range(10):
+        assert vad.process(_silence()) is False
+
+
+def test_speech_opens_gate():
+    vad = EnergyVAD(RATE)
+    assert vad.process(_tone()) is True
+
+
+def test_hangover_keeps_gate_open_then_closes():
+    vad = EnergyVAD(RATE, hangover_ms=300)
+    vad.process(_tone())
+    results = [vad.process(_silence()) for _ in range(5)]
+    assert results[:2] == [True, True]
+    assert results[-1] is False
+
+
+def test_low_level_noise_is_not_speech():
+    vad = EnergyVAD(RATE, threshold_db=-45.0)
+    noise = (np.random.default_rng(0).standard_normal(BLOCK) * 1e-3).astype(np.float32)
+    assert vad.process(noise) is False
+
+
+def test_frame_decisions_shape():
+    vad = EnergyVAD(RATE)
+    assert vad.frame_decisions(_tone()).shape == (10,)
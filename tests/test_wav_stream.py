@@ -0,0 +1,66 @@
+"""Tests for the incremental WAV decoder used by streaming TTS."""
+
+import io
+import struct
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from app.common.wav_stream import WavStreamDecoder
+
+
+def _wav_bytes(data, rate, subtype="PCM_16"):
+    buf = io.BytesIO()
+    sf.write(buf, data, rate, format="WAV", subtype=subtype)
+    return buf.getvalue()
+
+
+def _streaming_header(rate, channels=1, bits=16):
+    """Header as GPT-SoVITS sends it in streaming_mode: data size left at 0."""
+    block_align = channels * bits // 8
+    fmt = struct.pack("<HHIIHH", 1, channels, rate, rate * block_align, block_align, bits)
+    return (b"RIFF" + struct.pack("<I", 36) + b"WAVE"
+            + b"fmt " + struct.pack("<I", 16) + fmt
+            + b"data" + struct.pack("<I", 0))
+
+
+def test_byte_by_byte_matches_soundfile():
+    rng = np.random.default_rng(0)
+    data = (rng.standard_normal(300) * 0.2).astype(np.float32)
+    wav = _wav_bytes(data, 32000)
+    expected, _ = sf.read(io.BytesIO(wav), dtype="float32")
+
+    decoder = WavStreamDecoder()
+    out = np.concatenate([decoder.feed(wav[i:i + 1]) for i in range(len(wav))])
+    assert decoder.sample_rate == 32000
+    np.testing.assert_allclose(out, expected, atol=1e-6)
+
+
+def test_streaming_header_then_raw_pcm():
+    pcm = (np.arange(-500, 500, dtype=np.int16) * 30).tobytes()
+    chunks = [_streaming_header(24000), pcm[:333], pcm[333:1001], pcm[1001:]]
+
+    frames = list(WavStreamDecoder().frames(chunks))
+    assert all(rate == 24000 for _, rate in frames)
+    samples = np.concatenate([f for f, _ in frames])
+    np.testing.assert_allclose(samples, np.frombuffer(pcm, dtype=np.int16) / 32768.0, atol=1e-7)
+
+
+def test_skips_extra_chunks_and_decodes_stereo_float():
+    data = np.stack([np.linspace(-1, 1, 50), np.linspace(1, -1, 50)], axis=1).astype(np.float32)
+    wav = _wav_bytes(data, 16000, subtype="FLOAT")
+    # Insert a LIST chunk between fmt and data, as some encoders do
+    pos = wav.index(b"data")
+    wav = wav[:pos] + b"LIST" + struct.pack("<I", 5) + b"abcde\x00" + wav[pos:]
+
+    decoder = WavStreamDecoder()
+    assert len(decoder.feed(wav[:40])) == 0  # still inside the header
+    out = decoder.feed(wav[40:])
+    assert decoder.channels == 2
+    np.testing.assert_array_equal(out, data)
+
+
+def test_rejects_non_wav():
+    with pytest.raises(ValueError):
+        WavStreamDecoder().feed(b"ID3\x04" + b"\x00" * 20)